@@ -7,6 +7,8 @@ This script shows how to merge product information with existing geocoded data.
 import json
 import pandas as pd
 
+from geocoding.datasets import atomic_write
+
 def load_customer_data():
     """Load existing customer data from data.js"""
     with open('data.js', 'r') as f:
@@ -86,7 +88,7 @@ def add_product_data(customers, product_df):
 
 def save_updated_data(customers):
     """Save updated customer data back to data.js"""
-    with open('data.js', 'w') as f:
+    with atomic_write('data.js') as f:
         f.write("// Real Edlio customer data with product information\n")
         f.write("// Updated with product data\n")
         f.write(f"// Total customers: {len(customers)}\n")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark the shared school-type classifier against the per-record rules it
+replaced, and check that both give identical labels.
+
+Names are sampled from the client workbooks and the HubSpot export, with
+extra synthetic names mixing every keyword, up to --names rows.
+
+    python3 benchmark_school_types.py --names 1000000
+"""
+
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from geocoding.hubspot import HUBSPOT_CSV, iter_hubspot_rows
+from geocoding.schooltype import KEYWORDS, classify_schools
+
+WORKBOOKS = [
+    ('UPDATED - MAP INFO - ALL CLIENTS-2025-07-08-16-18-18.xlsx', 'School Name'),
+    ('MAP INFO - ALL CMS CLIENTS-2025-07-08-12-05-34.xlsx', 'School or District Name'),
+]
+
+
+def legacy_school_type(name, institution_type=None, building_charter=None):
+    """The rules previously inlined in intelligent_geocoder.py"""
+    name_lower = name.lower()
+    if institution_type and 'charter' in str(institution_type).lower():
+        return 'charter'
+    if building_charter and pd.notna(building_charter):
+        if 'charter' in str(building_charter).lower():
+            return 'charter'
+    if any(word in name_lower for word in ['catholic', 'christian', 'episcopal', 'methodist', 'baptist', 'lutheran', 'parish', 'academy', 'preparatory', 'prep']):
+        if 'district' not in name_lower:
+            return 'private'
+    if any(word in name_lower for word in ['charter', 'academy']) and 'district' not in name_lower:
+        return 'charter'
+    if any(word in name_lower for word in ['district', 'unified', 'school district', 'public']):
+        return 'district'
+    if 'cmo' in name_lower or 'charter management' in name_lower:
+        return 'cmo'
+    if 'esc' in name_lower or 'educational service' in name_lower:
+        return 'esc'
+    if 'school' in name_lower:
+        return 'charter'
+    else:
+        return 'district'
+
+
+def sample_names(count, seed):
+    names = []
+    for path, column in WORKBOOKS:
+        try:
+            names.extend(pd.read_excel(path)[column].dropna().astype(str))
+        except FileNotFoundError:
+            pass
+    try:
+        names.extend(row['Company name'] for row in iter_hubspot_rows(HUBSPOT_CSV))
+    except FileNotFoundError:
+        pass
+
+    rng = random.Random(seed)
+    words = sorted(KEYWORDS) + ['Charter Management', 'School District', 'Preparatory', 'Crescent',
+                                'Lincoln', 'Valley', 'Elementary', 'Of', 'Unified', 'Service Center']
+    while len(names) < count:
+        if names and rng.random() < 0.5:
+            names.append(rng.choice(names))
+        else:
+            names.append(' '.join(rng.choice(words).title() for _ in range(rng.randint(1, 5))))
+    return names[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark school-type classification")
+    parser.add_argument('--names', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    names = pd.Series(sample_names(args.names, args.seed))
+    print(f"Classifying {len(names):,} names ({names.nunique():,} distinct)")
+
+    start = time.perf_counter()
+    legacy = [legacy_school_type(name) for name in names]
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    labels = classify_schools(names)
+    shared_seconds = time.perf_counter() - start
+
+    mismatches = sum(a != b for a, b in zip(legacy, labels))
+    print(f"Per-record rules: {legacy_seconds:.2f}s")
+    print(f"Shared classifier: {shared_seconds:.2f}s ({legacy_seconds / shared_seconds:.1f}x)")
+    print(f"Label counts: {labels.value_counts().to_dict()}")
+    print(f"Mismatched labels: {mismatches}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
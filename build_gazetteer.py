@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Build the offline ZIP/place gazetteer used by the geocoding package.
+
+Centroids are derived from street-level hits already in geocoded_data.json
+(median coordinate per ZIP and per city+state). Census gazetteer files can be
+layered on top for full national coverage:
+
+    python3 build_gazetteer.py --zcta 2020_Gaz_zcta_national.txt \
+                               --places 2020_Gaz_place_national.txt
+"""
+
+import argparse
+import json
+from collections import defaultdict
+from statistics import median
+
+from geocoding.gazetteer import DEFAULT_GAZETTEER_FILE, GazetteerBackend, parse_query
+
+
+def add_cache_centroids(gazetteer, cache_file):
+    """Add median ZIP and city+state centroids from a geocode cache"""
+    with open(cache_file, 'r') as f:
+        cache = json.load(f)
+
+    zip_points = defaultdict(list)
+    place_points = defaultdict(list)
+    zip_states = {}
+
+    for address, location in cache.items():
+        parsed = parse_query(address)
+        point = (location['lat'], location['lng'])
+        if parsed['zip']:
+            zip_points[parsed['zip']].append(point)
+            zip_states[parsed['zip']] = parsed['state'] or ''
+        if parsed['state'] and len(parsed['parts']) >= 2:
+            place_points[(parsed['parts'][-1], parsed['state'])].append(point)
+
+    for zip_code, points in zip_points.items():
+        gazetteer.add_zip(zip_code, median(p[0] for p in points), median(p[1] for p in points),
+                          zip_states[zip_code])
+    for (city, state), points in place_points.items():
+        gazetteer.add_place(city, state, median(p[0] for p in points), median(p[1] for p in points))
+
+    print(f"Derived {len(zip_points)} ZIP and {len(place_points)} place centroids from {cache_file}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cache', default='geocoded_data.json', help='geocode cache to derive centroids from')
+    parser.add_argument('--zcta', help='Census ZCTA gazetteer file')
+    parser.add_argument('--places', help='Census place gazetteer file')
+    parser.add_argument('--output', default=DEFAULT_GAZETTEER_FILE)
+    args = parser.parse_args()
+
+    gazetteer = GazetteerBackend()
+    add_cache_centroids(gazetteer, args.cache)
+    if args.zcta:
+        gazetteer.load_census_zcta(args.zcta)
+    if args.places:
+        gazetteer.load_census_places(args.places)
+
+    gazetteer.save(args.output)
+    print(f"Saved {len(gazetteer.zips)} ZIPs and {len(gazetteer.places)} places to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,9 @@ import json
 import os
 from datetime import datetime
 
+from geocoding.checkpoint import default_log_path, load_geocoding_progress
+from geocoding.processed import ProcessedIds, ids_path
+
 PROGRESS_FILE = "geocoding_progress.json"
 OUTPUT_FILE = "apptegy-geocoded-batch.json"
 
@@ -16,18 +19,24 @@ def check_status():
     print("=== Apptegy Schools Geocoding Status ===\n")
     
     # Check progress file
-    if os.path.exists(PROGRESS_FILE):
+    if os.path.exists(PROGRESS_FILE) or os.path.exists(default_log_path(PROGRESS_FILE)):
         try:
-            with open(PROGRESS_FILE, 'r') as f:
-                progress = json.load(f)
+            progress = load_geocoding_progress(PROGRESS_FILE)
             
             print(f"Last processed index: {progress.get('last_processed_index', 'N/A')}")
-            print(f"Successful geocodes: {len(progress.get('results', []))}")
+            processed = ProcessedIds.load(ids_path(PROGRESS_FILE))
+            if processed is not None:
+                print(f"Processed record IDs (as of last compaction): {len(processed)}")
+            results = progress.get('results', [])
+            # Rows the offline fallback placed at a ZIP/place centroid
+            approximate = sum(1 for result in results if (result.get('location') or {}).get('precision'))
+            print(f"Successful geocodes: {len(results) - approximate}")
+            print(f"Approximate (ZIP/place centroid): {approximate}")
             print(f"Failed attempts: {len(progress.get('errors', []))}")
             
-            total = len(progress.get('results', [])) + len(progress.get('errors', []))
+            total = len(results) + len(progress.get('errors', []))
             if total > 0:
-                success_rate = len(progress.get('results', [])) / total * 100
+                success_rate = (len(results) - approximate) / total * 100
                 print(f"Success rate: {success_rate:.1f}%")
             
             timestamp = progress.get('timestamp')
@@ -50,6 +59,7 @@ def check_status():
             metadata = output.get('metadata', {})
             print("=== Final Results ===")
             print(f"Total successful: {metadata.get('total_results', 'N/A')}")
+            print(f"  of which approximate (ZIP/place centroid): {metadata.get('approximate_results', 0)}")
             print(f"Total failed: {metadata.get('total_errors', 'N/A')}")
             print(f"Success rate: {metadata.get('success_rate', 'N/A'):.1f}%")
             print(f"Completed at: {metadata.get('processed_at', 'N/A')}")
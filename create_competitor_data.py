@@ -3,10 +3,12 @@
 Create competitor data structure for immediate testing
 """
 
-import csv
 import json
 import random
 
+from geocoding.datasets import atomic_write
+from geocoding.hubspot import iter_hubspot_rows
+
 def create_sample_competitor_data():
     """Create sample competitor data for immediate testing"""
     
@@ -31,56 +33,50 @@ def create_sample_competitor_data():
     
     competitor_schools = []
     
-    # Read first 50 rows from CSV for sample data
-    with open('hubspot-crm-exports-all-apptegy-schools-2025-07-15.csv', 'r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
+    # Stream the first 50 rows from CSV for sample data
+    for row in iter_hubspot_rows(limit=50):  # Just 50 for testing
+        company_name = row.get('Company name', '').strip()
+        domain = row.get('Company Domain Name', '').strip()
+        owner = row.get('Company owner', '').strip()
+        create_date = row.get('Create Date', '').strip()
+        
+        if not company_name:
+            continue
+        
+        # Randomly assign a location for testing
+        location = random.choice(sample_locations)
+        
+        # Add some randomness to coordinates
+        lat_offset = random.uniform(-0.1, 0.1)
+        lng_offset = random.uniform(-0.1, 0.1)
+        
+        school_data = {
+            'recordId': row.get('Record ID', ''),
+            'name': company_name,
+            'competitor': 'Apptegy',
+            'domain': domain,
+            'city': location['city'],
+            'state': location['state'],
+            'owner': owner,
+            'createDate': create_date,
+            'lat': location['lat'] + lat_offset,
+            'lng': location['lng'] + lng_offset,
+            'type': 'competitor',
+            'products': ['CMS'],  # Apptegy is primarily CMS
+            'customerType': 'District',  # Most are districts
+            'arr': random.randint(5000, 50000),  # Estimated ARR
+            'employees': random.randint(50, 5000),  # Estimated size
+            'lastContact': create_date,
+            'salesStage': 'Competitor',
+            'priority': 'High'
+        }
         
-        for i, row in enumerate(reader):
-            if i >= 50:  # Just 50 for testing
-                break
-                
-            company_name = row.get('Company name', '').strip()
-            domain = row.get('Company Domain Name', '').strip()
-            owner = row.get('Company owner', '').strip()
-            create_date = row.get('Create Date', '').strip()
-            
-            if not company_name:
-                continue
-            
-            # Randomly assign a location for testing
-            location = random.choice(sample_locations)
-            
-            # Add some randomness to coordinates
-            lat_offset = random.uniform(-0.1, 0.1)
-            lng_offset = random.uniform(-0.1, 0.1)
-            
-            school_data = {
-                'recordId': row.get('Record ID', ''),
-                'name': company_name,
-                'competitor': 'Apptegy',
-                'domain': domain,
-                'city': location['city'],
-                'state': location['state'],
-                'owner': owner,
-                'createDate': create_date,
-                'lat': location['lat'] + lat_offset,
-                'lng': location['lng'] + lng_offset,
-                'type': 'competitor',
-                'products': ['CMS'],  # Apptegy is primarily CMS
-                'customerType': 'District',  # Most are districts
-                'arr': random.randint(5000, 50000),  # Estimated ARR
-                'employees': random.randint(50, 5000),  # Estimated size
-                'lastContact': create_date,
-                'salesStage': 'Competitor',
-                'priority': 'High'
-            }
-            
-            competitor_schools.append(school_data)
+        competitor_schools.append(school_data)
     
     print(f"Created {len(competitor_schools)} sample competitor schools")
     
     # Save to JSON file
-    with open('apptegy-competitor-data.json', 'w', encoding='utf-8') as f:
+    with atomic_write('apptegy-competitor-data.json') as f:
         json.dump(competitor_schools, f, indent=2, ensure_ascii=False)
     
     print("Saved to apptegy-competitor-data.json")
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+List, restore and prune the snapshots kept for a dataset file.
+
+Every writer that replaces a dataset (merge_geocoded_data_v2.py,
+extract_geocoded_progress.py, ...) keeps the version it replaced in
+.snapshots/ next to it (see geocoding.datasets.SnapshotStore):
+
+    python3 dataset_snapshots.py list apptegy-geocoded-current.json
+    python3 dataset_snapshots.py restore apptegy-geocoded-current.json 3f2a9c
+    python3 dataset_snapshots.py prune apptegy-geocoded-current.json
+"""
+
+import argparse
+import sys
+
+from geocoding.datasets import SnapshotStore
+from geocoding.deltas import DeltaLog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage dataset snapshots")
+    parser.add_argument('action', choices=['list', 'restore', 'prune'])
+    parser.add_argument('path', help="Dataset file, e.g. apptegy-geocoded-current.json")
+    parser.add_argument('version', nargs='?', help="Snapshot hash prefix to restore (default: newest)")
+    args = parser.parse_args()
+
+    store = SnapshotStore.for_file(args.path)
+    if args.action == 'list':
+        entries = store.history(args.path)
+        if not entries:
+            print(f"No snapshots of {args.path}")
+        for entry in entries:
+            print(f"{entry['sha256'][:12]}  {entry['taken_at'][:19]}  {entry['size']:>12,}  {entry['label']}")
+    elif args.action == 'restore':
+        try:
+            entry = store.restore(args.path, args.version)
+        except (KeyError, ValueError) as e:
+            sys.exit(f"❌ {e.args[0]}")
+        print(f"✅ Restored {args.path} to {entry['sha256'][:12]} ({entry['taken_at'][:19]})")
+        log = DeltaLog(args.path)
+        if log.manifest():
+            # Not a delta of the version clients hold: they reload it in full
+            print(f"Dataset version {log.record([], [], [], None)['version']}")
+    else:
+        deleted = store.prune(args.path)
+        print(f"🧹 Deleted {deleted} unreferenced snapshot objects")
+
+
+if __name__ == "__main__":
+    main()
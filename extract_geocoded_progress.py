@@ -6,16 +6,23 @@ Extract successfully geocoded schools from the progress file
 import json
 import os
 
+from geocoding.checkpoint import default_log_path, load_geocoding_progress
+from geocoding.compact import compact_path, write_compact
+from geocoding.datasets import SnapshotStore, atomic_write
+from geocoding.deltas import DeltaLog
+from geocoding.matching import dedup_records
+from geocoding.merge import batch_record_id
+
 def extract_geocoded_schools():
     """Extract successfully geocoded schools from progress"""
     
     # Read the current progress
-    if not os.path.exists('geocoding_progress.json'):
+    if not (os.path.exists('geocoding_progress.json') or os.path.exists(default_log_path('geocoding_progress.json'))):
         print("No progress file found")
         return
     
-    with open('geocoding_progress.json', 'r') as f:
-        progress = json.load(f)
+    # Snapshot plus any checkpoint records appended since the last compaction
+    progress = load_geocoding_progress('geocoding_progress.json')
     
     # Extract successfully geocoded schools from results
     successful_geocodes = []
@@ -27,7 +34,7 @@ def extract_geocoded_schools():
             
             # Create competitor data structure
             school_data = {
-                'recordId': result.get('record_id', ''),
+                'recordId': batch_record_id(result),
                 'name': result.get('company_name', ''),
                 'competitor': 'Apptegy',
                 'domain': '',  # Will be filled from original CSV later
@@ -41,6 +48,8 @@ def extract_geocoded_schools():
                 'type': 'competitor'
             }
             
+            if location.get('precision'):
+                school_data['precision'] = location['precision']  # ZIP/place centroid, not the school
             successful_geocodes.append(school_data)
     
     print(f"Found {len(successful_geocodes)} successfully geocoded schools")
@@ -55,16 +64,30 @@ def extract_geocoded_schools():
             all_geocoded.extend(demo_data)
             print(f"Added {len(demo_data)} demo schools")
     
-    # Add the new geocoded schools
+    # Add the new geocoded schools, skipping ones the demo set already has
+    # under another name or Record ID
     all_geocoded.extend(successful_geocodes)
+    duplicates = []
+    all_geocoded = dedup_records(all_geocoded, duplicates=duplicates)
+    if duplicates:
+        print(f"Skipped {len(duplicates)} duplicate schools (same place, similar name)")
     
     # Save to new file
     output_file = 'apptegy-geocoded-current.json'
-    with open(output_file, 'w') as f:
+    store = SnapshotStore.for_file(output_file)
+    with atomic_write(output_file) as f:
         json.dump(all_geocoded, f, indent=2)
+        # The version being replaced stays restorable (hard link, no copy)
+        snapshot = store.snapshot(output_file, label='before extract_geocoded_progress')
+    
+    write_compact(all_geocoded, compact_path(output_file))
+    # Diffed against the snapshot, so clients on the previous version fetch only the changes
+    manifest = DeltaLog(output_file).record_diff(snapshot and store.object_path(snapshot['sha256']),
+                                                 snapshot and snapshot['sha256'])
     
     print(f"Total schools saved: {len(all_geocoded)}")
-    print(f"Saved to: {output_file}")
+    print(f"Saved to: {output_file} (compact copy for the map: {compact_path(output_file)})")
+    print(f"Dataset version: {manifest['version']}")
     
     # Generate summary statistics
     states = {}
@@ -1,59 +1,33 @@
 import pandas as pd
 import json
-import time
-import os
-from urllib.parse import quote
-import urllib.request
 from datetime import datetime
 
-def geocode_address(address, retry_count=3):
-    """Use Nominatim (OpenStreetMap) to geocode addresses with retry logic"""
-    for attempt in range(retry_count):
-        try:
-            # Clean and format address
-            encoded_address = quote(address)
-            url = f"https://nominatim.openstreetmap.org/search?q={encoded_address}&format=json&limit=1&countrycodes=us"
-            
-            # Add headers to avoid being blocked
-            headers = {
-                'User-Agent': 'Edlio Customer Map Geocoder/1.0'
-            }
-            
-            request = urllib.request.Request(url, headers=headers)
-            response = urllib.request.urlopen(request)
-            data = json.loads(response.read().decode())
-            
-            if data and len(data) > 0:
-                return float(data[0]['lat']), float(data[0]['lon'])
-            return None, None
-        except Exception as e:
-            if attempt < retry_count - 1:
-                print(f"  Retry {attempt + 1} for {address}")
-                time.sleep(2)
-            else:
-                print(f"  Error geocoding {address}: {e}")
-                return None, None
-
-def format_url(url):
-    """Clean and format URL"""
-    if pd.isna(url) or url == '' or url == 'N/A':
-        return None
-    url = str(url).strip()
-    if not url.startswith(('http://', 'https://')):
-        url = 'https://' + url
-    return url
+from geocoding import AdaptiveRateLimiter, GeocodeCache, get_backend
+from geocoding.datasets import atomic_write
+from geocoding.ingest import address_sheet
+from geocoding.workbook import read_workbook
+
+backend = get_backend(user_agent='Edlio Customer Map Geocoder/1.0', bucket=AdaptiveRateLimiter(1.0),
+                      countrycodes='us')
+
+def geocode_address(address):
+    """Use the shared geocoding backend (Nominatim by default) to geocode addresses"""
+    try:
+        result = backend.search(address)
+    except Exception as e:
+        print(f"Error geocoding {address}: {e}")
+        return None, None
+    if result:
+        return result['lat'], result['lng']
+    return None, None
 
 def load_existing_geocodes():
-    """Load previously geocoded data if exists"""
-    if os.path.exists('geocoded_data.json'):
-        with open('geocoded_data.json', 'r') as f:
-            return json.load(f)
-    return {}
+    """Open the SQLite geocode cache (seeded from geocoded_data.json on first run)"""
+    return GeocodeCache()
 
 def save_geocodes(geocoded_data):
-    """Save geocoded data to JSON file"""
-    with open('geocoded_data.json', 'w') as f:
-        json.dump(geocoded_data, f, indent=2)
+    """Export the geocode cache to geocoded_data.json"""
+    geocoded_data.export_json()
 
 # Load existing geocoded data
 geocoded_cache = load_existing_geocodes()
@@ -61,8 +35,8 @@ print(f"Loaded {len(geocoded_cache)} existing geocoded addresses")
 
 # Read Excel files
 print("\nReading Excel files...")
-charter_df = pd.read_excel('MAP - Charter & Private Clients Address-2025-07-03-08-26-15.xlsx')
-district_df = pd.read_excel('MAP - District Client Address-2025-07-03-08-26-06.xlsx')
+charter_df = read_workbook('MAP - Charter & Private Clients Address-2025-07-03-08-26-15.xlsx')
+district_df = read_workbook('MAP - District Client Address-2025-07-03-08-26-06.xlsx')
 
 all_customers = []
 total_processed = 0
@@ -73,108 +47,80 @@ total_failed = 0
 print(f"\nProcessing {len(charter_df)} charter/private schools...")
 start_time = datetime.now()
 
-for idx, row in charter_df.iterrows():
-    name = str(row.get('School Name', 'Unknown School')).strip()
-    url = format_url(row.get('Website'))
-    
-    if url:  # Only process if URL exists
-        # Create full address
-        street = str(row.get('Street Address', '')).strip()
-        city = str(row.get('City Address', '')).strip()
-        state = str(row.get('STATE', '')).strip()
-        zip_code = str(row.get('Zip Address', '')).strip()
-        
-        full_address = f"{street}, {city}, {state} {zip_code}, USA"
-        
-        # Check cache first
-        if full_address in geocoded_cache:
-            lat, lng = geocoded_cache[full_address]['lat'], geocoded_cache[full_address]['lng']
-            print(f"[{idx+1}/{len(charter_df)}] {name} - Using cached location")
-        else:
-            # Geocode address
-            print(f"[{idx+1}/{len(charter_df)}] {name} - Geocoding...")
-            lat, lng = geocode_address(full_address)
-            
-            if lat and lng:
-                # Save to cache
-                geocoded_cache[full_address] = {'lat': lat, 'lng': lng}
-                total_geocoded += 1
-            else:
-                total_failed += 1
-            
-            # Be nice to the geocoding service
-            time.sleep(1.5)  # Increased delay for safety
+# Names, URLs and addresses for the whole sheet; only rows with a URL are processed
+charter_sheet = address_sheet(charter_df, 'Unknown School')
+for idx, name, url, state, full_address in charter_sheet[['name', 'url', 'state', 'address']].itertuples():
+    # Check cache first
+    if full_address in geocoded_cache:
+        lat, lng = geocoded_cache[full_address]['lat'], geocoded_cache[full_address]['lng']
+        print(f"[{idx+1}/{len(charter_df)}] {name} - Using cached location")
+    else:
+        # Geocode address
+        print(f"[{idx+1}/{len(charter_df)}] {name} - Geocoding...")
+        lat, lng = geocode_address(full_address)
         
         if lat and lng:
-            all_customers.append({
-                'name': name,
-                'lat': lat,
-                'lng': lng,
-                'url': url,
-                'type': 'charter',
-                'state': state
-            })
-        
-        total_processed += 1
-        
-        # Save progress every 50 addresses
-        if total_processed % 50 == 0:
-            save_geocodes(geocoded_cache)
-            elapsed = (datetime.now() - start_time).seconds
-            print(f"  Progress saved. Elapsed: {elapsed}s, Rate: {total_geocoded}/{elapsed}s")
+            # Save to cache
+            geocoded_cache[full_address] = {'lat': lat, 'lng': lng}
+            total_geocoded += 1
+        else:
+            total_failed += 1
+    
+    if lat and lng:
+        all_customers.append({
+            'name': name,
+            'lat': lat,
+            'lng': lng,
+            'url': url,
+            'type': 'charter',
+            'state': state
+        })
+    
+    total_processed += 1
+    
+    # Report progress every 50 addresses (cache entries are committed as they are geocoded)
+    if total_processed % 50 == 0:
+        elapsed = (datetime.now() - start_time).seconds
+        print(f"  Processed {total_processed}. Elapsed: {elapsed}s, Rate: {total_geocoded}/{elapsed}s")
 
 # Process district schools
 print(f"\nProcessing {len(district_df)} district schools...")
 
-for idx, row in district_df.iterrows():
-    name = str(row.get('School Name', 'Unknown District')).strip()
-    url = format_url(row.get('Website'))
-    
-    if url:  # Only process if URL exists
-        # Create full address
-        street = str(row.get('Street Address', '')).strip()
-        city = str(row.get('City Address', '')).strip()
-        state = str(row.get('STATE', '')).strip()
-        zip_code = str(row.get('Zip Address', '')).strip()
-        
-        full_address = f"{street}, {city}, {state} {zip_code}, USA"
-        
-        # Check cache first
-        if full_address in geocoded_cache:
-            lat, lng = geocoded_cache[full_address]['lat'], geocoded_cache[full_address]['lng']
-            print(f"[{idx+1}/{len(district_df)}] {name} - Using cached location")
-        else:
-            # Geocode address
-            print(f"[{idx+1}/{len(district_df)}] {name} - Geocoding...")
-            lat, lng = geocode_address(full_address)
-            
-            if lat and lng:
-                # Save to cache
-                geocoded_cache[full_address] = {'lat': lat, 'lng': lng}
-                total_geocoded += 1
-            else:
-                total_failed += 1
-            
-            # Be nice to the geocoding service
-            time.sleep(1.5)  # Increased delay for safety
+# Names, URLs and addresses for the whole sheet; only rows with a URL are processed
+district_sheet = address_sheet(district_df, 'Unknown District')
+for idx, name, url, state, full_address in district_sheet[['name', 'url', 'state', 'address']].itertuples():
+    # Check cache first
+    if full_address in geocoded_cache:
+        lat, lng = geocoded_cache[full_address]['lat'], geocoded_cache[full_address]['lng']
+        print(f"[{idx+1}/{len(district_df)}] {name} - Using cached location")
+    else:
+        # Geocode address
+        print(f"[{idx+1}/{len(district_df)}] {name} - Geocoding...")
+        lat, lng = geocode_address(full_address)
         
         if lat and lng:
-            all_customers.append({
-                'name': name,
-                'lat': lat,
-                'lng': lng,
-                'url': url,
-                'type': 'district',
-                'state': state
-            })
-        
-        total_processed += 1
-        
-        # Save progress every 50 addresses
-        if total_processed % 50 == 0:
-            save_geocodes(geocoded_cache)
-            elapsed = (datetime.now() - start_time).seconds
-            print(f"  Progress saved. Elapsed: {elapsed}s, Rate: {total_geocoded}/{elapsed}s")
+            # Save to cache
+            geocoded_cache[full_address] = {'lat': lat, 'lng': lng}
+            total_geocoded += 1
+        else:
+            total_failed += 1
+    
+    if lat and lng:
+        all_customers.append({
+            'name': name,
+            'lat': lat,
+            'lng': lng,
+            'url': url,
+            'type': 'district',
+            'state': state
+        })
+    
+    total_processed += 1
+    
+    # Report progress every 50 addresses (cache entries are committed as they are geocoded)
+    if total_processed % 50 == 0:
+        elapsed = (datetime.now() - start_time).seconds
+        print(f"  Processed {total_processed}. Elapsed: {elapsed}s, Rate: {total_geocoded}/{elapsed}s")
 
 # Final save
 save_geocodes(geocoded_cache)
@@ -202,12 +148,12 @@ for i, customer in enumerate(all_customers):
 js_content += "];"
 
 # Write to data.js
-with open('data.js', 'w', encoding='utf-8') as f:
+with atomic_write('data.js') as f:
     f.write(js_content)
 
 print(f"\ndata.js has been updated with {len(all_customers)} real customers!")
 
 # Also save customer data as JSON for backup
-with open('customers_backup.json', 'w', encoding='utf-8') as f:
+with atomic_write('customers_backup.json') as f:
     json.dump(all_customers, f, indent=2)
 print("Backup saved to customers_backup.json")
\ No newline at end of file
@@ -11,314 +11,292 @@ Features:
 - State extraction from domains and names
 """
 
-import csv
-import json
-import time
-import re
 import logging
 import requests
-from typing import Dict, List, Optional, Tuple
-from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from datetime import datetime, timedelta
 import os
 import signal
 import sys
 
+from geocoding import (AdaptiveRateLimiter, CheckpointLog, GeocodingEngine, SingleFlight, get_backend,
+                       load_default_gazetteer, load_geocoding_progress, normalize_query)
+from geocoding.checkpoint import progress_snapshot
+from geocoding.datasets import write_json
+from geocoding.hints import domain_state, query_parts, row_city
+from geocoding.hubspot import HUBSPOT_CSV, iter_hubspot_rows, iter_pending, row_id
+from geocoding.negative import ERROR, INSUFFICIENT_DATA, NO_RESULTS, RATE_LIMITED, TIMEOUT, NegativeCache
+from geocoding.planner import QueryPlanner, format_query
+from geocoding.processed import ProcessedIds, ids_path
+
 # Configuration
-CSV_FILE = "hubspot-crm-exports-all-apptegy-schools-2025-07-15.csv"
+CSV_FILE = HUBSPOT_CSV
 OUTPUT_FILE = "apptegy-geocoded-batch.json"
 PROGRESS_FILE = "geocoding_progress.json"
 LOG_FILE = "geocoding.log"
 
-SKIP_ROWS = 50  # Skip first 50 already processed rows
+SKIP_ROWS = 50  # First 50 rows were processed before progress tracking; seeds a fresh processed-ID set
 BATCH_SIZE = 100
-RATE_LIMIT_DELAY = 1.0  # 1 second between requests
+TRANSIENT_FAILURES = (RATE_LIMITED, TIMEOUT, ERROR)
+COMPACT_INTERVAL = 2000  # Fold the checkpoint log into the snapshot every N rows
+REQUEST_RATE = 1.0  # Starting requests/second (aggregate across workers)
+MAX_REQUEST_RATE = 1.0  # Provider ceiling; the limiter halves on 429 and climbs back to this
+CONCURRENCY = 4  # Requests in flight
 STATUS_UPDATE_INTERVAL = 10
-MAX_RETRIES = 3
 REQUEST_TIMEOUT = 30
 
-# State mapping for common domain patterns
-STATE_MAPPING = {
-    '.k12.al.us': 'Alabama', '.k12.ak.us': 'Alaska', '.k12.az.us': 'Arizona',
-    '.k12.ar.us': 'Arkansas', '.k12.ca.us': 'California', '.k12.co.us': 'Colorado',
-    '.k12.ct.us': 'Connecticut', '.k12.de.us': 'Delaware', '.k12.fl.us': 'Florida',
-    '.k12.ga.us': 'Georgia', '.k12.hi.us': 'Hawaii', '.k12.id.us': 'Idaho',
-    '.k12.il.us': 'Illinois', '.k12.in.us': 'Indiana', '.k12.ia.us': 'Iowa',
-    '.k12.ks.us': 'Kansas', '.k12.ky.us': 'Kentucky', '.k12.la.us': 'Louisiana',
-    '.k12.me.us': 'Maine', '.k12.md.us': 'Maryland', '.k12.ma.us': 'Massachusetts',
-    '.k12.mi.us': 'Michigan', '.k12.mn.us': 'Minnesota', '.k12.ms.us': 'Mississippi',
-    '.k12.mo.us': 'Missouri', '.k12.mt.us': 'Montana', '.k12.ne.us': 'Nebraska',
-    '.k12.nv.us': 'Nevada', '.k12.nh.us': 'New Hampshire', '.k12.nj.us': 'New Jersey',
-    '.k12.nm.us': 'New Mexico', '.k12.ny.us': 'New York', '.k12.nc.us': 'North Carolina',
-    '.k12.nd.us': 'North Dakota', '.k12.oh.us': 'Ohio', '.k12.ok.us': 'Oklahoma',
-    '.k12.or.us': 'Oregon', '.k12.pa.us': 'Pennsylvania', '.k12.ri.us': 'Rhode Island',
-    '.k12.sc.us': 'South Carolina', '.k12.sd.us': 'South Dakota', '.k12.tn.us': 'Tennessee',
-    '.k12.tx.us': 'Texas', '.k12.ut.us': 'Utah', '.k12.vt.us': 'Vermont',
-    '.k12.va.us': 'Virginia', '.k12.wa.us': 'Washington', '.k12.wv.us': 'West Virginia',
-    '.k12.wi.us': 'Wisconsin', '.k12.wy.us': 'Wyoming',
-    # Additional state patterns
-    '.tx.us': 'Texas', '.ca.us': 'California', '.ny.us': 'New York',
-    '.fl.us': 'Florida', '.il.us': 'Illinois', '.pa.us': 'Pennsylvania',
-    '.oh.us': 'Ohio', '.ga.us': 'Georgia', '.nc.us': 'North Carolina',
-    '.mi.us': 'Michigan', '.nj.us': 'New Jersey', '.va.us': 'Virginia',
-    '.wa.us': 'Washington', '.az.us': 'Arizona', '.ma.us': 'Massachusetts',
-    '.tn.us': 'Tennessee', '.in.us': 'Indiana', '.mo.us': 'Missouri',
-    '.md.us': 'Maryland', '.wi.us': 'Wisconsin', '.co.us': 'Colorado',
-    '.mn.us': 'Minnesota', '.sc.us': 'South Carolina', '.al.us': 'Alabama',
-    '.la.us': 'Louisiana', '.ky.us': 'Kentucky', '.or.us': 'Oregon',
-    '.ok.us': 'Oklahoma', '.ct.us': 'Connecticut', '.ut.us': 'Utah',
-    '.ia.us': 'Iowa', '.nv.us': 'Nevada', '.ar.us': 'Arkansas',
-    '.ms.us': 'Mississippi', '.ks.us': 'Kansas', '.nm.us': 'New Mexico',
-    '.ne.us': 'Nebraska', '.wv.us': 'West Virginia', '.id.us': 'Idaho',
-    '.nh.us': 'New Hampshire', '.me.us': 'Maine', '.ri.us': 'Rhode Island',
-    '.mt.us': 'Montana', '.de.us': 'Delaware', '.sd.us': 'South Dakota',
-    '.nd.us': 'North Dakota', '.ak.us': 'Alaska', '.vt.us': 'Vermont',
-    '.wy.us': 'Wyoming', '.hi.us': 'Hawaii'
-}
+def result_key(result: Dict) -> str:
+    """Processed-set key of a result: its Record ID, or the row_id() saved
+    for rows without one"""
+    return result.get('record_id') or result.get('row_key', '')
+
+def is_retryable(result: Dict) -> bool:
+    """Whether a result failed for a transient reason (rate limit, timeout,
+    error): the row is not marked processed and is geocoded again once its
+    retry_at has passed"""
+    return not result.get('geocoded') and result.get('failure_reason') in TRANSIENT_FAILURES
+
+def is_approximate(result: Dict) -> bool:
+    """Whether a result was located by the offline ZIP/place centroid
+    fallback rather than at the school itself"""
+    return bool((result.get('location') or {}).get('precision'))
 
 class GeocodingProgress:
-    """Handles progress tracking and resume functionality"""
+    """Handles progress tracking and resume functionality.
     
-    def __init__(self, progress_file: str):
+    Each processed row is appended to an append-only log next to the
+    progress file; the log is compacted into the snapshot every
+    COMPACT_INTERVAL rows and at the end of a run. Resume is keyed on
+    Record ID (hubspot.row_id() for rows without one): the processed IDs
+    are kept as a sorted array saved next to the snapshot, so a re-ordered
+    or extended export only geocodes new IDs. Rows that failed transiently
+    stay out of the processed set and are listed in retry_at until they
+    are geocoded again.
+    """
+    
+    def __init__(self, progress_file: str, skip_rows: int = SKIP_ROWS):
         self.progress_file = progress_file
-        self.last_processed_index = SKIP_ROWS
+        self.log = CheckpointLog(progress_file)
+        self.ids_file = ids_path(progress_file)
+        self.skip_rows = skip_rows
+        self.last_processed_index = skip_rows
+        self.processed = ProcessedIds()
+        self.retry_at = {}  # Key -> retry_at of rows that failed transiently
         self.results = []
         self.errors = []
+        self.approximate = 0  # Results placed at a ZIP/place centroid
         self.load_progress()
     
     def load_progress(self):
-        """Load existing progress if available"""
-        if os.path.exists(self.progress_file):
-            try:
-                with open(self.progress_file, 'r') as f:
-                    data = json.load(f)
-                    self.last_processed_index = data.get('last_processed_index', SKIP_ROWS)
-                    self.results = data.get('results', [])
-                    self.errors = data.get('errors', [])
-                    logging.info(f"Resumed from index {self.last_processed_index}, "
-                               f"with {len(self.results)} existing results and {len(self.errors)} errors")
-            except Exception as e:
-                logging.error(f"Error loading progress: {e}")
+        """Load existing progress (snapshot + replayed log) if available"""
+        try:
+            data = load_geocoding_progress(self.progress_file, self.skip_rows, repair=True)
+            self.last_processed_index = data['last_processed_index']
+            self.results = data['results']
+            self.errors = data['errors']
+            self.approximate = sum(1 for result in self.results if is_approximate(result))
+            self.retry_at = {result_key(error): error.get('retry_at', '')
+                             for error in self.errors if is_retryable(error)}
+            done = [result_key(result) for result in self.results + self.errors
+                    if not is_retryable(result)]
+            
+            processed = ProcessedIds.load(self.ids_file)
+            if processed is None:
+                # Offset-based progress (or a fresh start): the first
+                # last_processed_index rows of the export are done. Saved right
+                # away, so later row indexes are never read as offsets.
+                processed = ProcessedIds()
+                if self.last_processed_index:
+                    processed.update(row_id(row) for row in
+                                     iter_hubspot_rows(CSV_FILE, limit=self.last_processed_index))
+                processed.update(done)
+                processed.difference_update(self.retry_at)
+                processed.save(self.ids_file)
+            processed.update(done)
+            # Sets saved before transient failures were kept out include them
+            processed.difference_update(self.retry_at)
+            self.processed = processed
+            
+            if self.results or self.errors:
+                logging.info(f"Resumed with {len(self.processed)} processed record IDs, "
+                           f"{len(self.results)} existing results and {len(self.errors)} errors")
+        except Exception as e:
+            logging.error(f"Error loading progress: {e}")
+    
+    def record(self, result: Dict, index: int):
+        """Record one processed row and append it to the checkpoint log"""
+        key = result_key(result)
+        if key in self.retry_at:
+            # A retry supersedes the row's earlier transient failure
+            del self.retry_at[key]
+            self.errors = [error for error in self.errors if result_key(error) != key]
+        if result['geocoded']:
+            self.results.append(result)
+            self.approximate += is_approximate(result)
+        else:
+            self.errors.append(result)
+        if is_retryable(result):
+            self.retry_at[key] = result.get('retry_at', '')
+        else:
+            self.processed.add(key)
+        self.last_processed_index = max(self.last_processed_index, index + 1)
+        
+        try:
+            self.log.append({'index': index, 'result': result})
+            if self.log.appended >= COMPACT_INTERVAL:
+                self.compact()
+        except Exception as e:
+            logging.error(f"Error writing checkpoint: {e}")
+    
+    def waiting(self) -> Set[str]:
+        """Keys of transiently failed rows whose retry_at has not passed yet"""
+        now = datetime.now().isoformat()
+        return {key for key, retry_at in self.retry_at.items() if retry_at > now}
+    
+    @property
+    def success_rate(self) -> float:
+        """Percentage of processed rows geocoded to the school itself
+        (centroid fallbacks not included)"""
+        total = len(self.results) + len(self.errors)
+        return (len(self.results) - self.approximate) / total * 100 if total else 0.0
+    
+    def summary(self) -> str:
+        return (f"{len(self.results) - self.approximate} geocoded, {self.approximate} approximate "
+                f"(ZIP/place centroid), {len(self.errors)} failed")
     
     def save_progress(self):
-        """Save current progress to file"""
+        """Checkpoint: force appended records to disk"""
         try:
-            progress_data = {
-                'last_processed_index': self.last_processed_index,
-                'results': self.results,
-                'errors': self.errors,
-                'timestamp': datetime.now().isoformat()
-            }
-            with open(self.progress_file, 'w') as f:
-                json.dump(progress_data, f, indent=2)
+            self.log.sync()
         except Exception as e:
             logging.error(f"Error saving progress: {e}")
+    
+    def compact(self):
+        """Fold the checkpoint log into the progress snapshot"""
+        try:
+            # Saved first: replaying the log re-adds any IDs it is missing
+            self.processed.save(self.ids_file)
+            self.log.compact(progress_snapshot(self.last_processed_index, self.results, self.errors))
+        except Exception as e:
+            logging.error(f"Error compacting progress: {e}")
 
 class SchoolGeocoder:
     """Main geocoding class for Apptegy schools"""
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Apptegy School Geocoder (educational research)'
-        })
-        self.progress = GeocodingProgress(PROGRESS_FILE)
+    def __init__(self, progress_file: str = PROGRESS_FILE, skip_rows: int = SKIP_ROWS,
+                 request_rate: float = REQUEST_RATE, max_request_rate: float = MAX_REQUEST_RATE,
+                 rate_limiter: Optional[AdaptiveRateLimiter] = None, handle_signals: bool = True):
+        # A caller geocoding other records too passes its limiter, so both share one rate budget
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter(request_rate, max_rate=max_request_rate)
+        self.backend = get_backend(
+            user_agent='Apptegy School Geocoder (educational research)',
+            bucket=self.rate_limiter,
+            timeout=REQUEST_TIMEOUT,
+            dedupe=1
+        )
+        self.gazetteer = load_default_gazetteer()
+        self.negative_cache = NegativeCache()
+        self.planner = QueryPlanner()
+        # Lookups that failed transiently are not reused (see is_retryable)
+        self.lookups = SingleFlight(keep=lambda outcome: outcome[0] is not None or
+                                    not any(reason in TRANSIENT_FAILURES for reason in outcome[1]))
+        self.progress = GeocodingProgress(progress_file, skip_rows)
         self.interrupted = False
         
-        # Set up signal handlers for graceful shutdown
-        signal.signal(signal.SIGINT, self._signal_handler)
-        signal.signal(signal.SIGTERM, self._signal_handler)
+        # Set up signal handlers for graceful shutdown (unless embedded in a daemon)
+        if handle_signals:
+            signal.signal(signal.SIGINT, self._signal_handler)
+            signal.signal(signal.SIGTERM, self._signal_handler)
     
     def _signal_handler(self, signum, frame):
         """Handle interruption signals gracefully"""
-        logging.info(f"Received signal {signum}, saving progress and shutting down...")
+        logging.info(f"Received signal {signum}, finishing in-flight requests and shutting down...")
         self.interrupted = True
-        self.progress.save_progress()
-        sys.exit(0)
     
-    def extract_state_from_domain(self, domain: str) -> Optional[str]:
-        """Extract state from domain name"""
-        if not domain:
-            return None
-        
-        domain_lower = domain.lower()
-        for pattern, state in STATE_MAPPING.items():
-            if pattern in domain_lower:
-                return state
-        return None
-    
-    def extract_location_from_name(self, name: str) -> Tuple[Optional[str], Optional[str]]:
-        """Extract city and state from company name"""
-        if not name:
-            return None, None
-        
-        # Common patterns for school names with locations
-        patterns = [
-            r'([A-Za-z\s]+)\s+(?:School District|ISD|USD|CSD)\s*(?:of\s+)?([A-Za-z\s]+)(?:,\s*([A-Z]{2}))?',
-            r'([A-Za-z\s]+)\s+(?:Elementary|Middle|High|Schools?)\s*,?\s*([A-Za-z\s]+)(?:,\s*([A-Z]{2}))?',
-            r'([A-Za-z\s]+)\s+(?:County|Parish)\s+(?:School District|Schools)',
-            r'City of ([A-Za-z\s]+)\s+(?:School District|Schools)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, name, re.IGNORECASE)
-            if match:
-                groups = match.groups()
-                if len(groups) >= 2:
-                    city = groups[1].strip() if groups[1] else groups[0].strip()
-                    state = groups[2].strip() if len(groups) > 2 and groups[2] else None
-                    return city, state
-        
-        return None, None
-    
-    def infer_state_from_city(self, city: str) -> Optional[str]:
-        """Infer state from well-known cities"""
-        if not city:
-            return None
-        
-        # Common city -> state mappings for disambiguation
-        city_state_map = {
-            'euclid': 'Ohio',
-            'cleveland': 'Ohio',
-            'columbus': 'Ohio',
-            'cincinnati': 'Ohio',
-            'toledo': 'Ohio',
-            'akron': 'Ohio',
-            'dayton': 'Ohio',
-            'houston': 'Texas',
-            'dallas': 'Texas',
-            'austin': 'Texas',
-            'san antonio': 'Texas',
-            'fort worth': 'Texas',
-            'los angeles': 'California',
-            'san francisco': 'California',
-            'san diego': 'California',
-            'sacramento': 'California',
-            'fresno': 'California',
-            'chicago': 'Illinois',
-            'springfield': 'Illinois',
-            'peoria': 'Illinois',
-            'rockford': 'Illinois',
-            'phoenix': 'Arizona',
-            'tucson': 'Arizona',
-            'mesa': 'Arizona',
-            'atlanta': 'Georgia',
-            'savannah': 'Georgia',
-            'augusta': 'Georgia',
-            'miami': 'Florida',
-            'tampa': 'Florida',
-            'orlando': 'Florida',
-            'jacksonville': 'Florida',
-            'tallahassee': 'Florida'
-        }
-        
-        city_lower = city.lower().strip()
-        return city_state_map.get(city_lower)
+    def build_query_parts(self, school_data: Dict) -> Dict[str, str]:
+        """Extract the name, city and state used to build search queries"""
+        return query_parts(school_data)
     
     def build_search_query(self, school_data: Dict) -> str:
         """Build search query from available school data"""
-        query_parts = []
-        
-        # Start with company name
-        company_name = school_data.get('Company name', '').strip()
-        if company_name:
-            # Clean up the company name for better geocoding
-            cleaned_name = re.sub(r'\(.*?\)', '', company_name)  # Remove parentheses content
-            cleaned_name = re.sub(r'\s+', ' ', cleaned_name).strip()  # Normalize whitespace
-            query_parts.append(cleaned_name)
-        
-        # Add city if available
-        city = school_data.get('City', '').strip() or school_data.get('Agile Location City', '').strip()
-        if city:
-            query_parts.append(city)
-        
-        # Extract location from name if no city provided
-        if not city:
-            extracted_city, extracted_state = self.extract_location_from_name(company_name)
-            if extracted_city:
-                city = extracted_city
-                query_parts.append(city)
-        
-        # Add state from multiple sources
-        domain = school_data.get('Company Domain Name', '').strip()
-        state = self.extract_state_from_domain(domain)
-        
-        # If no state from domain, try extracting from name
-        if not state:
-            _, extracted_state = self.extract_location_from_name(company_name)
-            state = extracted_state
-        
-        # If still no state, try inferring from city
-        if not state and city:
-            state = self.infer_state_from_city(city)
-        
-        if state:
-            query_parts.append(state)
-        
-        # Add "school" to help with disambiguation
-        query_parts.append("school")
-        
-        return ", ".join(query_parts)
+        # Name, city, state and "school" to help with disambiguation
+        return format_query(self.build_query_parts(school_data))
     
-    def geocode_address(self, query: str) -> Optional[Dict]:
-        """Geocode an address using Nominatim with fallback queries"""
-        url = "https://nominatim.openstreetmap.org/search"
+    def geocode_school(self, query_parts: Dict[str, str], failures: Optional[List[str]] = None) -> Optional[Dict]:
+        """Geocode a school through the shared backend with planned fallback queries.
         
-        # Try multiple query variations
-        query_variations = [
-            query,  # Original query
-            query.replace(", school", ""),  # Remove trailing "school"
-            query.replace(" school", "")    # Remove any "school" word
-        ]
+        The planner orders distinct query variants by how often each shape has
+        succeeded. Variants that failed recently are skipped via the negative
+        cache; the reason for each failed variant is appended to `failures`.
+        """
+        if failures is None:
+            failures = []
         
-        for query_variant in query_variations:
-            if not query_variant.strip():
+        for pattern, query_variant in self.planner.plan(query_parts):
+            skipped_reason = self.negative_cache.should_skip(query_variant)
+            if skipped_reason:
+                logging.debug(f"Skipping recently failed query ({skipped_reason}): {query_variant}")
+                failures.append(skipped_reason)
                 continue
-                
-            params = {
-                'q': query_variant,
-                'format': 'json',
-                'limit': 1,
-                'addressdetails': 1,
-                'dedupe': 1
-            }
             
-            for attempt in range(MAX_RETRIES):
-                try:
-                    time.sleep(RATE_LIMIT_DELAY)  # Rate limiting
-                    response = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT)
-                    response.raise_for_status()
-                    
-                    data = response.json()
-                    if data:
-                        result = data[0]
-                        return {
-                            'latitude': float(result['lat']),
-                            'longitude': float(result['lon']),
-                            'display_name': result['display_name'],
-                            'address': result.get('address', {}),
-                            'importance': result.get('importance', 0),
-                            'place_id': result.get('place_id'),
-                            'query_used': query_variant
-                        }
-                    else:
-                        logging.warning(f"No results for query: {query_variant}")
-                        break  # Try next variation
-                        
-                except requests.exceptions.RequestException as e:
-                    logging.warning(f"Attempt {attempt + 1} failed for query '{query_variant}': {e}")
-                    if attempt < MAX_RETRIES - 1:
-                        time.sleep(2 ** attempt)  # Exponential backoff
-                    else:
-                        logging.error(f"All attempts failed for query: {query_variant}")
-                        break  # Try next variation
-                except Exception as e:
-                    logging.error(f"Unexpected error geocoding '{query_variant}': {e}")
-                    break  # Try next variation
+            try:
+                result = self.backend.search(query_variant)  # Rate limited by the shared bucket
+            except requests.exceptions.RequestException as e:
+                # The session has already retried with backoff
+                failures.append(self.negative_cache.record_error(query_variant, e))
+                logging.error(f"All attempts failed for query '{query_variant}': {e}")
+                continue  # Try next variation
+            except Exception as e:
+                failures.append(ERROR)
+                logging.error(f"Unexpected error geocoding '{query_variant}': {e}")
+                continue  # Try next variation
+            
+            self.planner.record(pattern, bool(result))
+            if result:
+                return {
+                    'latitude': result['lat'],
+                    'longitude': result['lng'],
+                    'display_name': result['display_name'],
+                    'address': result['address'],
+                    'importance': result['importance'],
+                    'place_id': result['place_id'],
+                    'query_used': query_variant
+                }
+            self.negative_cache.record(query_variant, NO_RESULTS)
+            failures.append(NO_RESULTS)
+            logging.warning(f"No results for query: {query_variant}")
         
         return None
     
-    def process_school(self, school_data: Dict, index: int) -> Dict:
-        """Process a single school record"""
+    def retry_time(self, reason: str) -> str:
+        """When a row that failed for `reason` is worth geocoding again"""
+        return (datetime.now() + timedelta(seconds=self.negative_cache.retry_after[reason])).isoformat()
+    
+    def locate_offline(self, school_data: Dict) -> Optional[Dict]:
+        """Approximate a school's location from its ZIP or city+state without the network"""
+        if not self.gazetteer:
+            return None
+        
+        result = self.gazetteer.lookup_zip(school_data.get('Agile Location Zip', ''))
+        if not result:
+            state = domain_state(school_data.get('Company Domain Name', ''))
+            result = self.gazetteer.lookup_place(row_city(school_data), state)
+        if not result:
+            return None
+        
+        return {
+            'latitude': result['lat'],
+            'longitude': result['lng'],
+            'display_name': result['display_name'],
+            'address': result['address'],
+            'importance': result['importance'],
+            'place_id': result['place_id'],
+            'query_used': result['query'],
+            'precision': result['precision']
+        }
+    
+    def process_school(self, school_data: Dict, index: int, query_parts: Optional[Dict[str, str]] = None) -> Dict:
+        """Process a single school record (query_parts from location_hints, if precomputed)"""
         record_id = school_data.get('Record ID', '')
         company_name = school_data.get('Company name', '')
         
@@ -334,128 +312,168 @@ class SchoolGeocoder:
             'existing_city': school_data.get('City', '') or school_data.get('Agile Location City', ''),
             'existing_zip': school_data.get('Agile Location Zip', '')
         }
+        if not record_id:
+            result['row_key'] = row_id(school_data)  # Marks the row processed (see result_key)
         
         try:
             # Build search query
-            query = self.build_search_query(school_data)
+            if query_parts is None:
+                query_parts = self.build_query_parts(school_data)
+            query = format_query(query_parts)
             if not query or len(query.strip()) < 5:
                 result['error'] = "Insufficient data to build search query"
+                result['failure_reason'] = INSUFFICIENT_DATA
+                self.negative_cache.record(query or f"record {record_id}", INSUFFICIENT_DATA)
                 return result
             
-            # Attempt geocoding
-            location = self.geocode_address(query)
+            # Attempt geocoding, falling back to the offline ZIP/place centroid
+            # Rows sharing a normalized query share one lookup
+            def lookup():
+                failures = []
+                return self.geocode_school(query_parts, failures), failures
+            location, failures = self.lookups.run(normalize_query(query), lookup)
+            if location:
+                location = dict(location)
+            if not location:
+                location = self.locate_offline(school_data)
             if location:
                 result['geocoded'] = True
                 result['location'] = location
-                logging.info(f"Successfully geocoded: {company_name} -> {location['display_name']}")
+                if location.get('precision'):
+                    logging.info(f"Approximately located ({location['precision']} centroid): "
+                                 f"{company_name} -> {location['display_name']}")
+                else:
+                    logging.info(f"Successfully geocoded: {company_name} -> {location['display_name']}")
             else:
                 result['error'] = "No geocoding results found"
+                # Transient reasons win so the row is recognizably worth retrying
+                result['failure_reason'] = next(
+                    (reason for reason in failures if reason in TRANSIENT_FAILURES),
+                    failures[-1] if failures else NO_RESULTS
+                )
                 
         except Exception as e:
             result['error'] = str(e)
+            result['failure_reason'] = ERROR
             logging.error(f"Error processing school {record_id}: {e}")
         
+        if result.get('failure_reason') in TRANSIENT_FAILURES:
+            result['retry_at'] = self.retry_time(result['failure_reason'])
         return result
     
-    def load_csv_data(self) -> List[Dict]:
-        """Load school data from CSV file"""
-        schools = []
-        try:
-            with open(CSV_FILE, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for i, row in enumerate(reader):
-                    if i >= self.progress.last_processed_index:
-                        schools.append(row)
-        except Exception as e:
-            logging.error(f"Error loading CSV data: {e}")
-            raise
-        
-        return schools
-    
-    def run(self):
-        """Main execution method"""
-        logging.info("Starting Apptegy schools geocoding process")
-        logging.info(f"Skipping first {SKIP_ROWS} rows, resuming from index {self.progress.last_processed_index}")
-        
-        # Load school data
-        schools = self.load_csv_data()
-        total_schools = len(schools)
-        
-        if total_schools == 0:
-            logging.info("No schools to process")
-            return
-        
-        logging.info(f"Loaded {total_schools} schools to process")
-        
-        # Process schools in batches
-        processed_count = 0
+    def geocode_rows(self, jobs: Iterable[Tuple[int, Dict, Dict]]) -> int:
+        """Geocode (row index, school, query parts) jobs, recording each result
+        in the progress log; returns the number of rows processed"""
+        # Process schools concurrently; results arrive in job order
+        counters = {'processed': 0}
         
-        for i, school in enumerate(schools):
-            if self.interrupted:
-                break
-            
-            current_index = self.progress.last_processed_index + i
+        def on_result(job, result):
+            current_index, school, _ = job
+            if result is None:
+                result = {
+                    'record_id': school.get('Record ID', ''),
+                    'company_name': school.get('Company name', ''),
+                    'index': current_index,
+                    'processed_at': datetime.now().isoformat(),
+                    'geocoded': False,
+                    'error': "Worker failed",
+                    'failure_reason': ERROR,
+                    'retry_at': self.retry_time(ERROR)
+                }
+                if not result['record_id']:
+                    result['row_key'] = row_id(school)
             
-            # Process school
-            result = self.process_school(school, current_index)
+            self.progress.record(result, current_index)
             
-            if result['geocoded']:
-                self.progress.results.append(result)
-            else:
-                self.progress.errors.append(result)
-            
-            processed_count += 1
-            self.progress.last_processed_index = current_index + 1
+            counters['processed'] += 1
+            processed_count = counters['processed']
             
             # Status update
             if processed_count % STATUS_UPDATE_INTERVAL == 0:
-                success_rate = len(self.progress.results) / (len(self.progress.results) + len(self.progress.errors)) * 100
-                logging.info(f"Processed {processed_count}/{total_schools} schools. "
-                           f"Success rate: {success_rate:.1f}% "
-                           f"({len(self.progress.results)} successful, {len(self.progress.errors)} failed)")
+                logging.info(f"Processed {processed_count} schools (through row {current_index}). "
+                           f"Success rate: {self.progress.success_rate:.1f}% "
+                           f"({self.progress.summary()}). "
+                           f"Request rate: {self.rate_limiter.current_rate:.2f}/s")
             
             # Save progress every batch
             if processed_count % BATCH_SIZE == 0:
                 self.progress.save_progress()
                 logging.info(f"Progress saved after processing {processed_count} schools")
         
+        engine = GeocodingEngine(
+            worker=lambda job: self.process_school(job[1], job[0], job[2]),
+            on_result=on_result,
+            concurrency=CONCURRENCY,
+            ordered=True,
+            should_stop=lambda: self.interrupted
+        )
+        engine.run(jobs)
+        return counters['processed']
+    
+    def run(self):
+        """Main execution method"""
+        logging.info("Starting Apptegy schools geocoding process")
+        logging.info(f"Skipping {len(self.progress.processed)} already processed record IDs")
+        
+        # Rows stream from the CSV, diffed against the processed IDs on the way;
+        # only the engine's in-flight window is held in memory
+        export = {}
+        processed_count = self.geocode_rows(iter_pending(CSV_FILE, self.progress.processed,
+                                                         waiting=self.progress.waiting(), stats=export))
+        logging.info(f"Export has {export['rows']} rows, {export['already_processed']} already processed, "
+                     f"{export['waiting']} waiting to retry")
+        
+        if processed_count == 0:
+            logging.info("No schools to process")
+            return
+        
         # Final save
-        self.progress.save_progress()
+        self.progress.compact()
         self.save_final_results()
         
         # Final statistics
         total_processed = len(self.progress.results) + len(self.progress.errors)
-        success_rate = len(self.progress.results) / total_processed * 100 if total_processed > 0 else 0
         
         logging.info(f"Geocoding completed!")
         logging.info(f"Total processed: {total_processed}")
-        logging.info(f"Successful: {len(self.progress.results)}")
+        logging.info(f"Successful: {len(self.progress.results) - self.progress.approximate}")
+        logging.info(f"Approximate (ZIP/place centroid): {self.progress.approximate}")
         logging.info(f"Failed: {len(self.progress.errors)}")
-        logging.info(f"Success rate: {success_rate:.1f}%")
+        logging.info(f"Success rate: {self.progress.success_rate:.1f}%")
+        logging.info(f"Rows served by another row's lookup: {self.lookups.shared}")
+        logging.info(f"Negative cache entries by reason: {self.negative_cache.stats()}")
+        logging.info(f"Rate limiter: {self.rate_limiter.metrics()}")
+        for pattern, stats in self.planner.report().items():
+            logging.info(f"Query pattern {pattern}: {stats['successes']}/{stats['attempts']} resolved")
     
     def save_final_results(self):
         """Save final results to output file"""
-        try:
-            output_data = {
-                'metadata': {
-                    'processed_at': datetime.now().isoformat(),
-                    'total_results': len(self.progress.results),
-                    'total_errors': len(self.progress.errors),
-                    'success_rate': len(self.progress.results) / (len(self.progress.results) + len(self.progress.errors)) * 100,
-                    'skipped_rows': SKIP_ROWS,
-                    'last_processed_index': self.progress.last_processed_index
-                },
-                'successful_geocodes': self.progress.results,
-                'failed_geocodes': self.progress.errors
-            }
-            
-            with open(OUTPUT_FILE, 'w') as f:
-                json.dump(output_data, f, indent=2)
-            
-            logging.info(f"Final results saved to {OUTPUT_FILE}")
-            
-        except Exception as e:
-            logging.error(f"Error saving final results: {e}")
+        save_batch_results(self.progress)
+
+def save_batch_results(progress: GeocodingProgress, output_file: str = OUTPUT_FILE):
+    """Write the apptegy-geocoded-batch.json output for `progress`"""
+    try:
+        output_data = {
+            'metadata': {
+                'processed_at': datetime.now().isoformat(),
+                'total_results': len(progress.results),
+                'approximate_results': progress.approximate,  # Included in total_results, not in success_rate
+                'total_errors': len(progress.errors),
+                'success_rate': progress.success_rate,
+                'skipped_rows': SKIP_ROWS,
+                'processed_record_ids': len(progress.processed),
+                'last_processed_index': progress.last_processed_index
+            },
+            'successful_geocodes': progress.results,
+            'failed_geocodes': progress.errors
+        }
+        
+        write_json(output_file, output_data, indent=2)
+        
+        logging.info(f"Final results saved to {output_file}")
+        
+    except Exception as e:
+        logging.error(f"Error saving final results: {e}")
 
 def setup_logging():
     """Set up logging configuration"""
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Sharded Apptegy geocoding across several backends.
+
+The coordinator diffs the HubSpot export against the processed record IDs
+once, splitting the pending rows into shard files by a hash of the Record ID
+(or of the state hint). Each --backend gets its own worker process, with its
+own session, rate budget and SchoolGeocoder; workers take one shard at a
+time and checkpoint it in its own progress log. A worker that dies has its
+shard handed to a replacement, which resumes from the shard's checkpoint.
+Finished shards are merged into geocoding_progress.json in export-row order
+and written out as apptegy-geocoded-batch.json, exactly as a single-process
+run would.
+
+    python3 geocode_apptegy_sharded.py \\
+        --backend nominatim \\
+        --backend nominatim=http://geocoder-2.internal:8080 \\
+        --backend fixture=geocoded_data.json
+
+An interrupted run keeps its shards in geocoding_shards/ and the next run
+finishes them before diffing the export again.
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import shutil
+import signal
+import sys
+import time
+import zlib
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from geocode_apptegy_schools import (CSV_FILE, LOG_FILE, PROGRESS_FILE, REQUEST_RATE, GeocodingProgress,
+                                     SchoolGeocoder, is_retryable, save_batch_results, setup_logging)
+from geocoding import load_geocoding_progress
+from geocoding.hubspot import iter_pending, row_id
+
+SHARD_DIR = "geocoding_shards"
+MANIFEST_FILE = "manifest.json"
+SHARDS_PER_BACKEND = 4  # Small shards keep workers balanced and crash reassignment cheap
+MAX_SHARD_ATTEMPTS = 3  # A shard that kills this many workers is left for the next run
+POLL_INTERVAL = 1.0
+
+
+def backend_environment(spec: str) -> Dict[str, str]:
+    """Environment for a --backend spec: 'nominatim', 'nominatim=<url>', 'fixture=<file>'
+    or 'environment' (whatever GEOCODER_BACKEND and friends are set to)"""
+    name, _, target = spec.partition('=')
+    name = name.strip().lower()
+    if name == 'environment':
+        return {}
+    if name == 'nominatim':
+        return {'GEOCODER_BACKEND': 'nominatim', 'NOMINATIM_URL': target} if target else {'GEOCODER_BACKEND': 'nominatim'}
+    if name == 'fixture':
+        return {'GEOCODER_BACKEND': 'fixture', 'GEOCODER_FIXTURE': target or 'geocoded_data.json'}
+    raise ValueError(f"Unknown backend spec: {spec}")
+
+
+def shard_for(job: Tuple[int, Dict, Dict], shard_count: int, shard_by: str) -> int:
+    """Stable shard number for a job (crc32, so every process agrees)"""
+    _, school, parts = job
+    key = parts.get('state', '').lower() if shard_by == 'state' else row_id(school)
+    return zlib.crc32(key.encode('utf-8')) % shard_count
+
+
+def shard_path(shard_dir: str, shard: int) -> str:
+    return os.path.join(shard_dir, f"shard-{shard:03d}.jsonl")
+
+
+def shard_progress_path(shard_dir: str, shard: int) -> str:
+    return os.path.join(shard_dir, f"shard-{shard:03d}_progress.json")
+
+
+def shard_done_path(shard_dir: str, shard: int) -> str:
+    return os.path.join(shard_dir, f"shard-{shard:03d}.done")
+
+
+def write_shards(shard_dir: str, processed, shard_count: int, shard_by: str, waiting=None) -> Dict:
+    """Split the unprocessed export rows (less those `waiting` to retry)
+    into shard files in one pass"""
+    os.makedirs(shard_dir, exist_ok=True)
+    export = {}
+    sizes = [0] * shard_count
+    files = [open(shard_path(shard_dir, shard), 'w') for shard in range(shard_count)]
+    try:
+        for job in iter_pending(CSV_FILE, processed, stats=export, waiting=waiting):
+            shard = shard_for(job, shard_count, shard_by)
+            index, school, parts = job
+            files[shard].write(json.dumps({'index': index, 'school': school, 'parts': parts}) + '\n')
+            sizes[shard] += 1
+    finally:
+        for f in files:
+            f.close()
+
+    manifest = {
+        'created_at': datetime.now().isoformat(),
+        'source': CSV_FILE,
+        'shard_by': shard_by,
+        'shards': shard_count,
+        'sizes': sizes,
+        'export_rows': export.get('rows', 0),
+        'already_processed': export.get('already_processed', 0),
+    }
+    # Written last: a manifest means every shard file is complete
+    tmp_path = os.path.join(shard_dir, f"{MANIFEST_FILE}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(shard_dir, MANIFEST_FILE))
+    return manifest
+
+
+def load_manifest(shard_dir: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(shard_dir, MANIFEST_FILE), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def read_shard(path: str) -> Iterator[Tuple[int, Dict, Dict]]:
+    with open(path, 'r') as f:
+        for line in f:
+            job = json.loads(line)
+            yield job['index'], job['school'], job['parts']
+
+
+def shard_worker(slot: int, environment: Dict[str, str], rate: float, shard_dir: str, tasks, events):
+    """Worker process: geocode the shards the coordinator hands to this slot"""
+    os.environ.update(environment)
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f'%(asctime)s - worker-{slot} - %(levelname)s - %(message)s',
+        handlers=[logging.FileHandler(LOG_FILE), logging.StreamHandler(sys.stdout)]
+    )
+    # Ctrl+C reaches the whole process group; the coordinator decides when to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    geocoder = None
+    while True:
+        shard = tasks.get()
+        if shard is None:
+            break
+        if geocoder is None:
+            geocoder = SchoolGeocoder(progress_file=shard_progress_path(shard_dir, shard), skip_rows=0,
+                                      request_rate=rate, max_request_rate=rate)
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+        else:
+            # Same session, rate limiter and caches; only the checkpoint changes
+            geocoder.progress = GeocodingProgress(shard_progress_path(shard_dir, shard), skip_rows=0)
+        processed, waiting = geocoder.progress.processed, geocoder.progress.waiting()
+        jobs = (job for job in read_shard(shard_path(shard_dir, shard))
+                if row_id(job[1]) not in processed and row_id(job[1]) not in waiting)
+        count = geocoder.geocode_rows(jobs)
+        geocoder.progress.compact()
+        if geocoder.interrupted:
+            events.put(('stopped', slot, shard, count))
+            break
+        open(shard_done_path(shard_dir, shard), 'w').close()
+        events.put(('done', slot, shard, count))
+
+
+class ShardCoordinator:
+    """Runs one worker process per backend and hands out shards"""
+
+    def __init__(self, backends: List[str], rate: float, shard_dir: str = SHARD_DIR):
+        self.backends = backends
+        self.environments = [backend_environment(spec) for spec in backends]
+        self.rate = rate
+        self.shard_dir = shard_dir
+        self.context = multiprocessing.get_context('spawn')
+        self.events = self.context.Queue()
+        self.workers = {}
+        self.task_queues = {}
+        self.assignments = {}
+        self.attempts = {}
+        self.stopping = False
+
+        signal.signal(signal.SIGINT, self._signal_handler)
+        signal.signal(signal.SIGTERM, self._signal_handler)
+
+    def _signal_handler(self, signum, frame):
+        logging.info(f"Received signal {signum}, stopping workers after their in-flight requests...")
+        self.stopping = True
+        for slot, process in self.workers.items():
+            if process.is_alive():
+                process.terminate()  # SchoolGeocoder finishes in-flight rows and checkpoints
+
+    def _spawn(self, slot: int):
+        tasks = self.context.Queue()
+        process = self.context.Process(
+            target=shard_worker,
+            args=(slot, self.environments[slot], self.rate, self.shard_dir, tasks, self.events),
+            name=f"geocode-worker-{slot}",
+            daemon=True
+        )
+        process.start()
+        self.workers[slot] = process
+        self.task_queues[slot] = tasks
+        logging.info(f"Started worker {slot} (pid {process.pid}) on backend {self.backends[slot]}")
+
+    def run(self, shards: List[int]) -> Dict[str, List[int]]:
+        """Process `shards`; returns the shards completed, failed and left unfinished"""
+        backlog = deque(shards)
+        remaining = set(shards)
+        outcome = {'done': [], 'failed': [], 'unfinished': []}
+
+        for slot in range(len(self.backends)):
+            self._spawn(slot)
+
+        while remaining and self.workers:
+            # Hand a shard to every idle worker
+            for slot in list(self.workers):
+                if slot not in self.assignments and backlog and not self.stopping:
+                    shard = backlog.popleft()
+                    self.assignments[slot] = shard
+                    self.attempts[shard] = self.attempts.get(shard, 0) + 1
+                    self.task_queues[slot].put(shard)
+
+            try:
+                kind, slot, shard, count = self.events.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                kind = None
+            if kind == 'done' and shard in remaining:
+                logging.info(f"Worker {slot} finished shard {shard} ({count} rows geocoded)")
+                self.assignments.pop(slot, None)
+                remaining.discard(shard)
+                outcome['done'].append(shard)
+            elif kind == 'stopped':
+                self.assignments.pop(slot, None)
+
+            self._reap(backlog, remaining, outcome)
+
+            if self.stopping and not self.assignments:
+                break
+
+        for slot, tasks in self.task_queues.items():
+            tasks.put(None)
+        for process in self.workers.values():
+            process.join()
+        outcome['unfinished'] = sorted(remaining - set(outcome['failed']))
+        return outcome
+
+    def _reap(self, backlog: deque, remaining: set, outcome: Dict[str, List[int]]):
+        """Reassign the shards of workers that exited, and replace the workers"""
+        for slot, process in list(self.workers.items()):
+            if process.is_alive():
+                continue
+            del self.workers[slot]
+            shard = self.assignments.pop(slot, None)
+            if shard is not None and shard in remaining and not self.stopping:
+                if self.attempts[shard] >= MAX_SHARD_ATTEMPTS:
+                    logging.error(f"Shard {shard} failed {self.attempts[shard]} times; leaving it for the next run")
+                    remaining.discard(shard)
+                    outcome['failed'].append(shard)
+                else:
+                    logging.warning(f"Worker {slot} exited with code {process.exitcode} on shard {shard}; "
+                                    f"reassigning it")
+                    backlog.appendleft(shard)
+            if remaining and not self.stopping:
+                self._spawn(slot)
+
+
+def merge_shards(shard_dir: str, shards: List[int], progress: GeocodingProgress) -> int:
+    """Fold finished shards into the main progress in export-row order"""
+    rows = []
+    for shard in shards:
+        state = load_geocoding_progress(shard_progress_path(shard_dir, shard))
+        rows.extend(state['results'])
+        rows.extend(state['errors'])
+    rows.sort(key=lambda result: (result['index'], str(result.get('record_id', ''))))
+
+    # Shards of an interrupted run are merged again when it is resumed; a
+    # shard's retry of a transient failure replaces it (see record())
+    seen = {(result.get('record_id'), result.get('index')) for result in progress.results + progress.errors
+            if not is_retryable(result)}
+    merged = 0
+    for result in rows:
+        if (result.get('record_id'), result['index']) in seen:
+            continue
+        progress.record(result, result['index'])
+        merged += 1
+    progress.compact()
+    return merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Geocode the Apptegy export across several backends")
+    parser.add_argument('--backend', action='append', dest='backends',
+                        help="nominatim, nominatim=<url> or fixture=<file>; repeat for more workers "
+                             "(default: one worker on the backend selected by the environment)")
+    parser.add_argument('--rate', type=float, default=REQUEST_RATE, help="Requests/second per backend")
+    parser.add_argument('--shards', type=int, default=None,
+                        help=f"Number of shards (default: {SHARDS_PER_BACKEND} per backend)")
+    parser.add_argument('--shard-by', choices=['hash', 'state'], default='hash',
+                        help="Split rows by Record ID hash (balanced) or by state hint")
+    args = parser.parse_args()
+
+    setup_logging()
+    if not os.path.exists(CSV_FILE):
+        logging.error(f"CSV file not found: {CSV_FILE}")
+        sys.exit(1)
+
+    backends = args.backends or ['environment']
+    progress = GeocodingProgress(PROGRESS_FILE)
+
+    manifest = load_manifest(SHARD_DIR)
+    if manifest:
+        logging.info(f"Resuming the {manifest['shards']} shards in {SHARD_DIR}/ from {manifest['created_at']}")
+    else:
+        shard_count = args.shards or SHARDS_PER_BACKEND * len(backends)
+        manifest = write_shards(SHARD_DIR, progress.processed, shard_count, args.shard_by, progress.waiting())
+        logging.info(f"Export has {manifest['export_rows']} rows, {manifest['already_processed']} already processed; "
+                     f"{sum(manifest['sizes'])} rows split into {shard_count} shards by {args.shard_by}")
+
+    pending = [shard for shard in range(manifest['shards'])
+               if manifest['sizes'][shard] and not os.path.exists(shard_done_path(SHARD_DIR, shard))]
+    finished = [shard for shard in range(manifest['shards'])
+                if manifest['sizes'][shard] and os.path.exists(shard_done_path(SHARD_DIR, shard))]
+
+    start = time.time()
+    if pending:
+        coordinator = ShardCoordinator(backends, args.rate)
+        outcome = coordinator.run(pending)
+        finished.extend(outcome['done'])
+        if outcome['failed']:
+            logging.error(f"Shards {outcome['failed']} kept crashing workers")
+        if outcome['unfinished']:
+            logging.info(f"Shards {outcome['unfinished']} are unfinished; rerun to resume them")
+    else:
+        outcome = {'failed': [], 'unfinished': []}
+
+    merged = merge_shards(SHARD_DIR, sorted(finished), progress)
+    logging.info(f"Merged {merged} rows from {len(finished)} shards in {time.time() - start:.1f}s "
+                 f"({progress.summary()})")
+    if finished:
+        save_batch_results(progress)
+
+    if not outcome['failed'] and not outcome['unfinished']:
+        shutil.rmtree(SHARD_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Shared geocoding core used by every geocoding script.
+
+    from geocoding import get_backend
+
+    backend = get_backend(user_agent='EdlioCustomerMap/2.0 (intelligent-geocoding)')
+    location = backend.search("1501 Old Shell Rd, Mobile, AL 36604")
+"""
+
+from .address import canonical_address
+from .backends import (
+    NOMINATIM_URL,
+    ChainedBackend,
+    FixtureBackend,
+    GeocoderBackend,
+    NominatimBackend,
+    normalize_result,
+)
+from .cache import GeocodeCache
+from .checkpoint import CheckpointLog, load_geocoding_progress
+from .config import get_backend
+from .dedup import SingleFlight, dedup_report, group_by_key, normalize_query
+from .engine import GeocodingEngine
+from .gazetteer import GazetteerBackend, load_default_gazetteer, parse_query
+from .negative import NegativeCache, classify_failure
+from .planner import QueryPlanner, format_query
+from .ratelimit import AdaptiveRateLimiter, RateLimitedBackend, TokenBucket
+from .session import build_retry_policy, build_session, close_sessions, get_session
+
+__all__ = [
+    'canonical_address',
+    'NOMINATIM_URL',
+    'ChainedBackend',
+    'FixtureBackend',
+    'GeocoderBackend',
+    'NominatimBackend',
+    'GeocodeCache',
+    'CheckpointLog',
+    'load_geocoding_progress',
+    'get_backend',
+    'normalize_result',
+    'SingleFlight',
+    'dedup_report',
+    'group_by_key',
+    'normalize_query',
+    'GeocodingEngine',
+    'GazetteerBackend',
+    'load_default_gazetteer',
+    'parse_query',
+    'NegativeCache',
+    'classify_failure',
+    'QueryPlanner',
+    'format_query',
+    'AdaptiveRateLimiter',
+    'RateLimitedBackend',
+    'TokenBucket',
+    'build_retry_policy',
+    'build_session',
+    'close_sessions',
+    'get_session',
+]
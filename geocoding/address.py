@@ -0,0 +1,76 @@
+"""
+Canonical address keys.
+
+Every script builds its address strings a little differently (", USA" or
+not, ZIP+4 or ZIP, "Street" or "St", "nan" for empty Excel cells). The
+canonical form collapses those variants so the same building always maps
+to the same cache key:
+
+    "1501 Old Shell Road, Mobile, AL 36604-2291"  ->  "1501 OLD SHELL RD, MOBILE, AL 36604, USA"
+"""
+
+import re
+from functools import lru_cache
+
+from .states import STATE_NAMES
+
+# USPS Publication 28 street suffix and secondary unit abbreviations
+STREET_SUFFIXES = {
+    'ALLEY': 'ALY', 'AVENUE': 'AVE', 'AV': 'AVE', 'BOULEVARD': 'BLVD', 'BEND': 'BND',
+    'BYPASS': 'BYP', 'CAUSEWAY': 'CSWY', 'CENTER': 'CTR', 'CIRCLE': 'CIR', 'COURT': 'CT',
+    'COVE': 'CV', 'CREEK': 'CRK', 'CROSSING': 'XING', 'DRIVE': 'DR', 'EXPRESSWAY': 'EXPY',
+    'EXTENSION': 'EXT', 'FREEWAY': 'FWY', 'GROVE': 'GRV', 'HEIGHTS': 'HTS', 'HIGHWAY': 'HWY',
+    'HILL': 'HL', 'HOLLOW': 'HOLW', 'JUNCTION': 'JCT', 'LANE': 'LN', 'LOOP': 'LOOP',
+    'MANOR': 'MNR', 'MEADOW': 'MDW', 'MEADOWS': 'MDWS', 'MOUNT': 'MT', 'MOUNTAIN': 'MTN',
+    'PARKWAY': 'PKWY', 'PIKE': 'PIKE', 'PLACE': 'PL', 'PLAZA': 'PLZ', 'POINT': 'PT',
+    'RIDGE': 'RDG', 'ROAD': 'RD', 'ROUTE': 'RTE', 'SQUARE': 'SQ', 'STREET': 'ST',
+    'TERRACE': 'TER', 'TRACE': 'TRCE', 'TRAIL': 'TRL', 'TURNPIKE': 'TPKE', 'VALLEY': 'VLY',
+    'VIEW': 'VW', 'VILLAGE': 'VLG', 'WAY': 'WAY',
+    'APARTMENT': 'APT', 'BUILDING': 'BLDG', 'FLOOR': 'FL', 'SUITE': 'STE', 'ROOM': 'RM',
+    'NORTH': 'N', 'SOUTH': 'S', 'EAST': 'E', 'WEST': 'W',
+    'NORTHEAST': 'NE', 'NORTHWEST': 'NW', 'SOUTHEAST': 'SE', 'SOUTHWEST': 'SW',
+}
+
+COUNTRY_NAMES = {'USA', 'US', 'U S A', 'U S', 'UNITED STATES', 'UNITED STATES OF AMERICA'}
+EMPTY_VALUES = {'', 'NAN', 'NONE', 'NULL', 'N/A'}
+
+PUNCTUATION_RE = re.compile(r'[.#]')
+WHITESPACE_RE = re.compile(r'\s+')
+ZIP_RE = re.compile(r'\b(\d{5})(?:-?\d{4})?$')
+STATE_ZIP_RE = re.compile(r'^([A-Z ]+?)\s+(\d{5})$')
+
+COUNTRY_SUFFIX = 'USA'
+
+
+def _clean_part(part: str) -> str:
+    part = PUNCTUATION_RE.sub('', part.upper())
+    words = [word for word in WHITESPACE_RE.split(part) if word and word not in EMPTY_VALUES]
+    if words and words[0][0].isdigit():
+        # Street line: abbreviate suffixes and directionals (city names keep "North")
+        words = [STREET_SUFFIXES.get(word, word) for word in words]
+    return ' '.join(words)
+
+
+@lru_cache(maxsize=65536)
+def canonical_address(address: str) -> str:
+    """Return the canonical cache key for a free-text US address"""
+    parts = [_clean_part(part) for part in str(address).split(',')]
+    parts = [part for part in parts if part and part not in COUNTRY_NAMES]
+
+    # Truncate ZIP+4 and fold "AL, 36604" into "AL 36604"
+    if parts:
+        parts[-1] = ZIP_RE.sub(r'\1', parts[-1])
+        if len(parts) >= 2 and ZIP_RE.fullmatch(parts[-1]) and len(parts[-1]) == 5:
+            zip_code = parts.pop()
+            parts[-1] = f"{parts[-1]} {zip_code}"
+
+    # Spell states as USPS abbreviations
+    if parts:
+        match = STATE_ZIP_RE.match(parts[-1])
+        state, zip_code = (match.group(1), match.group(2)) if match else (parts[-1], '')
+        abbr = STATE_NAMES.get(state.lower())
+        if abbr:
+            parts[-1] = f"{abbr} {zip_code}".strip()
+
+    parts.append(COUNTRY_SUFFIX)
+    return ', '.join(parts)
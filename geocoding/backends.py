@@ -0,0 +1,121 @@
+"""
+Geocoding backends.
+
+A backend turns a free-text query into a normalized result dict:
+
+    {'lat', 'lng', 'display_name', 'address', 'importance', 'place_id', 'query'}
+
+or None when the provider has no match. Transport failures are raised as
+requests exceptions so callers can decide how to record them.
+"""
+
+import json
+from typing import Dict, List, Optional
+
+import requests
+
+from .session import DEFAULT_TIMEOUT, DEFAULT_USER_AGENT, get_session
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org"
+
+
+def normalize_result(result: Dict, query: str) -> Dict:
+    """Convert a Nominatim-style search hit into the shared result shape"""
+    return {
+        'lat': float(result['lat']),
+        'lng': float(result['lon']),
+        'display_name': result.get('display_name', ''),
+        'address': result.get('address', {}),
+        'importance': result.get('importance', 0),
+        'place_id': result.get('place_id'),
+        'query': query,
+    }
+
+
+class GeocoderBackend:
+    """Base class for geocoding providers"""
+
+    name = 'base'
+
+    def search(self, query: str, **params) -> Optional[Dict]:
+        """Return the best match for a query, or None if there is none"""
+        raise NotImplementedError
+
+
+class NominatimBackend(GeocoderBackend):
+    """OpenStreetMap Nominatim (or any server speaking its /search API)"""
+
+    name = 'nominatim'
+
+    def __init__(self, base_url: str = NOMINATIM_URL,
+                 user_agent: str = DEFAULT_USER_AGENT,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 session: Optional[requests.Session] = None,
+                 **default_params):
+        self.search_url = base_url.rstrip('/') + '/search'
+        self.timeout = timeout
+        self.session = session or get_session(user_agent)
+        self.default_params = {
+            'format': 'json',
+            'limit': 1,
+            'addressdetails': 1,
+        }
+        self.default_params.update(default_params)
+
+    def search(self, query: str, **params) -> Optional[Dict]:
+        request_params = dict(self.default_params)
+        request_params.update(params)
+        request_params['q'] = query
+
+        response = self.session.get(self.search_url, params=request_params, timeout=self.timeout)
+        response.raise_for_status()
+
+        data = response.json()
+        if not data:
+            return None
+        return normalize_result(data[0], query)
+
+
+class FixtureBackend(GeocoderBackend):
+    """Local stand-in that answers from an in-memory {query: {lat, lng}} map"""
+
+    name = 'fixture'
+
+    def __init__(self, results: Optional[Dict[str, Dict]] = None):
+        self.results = results or {}
+
+    @classmethod
+    def from_file(cls, path: str) -> 'FixtureBackend':
+        """Load a fixture in the geocoded_data.json format"""
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    def search(self, query: str, **params) -> Optional[Dict]:
+        hit = self.results.get(query)
+        if not hit:
+            return None
+        return {
+            'lat': float(hit['lat']),
+            'lng': float(hit['lng']),
+            'display_name': hit.get('display_name', query),
+            'address': hit.get('address', {}),
+            'importance': hit.get('importance', 0),
+            'place_id': hit.get('place_id'),
+            'query': query,
+        }
+
+
+class ChainedBackend(GeocoderBackend):
+    """Try each backend in turn and return the first match"""
+
+    name = 'chain'
+
+    def __init__(self, backends: List[GeocoderBackend]):
+        self.backends = backends
+
+    def search(self, query: str, **params) -> Optional[Dict]:
+        for backend in self.backends:
+            result = backend.search(query, **params)
+            if result:
+                return result
+        return None
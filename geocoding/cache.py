@@ -0,0 +1,182 @@
+"""
+SQLite-backed geocode cache.
+
+Replaces rewriting the whole geocoded_data.json after every batch with
+indexed point lookups and per-entry upserts. The database runs in WAL mode
+with a busy timeout, so the daemon and ad-hoc scripts can share it.
+
+GeocodeCache behaves like the {address: {'lat', 'lng'}} dict the scripts
+already use, and imports/exports the geocoded_data.json format. Entries are
+keyed by canonical_address(), so the same building hits the cache no matter
+which script built the string; the raw strings are kept in an alias table
+and are what export_json writes back out.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .address import canonical_address
+from .datasets import write_json
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DB = 'geocode_cache.db'
+LEGACY_CACHE_FILE = 'geocoded_data.json'
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS geocodes (
+    address TEXT PRIMARY KEY,
+    lat REAL NOT NULL,
+    lng REAL NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS aliases (
+    alias TEXT PRIMARY KEY,
+    address TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS aliases_address ON aliases (address);
+"""
+
+UPSERT_GEOCODE = (
+    'INSERT INTO geocodes (address, lat, lng, updated_at) VALUES (?, ?, ?, ?) '
+    'ON CONFLICT(address) DO UPDATE SET lat = excluded.lat, lng = excluded.lng, '
+    'updated_at = excluded.updated_at'
+)
+UPSERT_ALIAS = 'INSERT OR REPLACE INTO aliases (alias, address) VALUES (?, ?)'
+
+
+class GeocodeCache:
+    """Transactional {address: {'lat', 'lng'}} store"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_DB, legacy_file: Optional[str] = LEGACY_CACHE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+        self._migrate()
+
+        # First run: seed from the legacy JSON cache
+        if legacy_file and len(self) == 0 and os.path.exists(legacy_file):
+            imported = self.import_json(legacy_file)
+            logger.info(f"Imported {imported} cached addresses from {legacy_file}")
+
+    def _migrate(self):
+        """Re-key caches written before canonical addresses were introduced"""
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        rows = self.conn.execute('SELECT address, lat, lng FROM geocodes ORDER BY rowid').fetchall()
+        with self.conn:
+            self.conn.execute('DELETE FROM geocodes')
+        self.update({address: {'lat': lat, 'lng': lng} for address, lat, lng in rows})
+        with self.conn:
+            self.conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def get(self, address: str, default=None) -> Optional[Dict]:
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT lat, lng FROM geocodes WHERE address = ?', (canonical_address(address),)
+            ).fetchone()
+        if row is None:
+            return default
+        return {'lat': row[0], 'lng': row[1]}
+
+    def _write(self, entries: Dict[str, Dict]):
+        now = datetime.now().isoformat()
+        geocodes = []
+        aliases = []
+        for address, location in entries.items():
+            canonical = canonical_address(address)
+            geocodes.append((canonical, location['lat'], location['lng'], now))
+            if address != canonical:
+                aliases.append((address, canonical))
+        with self.lock, self.conn:
+            self.conn.executemany(UPSERT_GEOCODE, geocodes)
+            self.conn.executemany(UPSERT_ALIAS, aliases)
+
+    def set(self, address: str, location: Dict):
+        """Insert or update one entry in its own transaction"""
+        self._write({address: location})
+
+    def update(self, entries: Dict[str, Dict]):
+        """Upsert many entries in a single transaction"""
+        self._write(entries)
+
+    def delete(self, address: str):
+        canonical = canonical_address(address)
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM geocodes WHERE address = ?', (canonical,))
+            self.conn.execute('DELETE FROM aliases WHERE address = ?', (canonical,))
+
+    def canonical_key(self, address: str) -> str:
+        """Return the cache key a raw address string maps to"""
+        return canonical_address(address)
+
+    def __getitem__(self, address: str) -> Dict:
+        location = self.get(address)
+        if location is None:
+            raise KeyError(address)
+        return location
+
+    def __setitem__(self, address: str, location: Dict):
+        self.set(address, location)
+
+    def __contains__(self, address) -> bool:
+        return self.get(address) is not None
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM geocodes').fetchone()[0]
+
+    def items(self) -> Iterator[Tuple[str, Dict]]:
+        with self.lock:
+            rows = self.conn.execute('SELECT address, lat, lng FROM geocodes ORDER BY rowid').fetchall()
+        for address, lat, lng in rows:
+            yield address, {'lat': lat, 'lng': lng}
+
+    def stale_entries(self, older_than: datetime, limit: int = 100) -> List[Tuple[str, Dict]]:
+        """Oldest entries last written before `older_than`, keyed by a raw
+        address string that was looked up (the canonical key if none)"""
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT COALESCE(MIN(aliases.alias), geocodes.address), geocodes.lat, geocodes.lng '
+                'FROM geocodes LEFT JOIN aliases ON aliases.address = geocodes.address '
+                'WHERE geocodes.updated_at < ? GROUP BY geocodes.address '
+                'ORDER BY geocodes.updated_at LIMIT ?',
+                (older_than.isoformat(), limit)
+            ).fetchall()
+        return [(address, {'lat': lat, 'lng': lng}) for address, lat, lng in rows]
+
+    def import_json(self, path: str = LEGACY_CACHE_FILE) -> int:
+        """Upsert every entry of a geocoded_data.json-style file"""
+        with open(path, 'r') as f:
+            entries = json.load(f)
+        self.update(entries)
+        return len(entries)
+
+    def export_json(self, path: str = LEGACY_CACHE_FILE):
+        """Write the cache in the geocoded_data.json format, keyed by the raw
+        address strings the scripts looked up (canonical keys for the rest)"""
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT aliases.alias, geocodes.lat, geocodes.lng FROM aliases '
+                'JOIN geocodes ON geocodes.address = aliases.address '
+                'UNION ALL '
+                'SELECT address, lat, lng FROM geocodes '
+                'WHERE address NOT IN (SELECT address FROM aliases)'
+            ).fetchall()
+        write_json(path, {address: {'lat': lat, 'lng': lng} for address, lat, lng in rows}, indent=2)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
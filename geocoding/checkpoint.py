@@ -0,0 +1,146 @@
+"""
+Append-only checkpoint log.
+
+State is kept as a JSON snapshot plus a JSON Lines log of records appended
+since that snapshot. A checkpoint appends one line; compaction folds the log
+into a fresh snapshot (written to a temp file and renamed atomically) and
+truncates the log. Loading reads the snapshot and replays the log, ignoring
+a torn final line left by a crash.
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def default_log_path(snapshot_path: str) -> str:
+    root, _ = os.path.splitext(snapshot_path)
+    return root + '.jsonl'
+
+
+class CheckpointLog:
+    """JSON snapshot + JSON Lines write-ahead log"""
+
+    def __init__(self, snapshot_path: str, log_path: Optional[str] = None):
+        self.snapshot_path = snapshot_path
+        self.log_path = log_path or default_log_path(snapshot_path)
+        self.log_file = None
+        self.appended = 0
+
+    def load(self, repair: bool = False) -> Tuple[Optional[Dict], List[Dict]]:
+        """Return the snapshot (or None) and the records logged after it.
+
+        With repair=True (writers only) a torn final record is cut off so new
+        appends start on a clean line; read-only callers just skip it.
+        """
+        snapshot = None
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r') as f:
+                snapshot = json.load(f)
+
+        records = []
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'rb') as f:
+                good_offset = 0
+                for line_number, line in enumerate(f, 1):
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        logger.warning(f"Ignoring torn checkpoint record at {self.log_path}:{line_number}")
+                        if repair:
+                            self.truncate_log(good_offset)
+                        break
+                    good_offset += len(line)
+        return snapshot, records
+
+    def truncate_log(self, offset: int):
+        """Cut the log back to its last complete record"""
+        with open(self.log_path, 'r+b') as f:
+            f.truncate(offset)
+
+    def append(self, record: Dict):
+        """Append one record to the log"""
+        if self.log_file is None:
+            self.log_file = open(self.log_path, 'a')
+        self.log_file.write(json.dumps(record) + '\n')
+        self.log_file.flush()
+        self.appended += 1
+
+    def sync(self):
+        """Force appended records to disk"""
+        if self.log_file is not None:
+            self.log_file.flush()
+            os.fsync(self.log_file.fileno())
+
+    def compact(self, snapshot: Dict):
+        """Replace the snapshot with `snapshot` and start an empty log"""
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+        self.close()
+        open(self.log_path, 'w').close()
+        self.appended = 0
+
+    def close(self):
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
+
+
+def load_geocoding_progress(progress_file: str, default_index: int = 0, repair: bool = False) -> Dict:
+    """Rebuild geocoding progress (last_processed_index, results, errors) by replay.
+
+    Log records look like {'index': n, 'result': {...}}. Records whose
+    (record_id, index) is already in the snapshot are skipped, so a crash
+    between writing a snapshot and truncating the log never double-counts a
+    row; a later attempt at a row that failed (a retry) replaces the
+    failure. last_processed_index is the export row after the furthest one
+    recorded (rows may be recorded out of order by the daemon's work queue).
+    """
+    snapshot, records = CheckpointLog(progress_file).load(repair)
+    state = {
+        'last_processed_index': default_index,
+        'results': [],
+        'errors': [],
+        'timestamp': None,
+    }
+    if snapshot:
+        state.update(snapshot)
+
+    seen = {(result.get('record_id'), result.get('index')): result
+            for result in state['results'] + state['errors']}
+    for record in records:
+        result = record['result']
+        key = (result.get('record_id'), record['index'])
+        previous = seen.get(key)
+        if previous is not None:
+            if previous.get('geocoded') or previous.get('processed_at') == result.get('processed_at'):
+                continue
+            state['errors'].remove(previous)
+        seen[key] = result
+        if result.get('geocoded'):
+            state['results'].append(result)
+        else:
+            state['errors'].append(result)
+        state['last_processed_index'] = max(state['last_processed_index'], record['index'] + 1)
+        state['timestamp'] = result.get('processed_at', state['timestamp'])
+
+    return state
+
+
+def progress_snapshot(last_processed_index: int, results: List[Dict], errors: List[Dict]) -> Dict:
+    """Build a snapshot in the geocoding_progress.json format"""
+    return {
+        'last_processed_index': last_processed_index,
+        'results': results,
+        'errors': errors,
+        'timestamp': datetime.now().isoformat()
+    }
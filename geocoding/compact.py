@@ -0,0 +1,300 @@
+"""
+Compact columnar encoding of the map's competitor dataset.
+
+apptegy-geocoded-current.json repeats the same handful of values
+("competitor": "Apptegy", "products": ["CMS"], ...) on every record and is
+indented, so most of the file the browser downloads is keys, constants and
+whitespace. The compact variant (apptegy-geocoded-current.columns.json)
+stores one column per field, written without whitespace:
+
+    {"format": "columns", "version": 1, "count": 3,
+     "fields": ["recordId", "name", "state", "lat", ...],
+     "columns": {
+        "name": {"values": ["Lincoln High", "Ripley Elementary", "Oark School"]},
+        "state": {"dict": ["Ohio", "Colorado"], "codes": [0, 1, 0]},
+        "competitor": {"dict": ["Apptegy"], "runs": [0, 3]},
+        "lat": {"scale": 100000, "values": [3970826, 2224499, null]},
+        ...}}
+
+- Categorical fields are dictionary-encoded, most frequent value first;
+  rows hold its index (-1 where a record lacks the field), run-length
+  encoded when that is shorter.
+- Coordinates are rounded to COORDINATE_DIGITS decimals (about a meter)
+  and stored as integers.
+- Timestamps and IDs are front-coded ("prefix" holds how many characters
+  are shared with the previous row, or with the "base" field of the same
+  row), and displayName is split into dictionary-encoded parts.
+- Rows without a non-dictionary field are listed in "missing".
+
+decode_columns() turns the document back into the records, identical to
+the originals except for the coordinate rounding. index.html carries the
+same decoder in JavaScript (decodeCompetitorColumns).
+"""
+
+import json
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .datasets import atomic_write
+
+FORMAT = 'columns'
+VERSION = 1
+COORDINATE_DIGITS = 5
+
+COORDINATE_FIELDS = frozenset(['lat', 'lng'])
+# Timestamps and IDs share a prefix with the row before (or with the field named here)
+FRONT_CODED_FIELDS = {'recordId': None, 'createDate': None, 'lastContact': 'createDate'}
+# "School, Street, City, County, State, ZIP, United States": parts repeat, whole values do not
+PART_FIELDS = frozenset(['displayName'])
+PART_SEPARATOR = ', '
+# Mostly distinct per record: a dictionary would only add an index per row
+PLAIN_FIELDS = frozenset(['name', 'domain'])
+
+
+def compact_path(path: str) -> str:
+    """apptegy-geocoded-current.json -> apptegy-geocoded-current.columns.json"""
+    root, ext = path.rsplit('.', 1) if '.' in path else (path, 'json')
+    return f"{root}.columns.{ext}"
+
+
+def _run_lengths(codes: array) -> List[int]:
+    """[code, run length, code, run length, ...]"""
+    runs: List[int] = []
+    for code in codes:
+        if runs and runs[-2] == code:
+            runs[-1] += 1
+        else:
+            runs += [code, 1]
+    return runs
+
+
+class _Dictionary:
+    def __init__(self):
+        self.values: List = []
+        self.lookup: Dict[str, int] = {}
+        self.counts = array('l')
+
+    def code(self, value) -> int:
+        # Keyed by the JSON text, so 0/False/0.0 and lists stay distinct
+        key = json.dumps(value, sort_keys=True)
+        code = self.lookup.get(key)
+        if code is None:
+            code = self.lookup[key] = len(self.values)
+            self.values.append(value)
+            self.counts.append(0)
+        self.counts[code] += 1
+        return code
+
+    def by_frequency(self) -> Tuple[List, List[int]]:
+        """Values, most used first (so common values get short codes), and
+        the new code of each old one"""
+        order = sorted(range(len(self.values)), key=lambda code: -self.counts[code])
+        remap = [0] * len(order)
+        for new_code, old_code in enumerate(order):
+            remap[old_code] = new_code
+        return [self.values[code] for code in order], remap
+
+
+class _DictionaryColumn:
+    def __init__(self, rows_before: int):
+        self.dictionary = _Dictionary()
+        self.codes = array('l', [-1] * rows_before)
+
+    def append(self, value, record: Dict):
+        self.codes.append(self.dictionary.code(value))
+
+    def append_missing(self):
+        self.codes.append(-1)
+
+    def encode(self) -> Dict:
+        values, remap = self.dictionary.by_frequency()
+        codes = array('l', (remap[code] if code >= 0 else -1 for code in self.codes))
+        runs = _run_lengths(codes)
+        # Constant and sorted columns collapse to a few runs
+        if len(runs) < len(codes):
+            return {'dict': values, 'runs': runs}
+        return {'dict': values, 'codes': codes.tolist()}
+
+
+class _PlainColumn:
+    def __init__(self, rows_before: int):
+        self.values: List = [None] * rows_before
+        self.missing = array('l', range(rows_before))
+
+    def append(self, value, record: Dict):
+        self.values.append(value)
+
+    def append_missing(self):
+        self.missing.append(len(self.values))
+        self.values.append(None)
+
+    def encode(self) -> Dict:
+        encoded = {'values': self.values}
+        if self.missing:
+            encoded['missing'] = self.missing.tolist()
+        return encoded
+
+
+class _CoordinateColumn(_PlainColumn):
+    scale = 10 ** COORDINATE_DIGITS
+
+    def append(self, value, record: Dict):
+        self.values.append(None if value is None else round(float(value) * self.scale))
+
+    def encode(self) -> Dict:
+        return dict(super().encode(), scale=self.scale)
+
+
+class _FrontCodedColumn(_PlainColumn):
+    """Each string stored as [length of the prefix it shares with the base, rest]"""
+
+    def __init__(self, rows_before: int, base_field: str = None):
+        super().__init__(rows_before)
+        self.base_field = base_field
+        self.previous = ''
+        self.prefixes = array('l', [-1] * rows_before)
+
+    def append(self, value, record: Dict):
+        if not isinstance(value, str):
+            # null, or a value this encoding cannot hold: stored as-is
+            self.prefixes.append(-1)
+            self.values.append(value)
+            return
+        base = record.get(self.base_field) if self.base_field else self.previous
+        base = base if isinstance(base, str) else ''
+        shared = 0
+        limit = min(len(base), len(value))
+        while shared < limit and base[shared] == value[shared]:
+            shared += 1
+        self.prefixes.append(shared)
+        self.values.append(value[shared:])
+        self.previous = value
+
+    def append_missing(self):
+        self.prefixes.append(-1)
+        super().append_missing()
+
+    def encode(self) -> Dict:
+        encoded = dict(super().encode(), prefix=self.prefixes.tolist())
+        if self.base_field:
+            encoded['base'] = self.base_field
+        return encoded
+
+
+class _PartsColumn(_PlainColumn):
+    """Strings split on PART_SEPARATOR, each part dictionary-encoded"""
+
+    def __init__(self, rows_before: int):
+        super().__init__(rows_before)
+        self.dictionary = _Dictionary()
+
+    def append(self, value, record: Dict):
+        if isinstance(value, str):
+            value = [self.dictionary.code(part) for part in value.split(PART_SEPARATOR)]
+        else:
+            value = None if value is None else {'value': value}
+        self.values.append(value)
+
+    def encode(self) -> Dict:
+        parts, remap = self.dictionary.by_frequency()
+        self.values = [[remap[code] for code in value] if isinstance(value, list) else value
+                       for value in self.values]
+        return dict(super().encode(), parts=parts, separator=PART_SEPARATOR)
+
+
+def _new_column(field: str, rows_before: int):
+    if field in COORDINATE_FIELDS:
+        return _CoordinateColumn(rows_before)
+    if field in FRONT_CODED_FIELDS:
+        return _FrontCodedColumn(rows_before, FRONT_CODED_FIELDS[field])
+    if field in PART_FIELDS:
+        return _PartsColumn(rows_before)
+    if field in PLAIN_FIELDS:
+        return _PlainColumn(rows_before)
+    return _DictionaryColumn(rows_before)
+
+
+def encode_columns(records: Iterable[Dict]) -> Dict:
+    """Columnar document for a list (or stream) of records"""
+    columns: Dict[str, object] = {}
+    count = 0
+    for record in records:
+        for field, value in record.items():
+            column = columns.get(field)
+            if column is None:
+                column = columns[field] = _new_column(field, count)
+            column.append(value, record)
+        if len(record) < len(columns):
+            for field, column in columns.items():
+                if field not in record:
+                    column.append_missing()
+        count += 1
+    return {
+        'format': FORMAT,
+        'version': VERSION,
+        'count': count,
+        'fields': list(columns),
+        'columns': {field: column.encode() for field, column in columns.items()},
+    }
+
+
+def _decode_column(column: Dict, base_values: Optional[List]) -> Tuple[List, Set[int]]:
+    """Row values of one column (None where missing) and the missing rows"""
+    if 'dict' in column:
+        dictionary = column['dict']
+        codes = column.get('codes')
+        if codes is None:
+            runs = column['runs']
+            codes = [code for i in range(0, len(runs), 2) for code in [runs[i]] * runs[i + 1]]
+        return ([dictionary[code] if code >= 0 else None for code in codes],
+                {row for row, code in enumerate(codes) if code < 0})
+    values = column['values']
+    missing = set(column.get('missing', ()))
+    if 'scale' in column:
+        scale = column['scale']
+        values = [None if value is None else value / scale for value in values]
+    elif 'prefix' in column:
+        decoded = []
+        previous = ''
+        for row, (shared, value) in enumerate(zip(column['prefix'], values)):
+            if shared >= 0:
+                base = base_values[row] if base_values is not None else previous
+                value = previous = (base if isinstance(base, str) else '')[:shared] + value
+            decoded.append(value)
+        values = decoded
+    elif 'parts' in column:
+        parts = column['parts']
+        separator = column['separator']
+        values = [separator.join(parts[code] for code in value) if isinstance(value, list)
+                  else value and value['value'] for value in values]
+    return values, missing
+
+
+def decode_columns(document: Dict) -> List[Dict]:
+    """The records of an encode_columns() document"""
+    if document.get('format') != FORMAT or document.get('version') != VERSION:
+        raise ValueError(f"Not a version {VERSION} columnar document")
+    fields = document['fields']
+    columns = document['columns']
+    decoded = {}
+    # Columns coded against another one ("base") after it
+    for field in sorted(fields, key=lambda field: 'base' in columns[field]):
+        base = columns[field].get('base')
+        decoded[field] = _decode_column(columns[field], decoded[base][0] if base else None)
+    return [
+        {field: decoded[field][0][row] for field in fields if row not in decoded[field][1]}
+        for row in range(document['count'])
+    ]
+
+
+def write_compact(records: Iterable[Dict], path: str):
+    """Write the compact variant of a dataset (columns are built in memory,
+    like the array the browser decodes them into)"""
+    document = encode_columns(records)
+    with atomic_write(path) as f:
+        json.dump(document, f, separators=(',', ':'), ensure_ascii=False)
+
+
+def read_compact(path: str) -> List[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return decode_columns(json.load(f))
@@ -0,0 +1,49 @@
+"""
+Backend selection from the environment.
+
+    GEOCODER_BACKEND    'nominatim' (default) or 'fixture'
+    NOMINATIM_URL       alternate Nominatim-compatible server
+    GEOCODER_FIXTURE    geocoded_data.json-style file for the fixture backend
+    GEOCODER_GAZETTEER  gazetteer table, or 'off' to always use the network
+"""
+
+import os
+from typing import Optional
+
+from .backends import NOMINATIM_URL, ChainedBackend, FixtureBackend, GeocoderBackend, NominatimBackend
+from .gazetteer import load_default_gazetteer
+from .ratelimit import RateLimitedBackend, TokenBucket
+from .session import DEFAULT_USER_AGENT
+
+
+def get_backend(user_agent: str = DEFAULT_USER_AGENT,
+                bucket: Optional[TokenBucket] = None,
+                **default_params) -> GeocoderBackend:
+    """Build the backend selected by the environment.
+
+    ZIP-only and city+state queries are answered by the offline gazetteer
+    first; everything else goes to the selected provider, rate limited by
+    `bucket` when one is given (an AdaptiveRateLimiter also backs off on 429s).
+    """
+    backend_name = os.environ.get('GEOCODER_BACKEND', 'nominatim').lower()
+
+    if backend_name == 'fixture':
+        backend = FixtureBackend.from_file(os.environ.get('GEOCODER_FIXTURE', 'geocoded_data.json'))
+    elif backend_name == 'nominatim':
+        backend = NominatimBackend(
+            base_url=os.environ.get('NOMINATIM_URL', NOMINATIM_URL),
+            user_agent=user_agent,
+            **default_params
+        )
+    else:
+        raise ValueError(f"Unknown geocoder backend: {backend_name}")
+
+    if bucket is not None:
+        backend = RateLimitedBackend(backend, bucket)
+
+    if os.environ.get('GEOCODER_GAZETTEER', '').lower() != 'off':
+        gazetteer = load_default_gazetteer()
+        if gazetteer is not None:
+            backend = ChainedBackend([gazetteer, backend])
+
+    return backend
@@ -0,0 +1,220 @@
+"""
+Crash-safe writes and content-addressed snapshots for the dataset files.
+
+atomic_write() writes to a temp file in the same directory, fsyncs it and
+renames it over the target, so the web app and the analysis scripts see
+either the old file or the new one, never a partial write, and a crash
+leaves the old file in place.
+
+SnapshotStore keeps earlier versions of a dataset in .snapshots/ next to
+it. A version is stored once, under its SHA-256, as a hard link to the
+file being replaced: since every writer replaces the file instead of
+rewriting it, the old inode is never modified and a snapshot copies no
+data. A file that already shares its inode with another link (a snapshot
+that was not followed by a replace) is copied instead, and restore()
+checks an object's hash before writing it back, so an in-place edit of a
+linked file is caught rather than restored. Each dataset has a history
+(<name>.jsonl) of the versions taken; prune() keeps the newest KEEP_LAST
+plus one per day for KEEP_DAYS days and deletes objects no history refers
+to any more.
+
+    python3 dataset_snapshots.py list apptegy-geocoded-current.json
+    python3 dataset_snapshots.py restore apptegy-geocoded-current.json 3f2a9c
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, TextIO
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR_NAME = '.snapshots'
+KEEP_LAST = 10  # Most recent versions always kept
+KEEP_DAYS = 30  # Plus the newest version of each of the last N days
+
+
+def _fsync_dir(directory: str):
+    try:
+        fd = os.open(directory or '.', os.O_RDONLY)
+    except OSError:
+        return  # Not supported on this platform
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'w', encoding: Optional[str] = 'utf-8') -> Iterator[TextIO]:
+    """Open a temp file for writing that replaces `path` when the block
+    exits cleanly (and is discarded if it raises)"""
+    directory = os.path.dirname(path)
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    f = open(tmp_path, mode, encoding=None if 'b' in mode else encoding)
+    try:
+        yield f
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+        os.replace(tmp_path, path)
+        _fsync_dir(directory)
+    except BaseException:
+        f.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_json(path: str, data, **dump_kwargs):
+    """json.dump() to `path` atomically"""
+    with atomic_write(path) as f:
+        json.dump(data, f, **dump_kwargs)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SnapshotStore:
+    """Content-addressed, hard-linked versions of dataset files"""
+
+    def __init__(self, root: str = SNAPSHOT_DIR_NAME, keep_last: int = KEEP_LAST, keep_days: int = KEEP_DAYS):
+        self.root = root
+        self.keep_last = keep_last
+        self.keep_days = keep_days
+
+    @classmethod
+    def for_file(cls, path: str, **kwargs) -> 'SnapshotStore':
+        """The store next to a dataset file"""
+        return cls(os.path.join(os.path.dirname(os.path.abspath(path)), SNAPSHOT_DIR_NAME), **kwargs)
+
+    def object_path(self, sha256: str) -> str:
+        return os.path.join(self.root, 'objects', sha256[:2], sha256)
+
+    def history_path(self, path: str) -> str:
+        return os.path.join(self.root, f"{os.path.basename(path)}.jsonl")
+
+    def history(self, path: str) -> List[Dict]:
+        """Versions of a dataset, oldest first"""
+        try:
+            with open(self.history_path(path), 'r') as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def _write_history(self, path: str, entries: List[Dict]):
+        with atomic_write(self.history_path(path)) as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + '\n')
+
+    def snapshot(self, path: str, label: str = '') -> Optional[Dict]:
+        """Record the current contents of `path` (None if it does not exist)"""
+        if not os.path.exists(path):
+            return None
+        sha256 = file_sha256(path)
+        object_path = self.object_path(sha256)
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            if os.stat(path).st_nlink > 1:
+                # Linked elsewhere already: an in-place edit would change every link
+                self._copy(path, object_path)
+            else:
+                try:
+                    os.link(path, object_path)
+                except OSError as e:
+                    # No hard links here (other filesystem, FAT, ...): fall back to a copy
+                    logger.debug(f"Hard link failed for {path} ({e}), copying it")
+                    self._copy(path, object_path)
+        entry = {
+            'sha256': sha256,
+            'size': os.path.getsize(path),
+            'taken_at': datetime.now().isoformat(),
+            'label': label,
+        }
+        entries = self.history(path)
+        if entries and entries[-1]['sha256'] == sha256:
+            return entries[-1]  # Unchanged since the last snapshot
+        entries.append(entry)
+        self._write_history(path, entries)
+        self.prune(path)
+        return entry
+
+    @staticmethod
+    def _copy(path: str, object_path: str):
+        tmp_path = f"{object_path}.tmp"
+        shutil.copy2(path, tmp_path)
+        os.replace(tmp_path, object_path)
+
+    def find(self, path: str, version: Optional[str] = None) -> Optional[Dict]:
+        """The newest version whose hash starts with `version` (newest overall if None)"""
+        for entry in reversed(self.history(path)):
+            if version is None or entry['sha256'].startswith(version):
+                return entry
+        return None
+
+    def restore(self, path: str, version: Optional[str] = None) -> Dict:
+        """Put a stored version back in place, snapshotting what it replaces.
+
+        Raises ValueError (leaving `path` as it was) if the object no longer
+        has the stored hash, i.e. it was modified in place through a link.
+        """
+        entry = self.find(path, version)
+        if entry is None:
+            raise KeyError(f"No snapshot {version or ''} of {path}")
+        with open(self.object_path(entry['sha256']), 'rb') as source:
+            # Opened first: pruning during this snapshot may unlink the object
+            self.snapshot(path, label='before restore')
+            digest = hashlib.sha256()
+            with atomic_write(path, 'wb') as f:
+                for chunk in iter(lambda: source.read(1 << 20), b''):
+                    digest.update(chunk)
+                    f.write(chunk)
+                if digest.hexdigest() != entry['sha256']:
+                    raise ValueError(f"Snapshot {entry['sha256'][:12]} of {path} was modified after it was "
+                                     f"taken (sha256 is now {digest.hexdigest()[:12]}); not restoring it")
+        return entry
+
+    def prune(self, path: str) -> int:
+        """Apply the retention policy to one dataset; returns objects deleted"""
+        entries = self.history(path)
+        keep = set(range(max(0, len(entries) - self.keep_last), len(entries)))
+        cutoff = (datetime.now() - timedelta(days=self.keep_days)).date().isoformat()
+        newest_per_day = {}
+        for position, entry in enumerate(entries):
+            day = entry['taken_at'][:10]
+            if day >= cutoff:
+                newest_per_day[day] = position
+        keep.update(newest_per_day.values())
+        if len(keep) < len(entries):
+            self._write_history(path, [entry for position, entry in enumerate(entries) if position in keep])
+        return self.collect_garbage()
+
+    def collect_garbage(self) -> int:
+        """Delete objects that no dataset history refers to"""
+        if not os.path.isdir(self.root):
+            return 0
+        referenced = set()
+        for name in os.listdir(self.root):
+            if name.endswith('.jsonl'):
+                with open(os.path.join(self.root, name), 'r') as f:
+                    referenced.update(json.loads(line)['sha256'] for line in f if line.strip())
+        deleted = 0
+        objects_dir = os.path.join(self.root, 'objects')
+        for prefix in os.listdir(objects_dir) if os.path.isdir(objects_dir) else []:
+            for sha256 in os.listdir(os.path.join(objects_dir, prefix)):
+                if sha256 not in referenced:
+                    os.remove(os.path.join(objects_dir, prefix, sha256))
+                    deleted += 1
+        return deleted
+
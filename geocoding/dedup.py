@@ -0,0 +1,83 @@
+"""
+Batch-level query deduplication.
+
+Many input rows resolve to the same search string (schools in one district
+with only city and state known, the same building listed twice). These
+helpers group rows by normalized query so each unique query is geocoded
+once and the result fanned out to every row that shares it.
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+
+
+def normalize_query(query: str) -> str:
+    """Case, comma and whitespace-insensitive form of a search string"""
+    return ' '.join(query.lower().replace(',', ' ').split())
+
+
+def group_by_key(items: Iterable, key_fn: Callable[[Any], Hashable]) -> Dict[Hashable, List]:
+    """Group items by key, keeping first-seen order of keys and items"""
+    groups: Dict[Hashable, List] = OrderedDict()
+    for item in items:
+        groups.setdefault(key_fn(item), []).append(item)
+    return groups
+
+
+def dedup_report(groups: Dict[Hashable, List]) -> Dict[str, int]:
+    """Rows, unique queries and requests saved for a grouping"""
+    rows = sum(len(members) for members in groups.values())
+    return {'rows': rows, 'unique_queries': len(groups), 'requests_saved': rows - len(groups)}
+
+
+class SingleFlight:
+    """Share one computation per key across threads.
+
+    The first caller for a key runs the function; concurrent and later
+    callers with the same key wait for and reuse its result. Completed
+    entries beyond max_entries are forgotten oldest-first. Results that
+    `keep` rejects (and exceptions) are only shared with the callers
+    already waiting: the entry is dropped, so the next caller runs again.
+    """
+
+    def __init__(self, max_entries: int = 100000, keep: Optional[Callable[[Any], bool]] = None):
+        self.max_entries = max_entries
+        self.keep = keep
+        self.lock = threading.Lock()
+        self.futures: 'OrderedDict[Hashable, Future]' = OrderedDict()
+        self.shared = 0
+
+    def run(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self.lock:
+            future = self.futures.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self.futures[key] = future
+                self._evict()
+            else:
+                self.shared += 1
+
+        if owner:
+            try:
+                result = fn()
+            except BaseException as e:
+                future.set_exception(e)
+                kept = False
+            else:
+                future.set_result(result)
+                kept = self.keep is None or self.keep(result)
+            if not kept:
+                with self.lock:
+                    if self.futures.get(key) is future:
+                        del self.futures[key]
+        return future.result()
+
+    def _evict(self):
+        while len(self.futures) > self.max_entries:
+            oldest_key, oldest = next(iter(self.futures.items()))
+            if not oldest.done():
+                break
+            del self.futures[oldest_key]
@@ -0,0 +1,304 @@
+"""
+Versioned change sets for the map dataset.
+
+Every write of apptegy-geocoded-current.json bumps the version in a small
+manifest next to it (<name>.manifest.json) and saves what changed, keyed by
+recordId, as <name>.deltas/<version>.json:
+
+    {"from": 11, "to": 12,
+     "added": [{...record...}, ...],
+     "changed": [{...record...}, ...],
+     "removed": ["66455185113", ...]}
+
+A client holding version 9 fetches the manifest, applies deltas 10, 11 and
+12 with apply_delta() (or applyCompetitorDelta() in index.html) and has the
+current records, so keeping in sync costs what changed rather than the
+whole dataset. The newest KEEP_DELTAS deltas are kept; a client further
+behind, or whose chain is broken, reloads the full file. The manifest only
+holds values derived from the data (its updated_at is the newest record
+timestamp), so regenerating it for the same data gives the same bytes.
+
+merge_batch() already knows its delta (it only appends) and spools the
+added records to disk as they stream past. Other writers call
+DeltaLog.record_diff(), which diffs the old and new files in two streaming
+passes with 16 bytes of memory per old record (plus the removed IDs); the
+added and changed records are spooled the same way.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from array import array
+from typing import Dict, Iterable, List, Optional, TextIO, Union
+
+import numpy as np
+
+from .datasets import atomic_write, file_sha256, write_json
+from .processed import ID_DTYPE, record_key
+
+logger = logging.getLogger(__name__)
+
+KEEP_DELTAS = 50
+TIMESTAMP_FIELDS = ('createDate', 'lastContact')
+
+
+def record_digest(record: Dict) -> int:
+    """64-bit content hash of a record (key order does not matter)"""
+    text = json.dumps(record, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big', signed=True)
+
+
+def apply_delta(records: List[Dict], delta: Dict) -> List[Dict]:
+    """The records after a delta: changed ones replaced in place, removed
+    ones dropped, added ones appended"""
+    by_id = {str(record.get('recordId')): record for record in records}
+    for record_id in delta['removed']:
+        by_id.pop(str(record_id), None)
+    for record in delta['changed'] + delta['added']:
+        by_id[str(record['recordId'])] = record
+    return list(by_id.values())
+
+
+class SpooledRecords:
+    """Records of a delta being built, written to a temp file as a compact
+    JSON array instead of kept in memory"""
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f".spool.{os.getpid()}.{id(self)}.tmp")
+        self.f = open(self.path, 'w', encoding='utf-8')
+        self.f.write('[')
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, record: Dict):
+        if self.count:
+            self.f.write(',')
+        json.dump(record, self.f, separators=(',', ':'), ensure_ascii=False)
+        self.count += 1
+
+    def close(self):
+        if not self.f.closed:
+            self.f.write(']')
+            self.f.close()
+
+    def copy_to(self, f: TextIO):
+        """Write the JSON array to `f`"""
+        self.close()
+        with open(self.path, 'r', encoding='utf-8') as spool:
+            shutil.copyfileobj(spool, f)
+
+    def discard(self):
+        self.f.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+Records = Union[List[Dict], SpooledRecords]
+
+
+def _write_records(f: TextIO, records: Records):
+    if isinstance(records, SpooledRecords):
+        records.copy_to(f)
+    else:
+        json.dump(records, f, separators=(',', ':'), ensure_ascii=False)
+
+
+class DeltaLog:
+    """The manifest and delta files of one dataset"""
+
+    def __init__(self, dataset_path: str, keep: int = KEEP_DELTAS):
+        self.dataset_path = dataset_path
+        self.keep = keep
+        root, _ = os.path.splitext(dataset_path)
+        self.manifest_path = root + '.manifest.json'
+        self.delta_dir = root + '.deltas'
+
+    def manifest(self) -> Optional[Dict]:
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def delta_path(self, version: int) -> str:
+        return os.path.join(self.delta_dir, f"{version:06d}.json")
+
+    def delta_url(self, version: int) -> str:
+        """Delta file path relative to the manifest (what clients fetch)"""
+        return f"{os.path.basename(self.delta_dir)}/{version:06d}.json"
+
+    def spool(self) -> SpooledRecords:
+        """Temp file for records of the next delta (see record())"""
+        return SpooledRecords(self.delta_dir)
+
+    def record(self, added: Records, changed: Records, removed: List[str],
+               previous_sha256: Optional[str] = None) -> Dict:
+        """Bump the version for the dataset as now written, given what changed.
+
+        added and changed are lists or spool()s (which are consumed).
+        previous_sha256 is the hash of the file the changes were applied to;
+        if the manifest describes another file (the dataset was edited by
+        hand, or this is the first version), the delta chain restarts and
+        clients reload the full file.
+        """
+        try:
+            return self._record(added, changed, removed, previous_sha256)
+        finally:
+            for records in (added, changed):
+                if isinstance(records, SpooledRecords):
+                    records.discard()
+
+    def _record(self, added: Records, changed: Records, removed: List[str],
+                previous_sha256: Optional[str]) -> Dict:
+        manifest = self.manifest()
+        sha256 = file_sha256(self.dataset_path)
+        if manifest and manifest.get('sha256') == sha256:
+            return manifest  # Rewritten with the same contents
+        continues = bool(manifest and previous_sha256 and manifest.get('sha256') == previous_sha256)
+        version = (manifest['version'] + 1) if manifest else 1
+        deltas = manifest['deltas'] if continues else []
+
+        if continues:
+            os.makedirs(self.delta_dir, exist_ok=True)
+            # {"from": ..., "to": ..., "added": [...], "changed": [...], "removed": [...]}, streamed
+            with atomic_write(self.delta_path(version)) as f:
+                f.write(f'{{"from":{version - 1},"to":{version},"added":')
+                _write_records(f, added)
+                f.write(',"changed":')
+                _write_records(f, changed)
+                f.write(',"removed":')
+                json.dump(removed, f, separators=(',', ':'))
+                f.write('}')
+            deltas.append({
+                'from': version - 1,
+                'to': version,
+                'file': self.delta_url(version),
+                'added': len(added),
+                'changed': len(changed),
+                'removed': len(removed),
+                'size': os.path.getsize(self.delta_path(version)),
+            })
+        elif manifest:
+            logger.info(f"{self.dataset_path} does not match its manifest; restarting the delta chain")
+        deltas = deltas[-self.keep:]
+
+        manifest = {
+            'dataset': os.path.basename(self.dataset_path),
+            'version': version,
+            'sha256': sha256,
+            'updated_at': newest_timestamp(self.dataset_path),
+            'deltas': deltas,
+        }
+        write_json(self.manifest_path, manifest, indent=2)
+        self._prune({entry['to'] for entry in deltas})
+        return manifest
+
+    def record_diff(self, old_path: Optional[str], previous_sha256: Optional[str] = None) -> Dict:
+        """record() the difference between old_path (the version the dataset
+        replaced, e.g. its snapshot) and the dataset now written"""
+        if old_path is None or not os.path.exists(old_path):
+            return self.record([], [], [], None)
+        added, changed = self.spool(), self.spool()
+        try:
+            removed = diff_files(old_path, self.dataset_path, added, changed)[2]
+            return self.record(added, changed, removed, previous_sha256 or file_sha256(old_path))
+        except ValueError as e:
+            logger.warning(f"Cannot diff {self.dataset_path} by recordId ({e}); restarting the delta chain")
+            return self.record([], [], [], None)
+        finally:
+            added.discard()
+            changed.discard()
+
+    def changes_since(self, version: int) -> Optional[List[Dict]]:
+        """Deltas that bring a copy at `version` up to date ([] if it is
+        current, None if they are no longer kept)"""
+        manifest = self.manifest()
+        if manifest is None:
+            return None
+        pending = [entry for entry in manifest['deltas'] if entry['from'] >= version]
+        if version == manifest['version']:
+            return []
+        if not pending or pending[0]['from'] != version:
+            return None
+        deltas = []
+        for entry in pending:
+            with open(self.delta_path(entry['to']), 'r', encoding='utf-8') as f:
+                deltas.append(json.load(f))
+        return deltas
+
+    def _prune(self, keep_versions: set):
+        if not os.path.isdir(self.delta_dir):
+            return
+        for name in os.listdir(self.delta_dir):
+            stem, ext = os.path.splitext(name)
+            if ext == '.json' and stem.isdigit() and int(stem) not in keep_versions:
+                os.remove(os.path.join(self.delta_dir, name))
+
+
+def newest_timestamp(path: str) -> Optional[str]:
+    """Latest record timestamp in a dataset file (ISO format): derived from
+    the data, so rewriting the same records leaves the manifest unchanged"""
+    from .merge import iter_json_array  # Imported here: merge.py imports this module
+
+    newest = None
+    for record in iter_json_array(path):
+        for field in TIMESTAMP_FIELDS:
+            value = record.get(field)
+            if isinstance(value, str) and value:
+                value = value.replace(' ', 'T')  # "2025-05-01 10:25" from the HubSpot export
+                if newest is None or value > newest:
+                    newest = value
+    return newest
+
+
+def _digests(records: Iterable[Dict]):
+    """Sorted (keys, digests) of records by recordId; None if any has no ID"""
+    keys, digests = array('q'), array('q')
+    for record in records:
+        key = record_key(record.get('recordId'))
+        if key is None:
+            return None
+        keys.append(key)
+        digests.append(record_digest(record))
+    keys = np.frombuffer(keys, dtype=ID_DTYPE)
+    order = np.argsort(keys, kind='stable')
+    return keys[order], np.frombuffer(digests, dtype=np.int64)[order]
+
+
+def diff_files(old_path: str, new_path: str, added: Optional[Records] = None,
+               changed: Optional[Records] = None):
+    """(added, changed, removed IDs) between two dataset files, keyed by
+    recordId; added and changed records go to the given lists or spools"""
+    from .merge import iter_json_array  # Imported here: merge.py imports this module
+
+    added = [] if added is None else added
+    changed = [] if changed is None else changed
+    indexed = _digests(iter_json_array(old_path))
+    if indexed is None:
+        raise ValueError(f"{old_path} has records without a recordId")
+    old_keys, old_digests = indexed
+    seen = np.zeros(len(old_keys), dtype=bool)
+    for record in iter_json_array(new_path):
+        key = record_key(record.get('recordId'))
+        if key is None:
+            raise ValueError(f"{new_path} has records without a recordId")
+        position = np.searchsorted(old_keys, key)
+        if position < len(old_keys) and old_keys[position] == key:
+            # Last of any repeated ID wins, as in apply_delta()
+            seen[position:np.searchsorted(old_keys, key, side='right')] = True
+            if old_digests[position] != record_digest(record):
+                changed.append(record)
+        else:
+            added.append(record)
+
+    removed = []
+    if not seen.all():
+        unseen = set(old_keys[~seen].tolist())
+        removed = [str(record['recordId']) for record in iter_json_array(old_path)
+                   if record_key(record['recordId']) in unseen]
+    return added, changed, removed
@@ -0,0 +1,127 @@
+"""
+asyncio geocoding engine.
+
+Jobs are handed to a pool of worker threads running a blocking `worker`
+function (usually one that calls a RateLimitedBackend), so several requests
+are in flight at once. Finished results flow through a single consumer task
+that calls `on_result`, which keeps persistence sequential and overlapped
+with the network work. Jobs are pulled from the input iterable only as
+slots free up, so a generator over a huge file is never materialized.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 4
+WINDOW_PER_WORKER = 4  # Default max_in_flight = concurrency * WINDOW_PER_WORKER
+
+_DONE = object()
+_SKIPPED = object()  # Result placeholder for queued jobs dropped after should_stop
+
+
+class GeocodingEngine:
+    """Run a blocking worker over many jobs with bounded concurrency.
+
+    worker:      job -> result, called in a worker thread
+    on_result:   (job, result) -> None, called on the event loop thread
+    concurrency: number of jobs in flight
+    ordered:     deliver results in input order (needed for index-based resume)
+    should_stop: polled before each new job is started; once it is true,
+                 queued jobs are dropped (not delivered) and only the
+                 requests already running finish
+    max_in_flight: jobs taken from the input but not yet delivered (queued,
+                 running or waiting in the reorder buffer)
+    """
+
+    def __init__(self, worker: Callable[[Any], Any],
+                 on_result: Optional[Callable[[Any, Any], None]] = None,
+                 concurrency: int = DEFAULT_CONCURRENCY,
+                 ordered: bool = False,
+                 should_stop: Optional[Callable[[], bool]] = None,
+                 max_in_flight: Optional[int] = None):
+        self.worker = worker
+        self.on_result = on_result
+        self.concurrency = max(1, concurrency)
+        self.ordered = ordered
+        self.should_stop = should_stop or (lambda: False)
+        self.max_in_flight = max(self.concurrency, max_in_flight or self.concurrency * WINDOW_PER_WORKER)
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'skipped': 0}
+
+    async def _produce(self, jobs: Iterable, job_queue: asyncio.Queue, window: asyncio.Semaphore):
+        for seq, job in enumerate(jobs):
+            if self.should_stop():
+                break
+            await window.acquire()
+            await job_queue.put((seq, job))
+            self.stats['submitted'] += 1
+        for _ in range(self.concurrency):
+            await job_queue.put(_DONE)
+
+    async def _work(self, executor: ThreadPoolExecutor, job_queue: asyncio.Queue,
+                    result_queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await job_queue.get()
+            if item is _DONE:
+                break
+            seq, job = item
+            if self.should_stop():
+                await result_queue.put((seq, job, _SKIPPED))
+                continue
+            try:
+                result = await loop.run_in_executor(executor, self.worker, job)
+            except Exception as e:
+                logger.error(f"Worker failed on job {seq}: {e}")
+                self.stats['failed'] += 1
+                result = None
+            await result_queue.put((seq, job, result))
+        await result_queue.put(_DONE)
+
+    def _deliver(self, job, result, window: asyncio.Semaphore):
+        window.release()
+        if result is _SKIPPED:
+            self.stats['skipped'] += 1
+            return
+        self.stats['completed'] += 1
+        if self.on_result:
+            self.on_result(job, result)
+
+    async def _consume(self, result_queue: asyncio.Queue, window: asyncio.Semaphore):
+        finished_workers = 0
+        pending: Dict[int, tuple] = {}
+        next_seq = 0
+        while finished_workers < self.concurrency:
+            item = await result_queue.get()
+            if item is _DONE:
+                finished_workers += 1
+                continue
+            seq, job, result = item
+            if not self.ordered:
+                self._deliver(job, result, window)
+                continue
+            pending[seq] = (job, result)
+            while next_seq in pending:
+                self._deliver(*pending.pop(next_seq), window)
+                next_seq += 1
+
+    async def run_async(self, jobs: Iterable) -> Dict[str, int]:
+        job_queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        result_queue: asyncio.Queue = asyncio.Queue()
+        # A stalled head-of-line job holds back ordered delivery; the window
+        # stops the reorder buffer (and the input) from running ahead of it
+        window = asyncio.Semaphore(self.max_in_flight)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            await asyncio.gather(
+                self._produce(jobs, job_queue, window),
+                self._consume(result_queue, window),
+                *[self._work(executor, job_queue, result_queue) for _ in range(self.concurrency)]
+            )
+        return self.stats
+
+    def run(self, jobs: Iterable) -> Dict[str, int]:
+        """Process every job and return submitted/completed/failed/skipped counts"""
+        return asyncio.run(self.run_async(jobs))
@@ -0,0 +1,184 @@
+"""
+Offline ZIP / place gazetteer backend.
+
+Resolves ZIP-only and city+state queries from an in-memory centroid index
+without touching the network. Street-level queries return None so a chained
+network backend handles them.
+
+The bundled table (geocoding/data/gazetteer.csv) has the columns
+
+    kind,key,state,lat,lng
+
+where kind is 'zip' (key = 5-digit ZIP) or 'place' (key = lowercase city).
+It is produced by build_gazetteer.py from our geocode cache and, when
+available, the Census ZCTA and place gazetteer files.
+"""
+
+import csv
+import os
+import re
+from typing import Dict, Optional, Tuple
+
+from .backends import GeocoderBackend
+from .states import STATE_ABBREVIATIONS, state_abbreviation
+
+DEFAULT_GAZETTEER_FILE = os.path.join(os.path.dirname(__file__), 'data', 'gazetteer.csv')
+
+ZIP_RE = re.compile(r'^(\d{5})(?:-\d{4})?$')
+STATE_ZIP_RE = re.compile(r'^([A-Za-z .]+?)\s+(\d{5})(?:-\d{4})?$')
+STREET_RE = re.compile(r'^\d+[A-Za-z]*\s+\S|^p\.?\s*o\.?\s+box\b', re.IGNORECASE)
+NAN_RE = re.compile(r'\b(?:nan|none)\b', re.IGNORECASE)
+COUNTRY_NAMES = {'usa', 'us', 'united states', 'united states of america'}
+PLACE_SUFFIX_RE = re.compile(r'\s+(?:city|town|village|borough|CDP|municipality)$')
+
+PRECISION_ZIP = 'zip'
+PRECISION_PLACE = 'place'
+
+
+def parse_query(query: str) -> Dict:
+    """Split a free-text query into street flag, remaining parts, state and ZIP"""
+    parts = []
+    for part in query.split(','):
+        part = NAN_RE.sub('', part).strip()
+        if part and part.lower() not in COUNTRY_NAMES:
+            parts.append(part)
+
+    zip_code = None
+    state = None
+
+    if parts and ZIP_RE.match(parts[-1]):
+        zip_code = ZIP_RE.match(parts.pop()).group(1)
+
+    if parts:
+        match = STATE_ZIP_RE.match(parts[-1])
+        if match and state_abbreviation(match.group(1)):
+            state = state_abbreviation(match.group(1))
+            zip_code = zip_code or match.group(2)
+            parts.pop()
+
+    if parts and not state and state_abbreviation(parts[-1]):
+        state = state_abbreviation(parts.pop())
+
+    return {
+        'street': any(STREET_RE.match(part) for part in parts),
+        'parts': parts,
+        'state': state,
+        'zip': zip_code,
+    }
+
+
+class GazetteerBackend(GeocoderBackend):
+    """Answer ZIP and city+state queries from an in-memory centroid index"""
+
+    name = 'gazetteer'
+
+    def __init__(self):
+        self.zips: Dict[str, Tuple[float, float, str]] = {}
+        self.places: Dict[Tuple[str, str], Tuple[float, float]] = {}
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_GAZETTEER_FILE) -> 'GazetteerBackend':
+        """Load a gazetteer table in the bundled CSV format"""
+        gazetteer = cls()
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                lat, lng = float(row['lat']), float(row['lng'])
+                if row['kind'] == PRECISION_ZIP:
+                    gazetteer.add_zip(row['key'], lat, lng, row['state'])
+                elif row['kind'] == PRECISION_PLACE:
+                    gazetteer.add_place(row['key'], row['state'], lat, lng)
+        return gazetteer
+
+    def load_census_zcta(self, path: str):
+        """Add centroids from a Census ZCTA gazetteer file (tab separated)"""
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f, delimiter='\t')
+            reader.fieldnames = [name.strip() for name in reader.fieldnames]
+            for row in reader:
+                self.add_zip(row['GEOID'], float(row['INTPTLAT']), float(row['INTPTLONG']), '')
+
+    def load_census_places(self, path: str):
+        """Add centroids from a Census place gazetteer file (tab separated)"""
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f, delimiter='\t')
+            reader.fieldnames = [name.strip() for name in reader.fieldnames]
+            for row in reader:
+                city = PLACE_SUFFIX_RE.sub('', row['NAME'].strip())
+                self.add_place(city, row['USPS'], float(row['INTPTLAT']), float(row['INTPTLONG']))
+
+    def add_zip(self, zip_code: str, lat: float, lng: float, state: str = ''):
+        self.zips[zip_code[:5]] = (lat, lng, state)
+
+    def add_place(self, city: str, state: str, lat: float, lng: float):
+        abbr = state_abbreviation(state) or state
+        self.places[(city.strip().lower(), abbr)] = (lat, lng)
+
+    def save(self, path: str = DEFAULT_GAZETTEER_FILE):
+        """Write the index in the bundled CSV format"""
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['kind', 'key', 'state', 'lat', 'lng'])
+            for zip_code, (lat, lng, state) in sorted(self.zips.items()):
+                writer.writerow([PRECISION_ZIP, zip_code, state, round(lat, 5), round(lng, 5)])
+            for (city, state), (lat, lng) in sorted(self.places.items()):
+                writer.writerow([PRECISION_PLACE, city, state, round(lat, 5), round(lng, 5)])
+
+    def _result(self, lat: float, lng: float, display_name: str, address: Dict,
+                precision: str, query: str) -> Dict:
+        return {
+            'lat': lat,
+            'lng': lng,
+            'display_name': display_name,
+            'address': address,
+            'importance': 0,
+            'place_id': None,
+            'query': query,
+            'precision': precision,
+        }
+
+    def lookup_zip(self, zip_code: str, query: Optional[str] = None) -> Optional[Dict]:
+        """Resolve a ZIP (ZIP+4 is truncated) to its centroid"""
+        if not zip_code:
+            return None
+        hit = self.zips.get(zip_code.strip()[:5])
+        if not hit:
+            return None
+        lat, lng, state = hit
+        display_name = f"{zip_code[:5]}, {state}" if state else zip_code[:5]
+        address = {'postcode': zip_code[:5]}
+        if state in STATE_ABBREVIATIONS:
+            address['state'] = STATE_ABBREVIATIONS[state]
+        return self._result(lat, lng, display_name, address, PRECISION_ZIP, query or zip_code)
+
+    def lookup_place(self, city: str, state: str, query: Optional[str] = None) -> Optional[Dict]:
+        """Resolve a city + state (name or abbreviation) to its centroid"""
+        if not city or not state:
+            return None
+        abbr = state_abbreviation(state)
+        hit = self.places.get((city.strip().lower(), abbr))
+        if not hit:
+            return None
+        address = {'city': city.strip(), 'state': STATE_ABBREVIATIONS[abbr]}
+        return self._result(hit[0], hit[1], f"{city.strip()}, {abbr}", address, PRECISION_PLACE,
+                            query or f"{city}, {state}")
+
+    def search(self, query: str, **params) -> Optional[Dict]:
+        parsed = parse_query(query)
+        if parsed['street'] or len(parsed['parts']) > 1:
+            return None  # Street-level or named-place query: leave it to the network
+
+        if parsed['zip']:
+            result = self.lookup_zip(parsed['zip'], query)
+            if result:
+                return result
+        if parsed['state'] and len(parsed['parts']) == 1:
+            return self.lookup_place(parsed['parts'][0], parsed['state'], query)
+        return None
+
+
+def load_default_gazetteer() -> Optional[GazetteerBackend]:
+    """Load the bundled gazetteer, or None if it is missing"""
+    path = os.environ.get('GEOCODER_GAZETTEER', DEFAULT_GAZETTEER_FILE)
+    if not os.path.exists(path):
+        return None
+    return GazetteerBackend.load(path)
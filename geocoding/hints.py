@@ -0,0 +1,158 @@
+"""
+Location hints for HubSpot school rows.
+
+Derives the name, city and state used to build search queries from a
+school's company name, domain and city columns. The state comes from a
+reverse walk over the domain labels (``*.k12.tx.us`` / ``*.tx.us``) instead
+of testing every pattern with a substring scan, the name patterns are
+compiled once, and per-name work is memoized. location_hints() runs the
+whole table at once, doing each distinct name and domain only once.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from .states import STATE_ABBREVIATIONS
+
+# State-level .us domains (k12.<st>.us and <st>.us); DC and PR were never mapped
+DOMAIN_STATES = {
+    abbr.lower(): name for abbr, name in STATE_ABBREVIATIONS.items() if abbr not in ('DC', 'PR')
+}
+
+# City and state embedded in names like "Euclid City School District, OH".
+# Only patterns with a city group are kept; the county/"City of" shapes had a
+# single group and could never yield a location.
+NAME_LOCATION_PATTERNS = [
+    re.compile(r'([A-Za-z\s]+)\s+(?:School District|ISD|USD|CSD)\s*(?:of\s+)?([A-Za-z\s]+)(?:,\s*([A-Z]{2}))?',
+               re.IGNORECASE),
+    re.compile(r'([A-Za-z\s]+)\s+(?:Elementary|Middle|High|Schools?)\s*,?\s*([A-Za-z\s]+)(?:,\s*([A-Z]{2}))?',
+               re.IGNORECASE),
+]
+
+# Trailing ", ST" in a name ("Linden School District, NJ"). Bare words are not
+# trusted: "Ms", "Co", "MT" and "SD" usually mean middle school, county, mount
+# and school district.
+NAME_STATE_RE = re.compile(
+    r',\s*(' + '|'.join(abbr.upper() for abbr in DOMAIN_STATES) + r')\s*$'
+)
+
+PARENTHESES_RE = re.compile(r'\(.*?\)')
+WHITESPACE_RE = re.compile(r'\s+')
+
+# Well-known cities, for rows with a city but no state hint
+CITY_STATES = {
+    'euclid': 'Ohio', 'cleveland': 'Ohio', 'columbus': 'Ohio', 'cincinnati': 'Ohio',
+    'toledo': 'Ohio', 'akron': 'Ohio', 'dayton': 'Ohio',
+    'houston': 'Texas', 'dallas': 'Texas', 'austin': 'Texas', 'san antonio': 'Texas',
+    'fort worth': 'Texas',
+    'los angeles': 'California', 'san francisco': 'California', 'san diego': 'California',
+    'sacramento': 'California', 'fresno': 'California',
+    'chicago': 'Illinois', 'springfield': 'Illinois', 'peoria': 'Illinois', 'rockford': 'Illinois',
+    'phoenix': 'Arizona', 'tucson': 'Arizona', 'mesa': 'Arizona',
+    'atlanta': 'Georgia', 'savannah': 'Georgia', 'augusta': 'Georgia',
+    'miami': 'Florida', 'tampa': 'Florida', 'orlando': 'Florida', 'jacksonville': 'Florida',
+    'tallahassee': 'Florida',
+}
+
+
+@lru_cache(maxsize=65536)
+def domain_state(domain: str) -> Optional[str]:
+    """State name for a state-level .us domain, found by walking labels from the TLD"""
+    if not domain:
+        return None
+    labels = domain.strip().lower().split('.')
+    for i in range(len(labels) - 1, 0, -1):
+        if labels[i] == 'us' and labels[i - 1] in DOMAIN_STATES:
+            return DOMAIN_STATES[labels[i - 1]]
+    return None
+
+
+@lru_cache(maxsize=65536)
+def domain_label_state(domain: str) -> Optional[str]:
+    """Looser domain hint: any inner label that is a state code (doe.sd.gov, x.va.host.com)"""
+    if not domain:
+        return None
+    labels = domain.strip().lower().split('.')
+    for label in labels[1:-1]:
+        if label in DOMAIN_STATES:
+            return DOMAIN_STATES[label]
+    return None
+
+
+@lru_cache(maxsize=65536)
+def name_location(name: str) -> Tuple[Optional[str], Optional[str]]:
+    """City and state abbreviation embedded in a school name, if any"""
+    if not name:
+        return None, None
+    for pattern in NAME_LOCATION_PATTERNS:
+        match = pattern.search(name)
+        if match:
+            head, city, state = match.groups()
+            city = city.strip() if city else head.strip()
+            return city, state.strip() if state else None
+    return None, None
+
+
+def name_state(name: str) -> Optional[str]:
+    """State name for a trailing state abbreviation in a name"""
+    match = NAME_STATE_RE.search(name) if name else None
+    return DOMAIN_STATES[match.group(1).lower()] if match else None
+
+
+def city_state(city: str) -> Optional[str]:
+    """Infer state from well-known cities"""
+    return CITY_STATES.get(city.lower().strip()) if city else None
+
+
+def clean_name(name: str) -> str:
+    """Company name without parenthesized notes, whitespace normalized"""
+    return WHITESPACE_RE.sub(' ', PARENTHESES_RE.sub('', name)).strip()
+
+
+def row_city(row: Dict) -> str:
+    return (row.get('City') or '').strip() or (row.get('Agile Location City') or '').strip()
+
+
+def query_parts(row: Dict) -> Dict[str, str]:
+    """Name, city and state hints for one HubSpot row"""
+    company_name = (row.get('Company name') or '').strip()
+    extracted_city, extracted_state = name_location(company_name)
+
+    city = row_city(row) or extracted_city or ''
+    state = (domain_state(row.get('Company Domain Name') or '')
+             or extracted_state
+             or city_state(city))
+    return {'name': clean_name(company_name), 'city': city, 'state': state or ''}
+
+
+def location_hints(frame: pd.DataFrame) -> pd.DataFrame:
+    """Name, city and state hint columns for a whole HubSpot table.
+
+    Equivalent to query_parts() per row; each distinct company name and
+    domain is processed once and mapped back over the column.
+    """
+    def column(name: str) -> pd.Series:
+        if name not in frame:
+            return pd.Series('', index=frame.index)
+        return frame[name].fillna('').astype(str).str.strip()
+
+    names = column('Company name')
+    domains = column('Company Domain Name')
+    city = column('City')
+    city = city.where(city != '', column('Agile Location City'))
+
+    unique_names = pd.Series(names.unique())
+    located = dict(zip(unique_names, unique_names.map(name_location)))
+    cleaned = dict(zip(unique_names, unique_names.map(clean_name)))
+    extracted_city = names.map(lambda n: located[n][0] or '')
+    extracted_state = names.map(lambda n: located[n][1] or '')
+
+    city = city.where(city != '', extracted_city)
+    state = domains.map(dict(zip(domains.unique(), map(domain_state, domains.unique())))).fillna('')
+    state = state.where(state != '', extracted_state)
+    state = state.where(state != '', city.str.lower().map(CITY_STATES).fillna(''))
+
+    return pd.DataFrame({'name': names.map(cleaned), 'city': city, 'state': state}, index=frame.index)
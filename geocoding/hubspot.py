@@ -0,0 +1,89 @@
+"""
+Streaming reader for the HubSpot CRM school exports.
+
+Rows are read lazily with csv.DictReader and handed on one at a time (or in
+fixed-size chunks for the column-wise hint builder), so a multi-gigabyte
+export is processed with flat memory instead of being loaded into a list
+first. Every script that consumes the export reads it through here.
+iter_pending() also diffs the export against the set of Record IDs that
+have already been geocoded; rows without a Record ID are keyed by row_id()
+instead, so they are not geocoded again on every run. Rows that failed
+transiently are passed in as `waiting` until their retry time.
+"""
+
+import csv
+from itertools import islice
+from typing import Container, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from .hints import location_hints
+from .processed import ProcessedIds
+
+HUBSPOT_CSV = 'hubspot-crm-exports-all-apptegy-schools-2025-07-15.csv'
+CHUNK_SIZE = 2000  # Rows per location_hints() batch
+
+
+def iter_hubspot_rows(path: str = HUBSPOT_CSV, start: int = 0,
+                      limit: Optional[int] = None) -> Iterator[Dict[str, str]]:
+    """Yield export rows as dicts, skipping the first `start` rows and
+    stopping after `limit` rows"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        stop = None if limit is None else start + limit
+        yield from islice(csv.DictReader(f), start, stop)
+
+
+def row_id(row: Dict[str, str]) -> str:
+    """The row's Record ID, or for rows without one a stable stand-in built
+    from its normalized name, domain, ZIP and city (hashed by record_key())"""
+    record_id = str(row.get('Record ID') or '').strip()
+    if record_id:
+        return record_id
+    fields = (row.get('Company name'), row.get('Company Domain Name'), row.get('Agile Location Zip'),
+              row.get('City') or row.get('Agile Location City'))
+    return 'row:' + '|'.join(' '.join(str(field or '').lower().split()) for field in fields)
+
+
+def iter_chunks(rows: Iterable, size: int = CHUNK_SIZE) -> Iterator[List]:
+    """Group an iterable into lists of at most `size` items"""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_pending(path: str = HUBSPOT_CSV, processed: Optional[ProcessedIds] = None,
+                 chunk_size: int = CHUNK_SIZE, stats: Optional[Dict[str, int]] = None,
+                 waiting: Optional[Container[str]] = None) -> Iterator[Tuple[int, Dict[str, str], Dict[str, str]]]:
+    """Yield (row index, row, query parts) for each export row whose
+    row_id() is neither in `processed` nor in `waiting`.
+
+    The export is diffed against the processed set in one streaming pass, a
+    chunk at a time; query parts are only built for the rows that remain.
+    `stats` (if given) counts rows read, rows skipped as already processed
+    and rows skipped as waiting to retry.
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault('rows', 0)
+    stats.setdefault('already_processed', 0)
+    stats.setdefault('waiting', 0)
+    offset = 0
+    for chunk in iter_chunks(iter_hubspot_rows(path), chunk_size):
+        indexed = list(zip(range(offset, offset + len(chunk)), chunk))
+        offset += len(chunk)
+        if processed is not None:
+            done = processed.contains_many(row_id(row) for row in chunk)
+            indexed = [item for item, seen in zip(indexed, done) if not seen]
+        stats['already_processed'] += len(chunk) - len(indexed)
+        stats['rows'] += len(chunk)
+        if waiting:
+            pending = [item for item in indexed if row_id(item[1]) not in waiting]
+            stats['waiting'] += len(indexed) - len(pending)
+            indexed = pending
+        if not indexed:
+            continue
+        hints = location_hints(pd.DataFrame([row for _, row in indexed])).to_dict('records')
+        for (index, row), parts in zip(indexed, hints):
+            yield index, row, parts
@@ -0,0 +1,90 @@
+"""
+Column-wise ingestion of the client workbooks.
+
+Builds cleaned addresses, website URLs and dedup keys for a whole sheet with
+pandas string operations instead of looping over DataFrame.iterrows(). Each
+helper reproduces the string the per-row code used to build, so cache keys
+and output records do not change.
+"""
+
+from typing import List
+
+import pandas as pd
+
+from .address import canonical_address
+
+# Cell values treated as empty when joining address parts (str() of NaN/None)
+MISSING_TEXT = ['', 'nan', 'None']
+
+
+def text(frame: pd.DataFrame, column: str, default: str = '', strip: bool = True) -> pd.Series:
+    """str(row.get(column, default)).strip() for every row"""
+    if column not in frame:
+        column_text = pd.Series(str(default), index=frame.index, dtype=object)
+    else:
+        column_text = frame[column].fillna('nan').astype(str)
+    return column_text.str.strip() if strip else column_text
+
+
+def values(frame: pd.DataFrame, column: str) -> pd.Series:
+    """Raw column values, or None for every row when the column is missing"""
+    if column not in frame:
+        return pd.Series(None, index=frame.index, dtype=object)
+    return frame[column]
+
+
+def flags(frame: pd.DataFrame, column: str) -> pd.Series:
+    """bool(row.get(column, False)) for every row"""
+    if column not in frame:
+        return pd.Series(False, index=frame.index)
+    return frame[column].astype(bool)
+
+
+def join_parts(parts: List[pd.Series]) -> pd.Series:
+    """Join each row's non-empty parts with ', ' and tidy spaces and commas"""
+    joined = pd.Series('', index=parts[0].index, dtype=object)
+    for part in parts:
+        joined = joined + (', ' + part).where(~part.isin(MISSING_TEXT), '')
+    return (joined.str[2:]
+            .str.replace(r'\s+', ' ', regex=True)
+            .str.replace(r',\s*,', ',', regex=True)
+            .str.strip(', '))
+
+
+def legacy_addresses(street: pd.Series, city: pd.Series, state: pd.Series, zip_code: pd.Series) -> pd.Series:
+    """The "street, city, state zip, USA" keys used by the original geocoded_data.json"""
+    return street + ', ' + city + ', ' + state + ' ' + zip_code + ', USA'
+
+
+def with_scheme(websites: pd.Series) -> pd.Series:
+    """Prefix https:// to non-empty websites that do not start with http"""
+    needs_scheme = (websites != '') & ~websites.str.startswith('http')
+    return websites.where(~needs_scheme, 'https://' + websites)
+
+
+def format_urls(urls: pd.Series) -> pd.Series:
+    """format_url() for a column: None for blank or 'N/A', https:// added when there is no scheme"""
+    missing = urls.isna() | urls.isin(['', 'N/A'])
+    cleaned = urls.fillna('').astype(str).str.strip()
+    cleaned = cleaned.where(cleaned.str.match(r'https?://'), 'https://' + cleaned)
+    return cleaned.astype(object).where(~missing, None)
+
+
+def address_keys(addresses: pd.Series) -> pd.Series:
+    """canonical_address() dedup/cache keys, computed once per distinct address"""
+    unique = addresses.unique()
+    return addresses.map(dict(zip(unique, map(canonical_address, unique))))
+
+
+def address_sheet(frame: pd.DataFrame, default_name: str) -> pd.DataFrame:
+    """Name, url, state and address columns for a "MAP - ... Address"
+    sheet, keeping only rows with a website"""
+    sheet = pd.DataFrame({
+        'name': text(frame, 'School Name', default_name),
+        'url': format_urls(values(frame, 'Website')),
+        'state': text(frame, 'STATE'),
+    })
+    sheet['address'] = legacy_addresses(
+        text(frame, 'Street Address'), text(frame, 'City Address'), sheet['state'], text(frame, 'Zip Address')
+    )
+    return sheet[sheet['url'].notna()]
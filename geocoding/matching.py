@@ -0,0 +1,262 @@
+"""
+Near-duplicate detection for school records.
+
+The same school reaches the map under slightly different names and Record
+IDs ("Lincoln Elem. School" from the demo set, "Lincoln Elementary" from the
+batch). DuplicateIndex finds them without comparing every pair: records are
+blocked by a GridIndex cell (or by an area key such as state or ZIP when
+they have no coordinates yet), and within a block only records sharing a
+distinctive name token are scored. A candidate is a duplicate when its
+token-set similarity clears NAME_THRESHOLD, or DOMAIN_NAME_THRESHOLD when
+both records carry the same school website domain. Records in different
+states, or with unrelated domains, are never duplicates: those are two
+schools of the same name that geocoding put on the same spot.
+
+Similarity weighs tokens: "school", "district", "public" and the like count
+for little, so "Lincoln Elementary School" matches "Lincoln Elementary".
+Names naming different grade levels never match, and neither do a
+district and one of its schools: they sit side by side under one domain.
+"""
+
+import re
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Optional, Tuple
+
+from .spatial import GridIndex, point_miles
+from .states import state_abbreviation
+
+MAX_MILES = 2.0  # Two geocodes of one school from different sources land this close
+NAME_THRESHOLD = 0.9
+DOMAIN_NAME_THRESHOLD = 0.7  # Districts share a domain, so a match still needs a similar name
+
+ABBREVIATIONS = {
+    'isd': 'independent school district',
+    'cisd': 'consolidated independent school district',
+    'usd': 'unified school district',
+    'sd': 'school district',
+    'hs': 'high school',
+    'ms': 'middle school',
+    'es': 'elementary school',
+    'elem': 'elementary',
+    'el': 'elementary',
+    'jr': 'junior',
+    'sr': 'senior',
+    'st': 'saint',
+    'mt': 'mount',
+    'ft': 'fort',
+    'acad': 'academy',
+    'sch': 'school',
+    'co': 'county',
+    'twp': 'township',
+    'cty': 'county',
+    'prep': 'preparatory',
+    'intermed': 'intermediate',
+    'schools': 'district',  # "Franklin County Schools" is the district, not a school
+}
+STOP_WORDS = frozenset(['the', 'of', 'and', 'at', 'for', 'in'])
+
+# Grade levels: two names with different level words are different schools
+LEVEL_WORDS = frozenset(['elementary', 'primary', 'intermediate', 'middle', 'junior', 'senior', 'high',
+                         'secondary', 'early', 'childhood', 'kindergarten', 'preschool'])
+# Words that say what kind of school it is rather than which one
+GENERIC_WORDS = frozenset([
+    'school', 'district', 'public', 'county', 'city', 'community', 'unified', 'independent',
+    'consolidated', 'union', 'township', 'regional', 'area', 'central', 'center', 'campus',
+    'academy', 'charter', 'preparatory', 'institute', 'learning', 'education', 'educational',
+    'k12', 'upper', 'lower', 'saint', 'system', 'board',
+])
+LEVEL_WEIGHT = 0.5
+GENERIC_WEIGHT = 0.25
+SCHOOL_WEIGHT = 0.1  # "school" and "district" are on nearly every name
+
+# Hosts that many unrelated schools share
+SHARED_DOMAINS = frozenset(['sites.google.com', 'google.com', 'facebook.com', 'weebly.com', 'wixsite.com',
+                            'blogspot.com', 'wordpress.com', 'edlio.com', 'apptegy.com', 'thrillshare.com'])
+
+_NON_WORD = re.compile(r"[^a-z0-9 ]+")
+
+
+def _stem(token: str) -> str:
+    # "schools" / "school", "meadows" / "meadow", "marys" / "mary"
+    return token[:-1] if len(token) > 3 and token.endswith('s') and not token.endswith('ss') else token
+
+
+def name_tokens(name: str) -> FrozenSet[str]:
+    """Normalized word set of a school name (abbreviations expanded)"""
+    text = _NON_WORD.sub(' ', str(name or '').lower().replace('&', ' and ').replace("'", ''))
+    tokens = set()
+    for word in text.split():
+        for token in ABBREVIATIONS.get(word, word).split():
+            if token not in STOP_WORDS:
+                tokens.add(_stem(token))
+    return frozenset(tokens)
+
+
+def token_weight(token: str) -> float:
+    if token in ('school', 'district'):
+        return SCHOOL_WEIGHT
+    if token in LEVEL_WORDS:
+        return LEVEL_WEIGHT
+    return GENERIC_WEIGHT if token in GENERIC_WORDS else 1.0
+
+
+def name_similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Weighted Jaccard similarity of two name_tokens() sets (0 when they
+    name different grade levels, or a district and a school)"""
+    levels_a, levels_b = a & LEVEL_WORDS, b & LEVEL_WORDS
+    if levels_a and levels_b and levels_a != levels_b:
+        return 0.0
+    if ('district' in a) != ('district' in b):
+        return 0.0
+    union = sum(token_weight(token) for token in a | b)
+    if not union:
+        return 0.0
+    return sum(token_weight(token) for token in a & b) / union
+
+
+def domain_key(domain: str) -> str:
+    """Comparable form of a website or domain ('' for shared hosting domains)"""
+    domain = str(domain or '').strip().lower()
+    domain = re.sub(r'^[a-z]+://', '', domain).split('/')[0].split(':')[0]
+    if domain.startswith('www.'):
+        domain = domain[4:]
+    return '' if domain in SHARED_DOMAINS else domain
+
+
+def same_site(a: str, b: str) -> bool:
+    """Whether two domain_key()s are one site ("hs.lincoln.k12.ne.us" is part of "lincoln.k12.ne.us")"""
+    return a == b or a.endswith('.' + b) or b.endswith('.' + a)
+
+
+def _blocking_tokens(tokens: FrozenSet[str]) -> FrozenSet[str]:
+    """The distinctive words of a name (all of them if it has none)"""
+    return frozenset(token for token in tokens if token_weight(token) == 1.0) or tokens
+
+
+def _point(lat, lng):
+    """(lat, lng) as floats, or (None, None) when either is missing or NaN"""
+    try:
+        lat, lng = float(lat), float(lng)
+    except (TypeError, ValueError):
+        return None, None
+    return (lat, lng) if lat == lat and lng == lng else (None, None)
+
+
+class DuplicateIndex:
+    """Incremental near-duplicate index.
+
+    add() registers a record and returns the key of the earlier record it
+    duplicates (None if it is new; duplicates are not indexed, so the first
+    record of a group stands for it). Each add only scores the records in
+    nearby grid cells (or the same area, for records without coordinates)
+    that share a distinctive token, so indexing N records takes roughly
+    linear time.
+    """
+
+    def __init__(self, max_miles: float = MAX_MILES, name_threshold: float = NAME_THRESHOLD,
+                 domain_name_threshold: float = DOMAIN_NAME_THRESHOLD):
+        self.max_miles = max_miles
+        self.name_threshold = name_threshold
+        self.domain_name_threshold = domain_name_threshold
+        self.grid = GridIndex(max_miles)
+        self.areas: Dict[Tuple[str, str], List[Hashable]] = {}
+        self.records: Dict[Hashable, tuple] = {}  # key -> (tokens, domain, lat, lng, area)
+        self.ids: Dict[str, Hashable] = {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _candidates(self, tokens: FrozenSet[str], lat, lng, area: str) -> Iterable[Hashable]:
+        block = _blocking_tokens(tokens)
+        if lat is None:
+            # No coordinates yet: block on (area, name token) instead of the grid
+            seen = set()
+            for token in block:
+                for key in self.areas.get((area, token), ()):
+                    if key not in seen:
+                        seen.add(key)
+                        yield key
+            return
+        for key in self.grid.near(lat, lng, self.max_miles):
+            # Without a shared distinctive word the weighted score cannot clear the threshold
+            if not block.isdisjoint(self.records[key][0]):
+                yield key
+
+    def match(self, name: str, domain: str = '', lat=None, lng=None, area: str = '',
+              record_id: str = '') -> Optional[Hashable]:
+        """Key of an indexed record this one duplicates, without adding it"""
+        if record_id and str(record_id) in self.ids:
+            return self.ids[str(record_id)]
+        tokens = name_tokens(name)
+        if not tokens:
+            return None
+        domain = domain_key(domain) or None  # Two missing domains are not a shared one
+        lat, lng = _point(lat, lng)
+        best_key, best_score = None, 0.0
+        for key in self._candidates(tokens, lat, lng, area):
+            other_tokens, other_domain, other_lat, other_lng, other_area = self.records[key]
+            if area and other_area and area != other_area:
+                continue
+            if domain and other_domain and not same_site(domain, other_domain):
+                continue
+            if lat is not None and other_lat is not None and \
+                    point_miles(lat, lng, other_lat, other_lng) > self.max_miles:
+                continue
+            score = name_similarity(tokens, other_tokens)
+            # A subdomain is often one school of the network the parent domain belongs to
+            threshold = self.domain_name_threshold if domain == other_domain else self.name_threshold
+            if score >= threshold and score > best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def add(self, key: Hashable, name: str, domain: str = '', lat=None, lng=None, area: str = '',
+            record_id: str = '') -> Optional[Hashable]:
+        """Index a record under `key` unless it duplicates one already indexed
+        (whose key is returned instead)"""
+        lat, lng = _point(lat, lng)
+        duplicate = self.match(name, domain, lat, lng, area, record_id)
+        if duplicate is not None:
+            return duplicate
+        self.records[key] = (name_tokens(name), domain_key(domain), lat, lng, area)
+        if record_id:
+            self.ids[str(record_id)] = key
+        if lat is not None:
+            self.grid.add(key, lat, lng)
+        else:
+            for token in _blocking_tokens(self.records[key][0]):
+                self.areas.setdefault((area, token), []).append(key)
+        return None
+
+
+def state_area(state: str) -> str:
+    """Blocking area for a state name or abbreviation"""
+    state = str(state or '')
+    return state_abbreviation(state) or state.strip().lower()
+
+
+def dedup_records(records: Iterable[Dict], index: Optional[DuplicateIndex] = None,
+                  duplicates: Optional[List] = None) -> List[Dict]:
+    """First record of each near-duplicate group, in order.
+
+    Records are map-style dicts (name, domain, lat, lng, state, recordId).
+    Dropped records are appended to `duplicates` (if given) as
+    (record, kept_record) pairs.
+    """
+    index = index if index is not None else DuplicateIndex()
+    kept = []
+    for record in records:
+        duplicate = index.add(len(kept), record.get('name', ''), record.get('domain', ''),
+                              record.get('lat'), record.get('lng'), state_area(record.get('state')),
+                              record.get('recordId', ''))
+        if duplicate is None:
+            kept.append(record)
+        elif duplicates is not None:
+            duplicates.append((record, kept[duplicate]))
+    return kept
+
+
+def duplicated(names: Iterable[str], domains: Iterable[str], states: Iterable[str]) -> List[bool]:
+    """Like pandas' Series.duplicated() for rows without coordinates: True
+    for each row that near-duplicates an earlier one in the same state"""
+    index = DuplicateIndex()
+    return [index.add(position, name, domain, area=state_area(state)) is not None
+            for position, (name, domain, state) in enumerate(zip(names, domains, states))]
@@ -0,0 +1,333 @@
+"""
+Streaming merge of geocoded Apptegy batches into the map dataset.
+
+apptegy-geocoded-batch.json (written by geocode_apptegy_schools.py) holds
+raw geocoding results; apptegy-geocoded-current.json is the array the map
+loads. merge_batch() copies the current records to a new file while it
+builds a sorted Record ID index (8 bytes per ID, see processed.py), then
+streams the batch's successful geocodes through convert_batch_record() and
+appends the ones whose ID is not indexed yet. A school already on the map
+under another name or ID is caught by a DuplicateIndex (matching.py) built
+over the batch, which each current record is looked up in as it streams
+past; the batch is one run's worth of geocodes, so that index stays small.
+Batch results without a Record ID are keyed by the hubspot.row_id()
+stand-in instead (batch_record_id()), so re-merging never appends them
+again. Neither file is ever loaded whole: the merge holds 8 bytes per
+current record (the ID index) plus under 1 KB per batch record (its
+near-duplicate index), but no records. The output is byte-for-byte what
+json.dump(records, f, indent=2) would write.
+
+The result replaces the dataset atomically, and the replaced version is
+kept as a (hard-linked) snapshot. The compact columnar copy the map loads
+(compact.py) is rewritten from the result (its columns are built in
+memory, about the size of the compact file), and the added records,
+spooled to disk as they are written, become the dataset's next delta
+(deltas.py) for clients that already hold it.
+"""
+
+import json
+import os
+from array import array
+from collections import Counter
+from typing import Dict, Iterator, Optional, Set, TextIO, Tuple
+
+from .compact import compact_path, write_compact
+from .datasets import SnapshotStore, atomic_write, file_sha256
+from .deltas import DeltaLog, SpooledRecords
+from .hubspot import row_id
+from .matching import DuplicateIndex, state_area
+from .processed import ProcessedIds, record_key
+
+CURRENT_FILE = 'apptegy-geocoded-current.json'
+BATCH_FILE = 'apptegy-geocoded-batch.json'
+
+READ_SIZE = 1 << 16
+INDEX_MERGE_SIZE = 100_000  # Fold newly added IDs into the sorted index every N records
+
+_WHITESPACE = ' \t\n\r'
+
+
+def batch_record_id(batch_record: Dict) -> str:
+    """A batch result's Record ID or, for rows without one, the row_id()
+    stand-in it was processed under (rebuilt for results saved before
+    row_key was)"""
+    return (batch_record.get('record_id') or batch_record.get('row_key') or
+            row_id({'Company name': batch_record.get('company_name'),
+                    'Company Domain Name': batch_record.get('domain'),
+                    'Agile Location Zip': batch_record.get('existing_zip'),
+                    'City': batch_record.get('existing_city')}))
+
+
+def convert_batch_record(batch_record: Dict) -> Dict:
+    """Convert a batch geocoding result to the map's competitor record format"""
+    location = batch_record.get('location', {})
+    address = location.get('address', {})
+
+    # Extract state from address
+    state = address.get('state', '')
+
+    # Extract city - prefer neighbourhood, then town, then city from address
+    city = (address.get('neighbourhood') or
+            address.get('town') or
+            address.get('city') or
+            batch_record.get('existing_city', ''))
+
+    record = {
+        "recordId": batch_record_id(batch_record),
+        "name": batch_record['company_name'],
+        "competitor": "Apptegy",
+        "domain": batch_record.get('domain', ''),
+        "city": city,
+        "state": state,
+        "owner": "Unknown",  # Not in batch data
+        "createDate": batch_record.get('processed_at', ''),
+        "lat": location.get('latitude'),
+        "lng": location.get('longitude'),
+        "type": "competitor",
+        "products": ["CMS"],  # Default for Apptegy
+        "customerType": "District",  # Default
+        "arr": 0,  # Not in batch data
+        "employees": 0,  # Not in batch data
+        "lastContact": batch_record.get('processed_at', ''),
+        "salesStage": "Competitor",
+        "priority": "Medium"
+    }
+    if location.get('precision'):
+        # Placed at a ZIP or town centroid by the offline fallback, not at the school
+        record["precision"] = location['precision']
+    return record
+
+
+class JsonStream:
+    """Incremental reader for one JSON document, a value at a time"""
+
+    def __init__(self, f: TextIO):
+        self.f = f
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        chunk = self.f.read(READ_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at end of file)"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or not self._fill():
+                return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos}, found {self.peek()!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A number at the end of the buffer may continue in the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def items(self) -> Iterator:
+        """Yield the elements of the array starting here"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            separator = self.peek()
+            self.pos += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise ValueError(f"Expected ',' or ']' in array, found {separator!r}")
+
+    def find_key(self, key: str) -> bool:
+        """Advance to the value of `key` in the object starting here (skipping
+        arrays before it element by element); False if it is missing"""
+        self.expect('{')
+        while self.peek() not in ('}', ''):
+            name = self.value()
+            self.expect(':')
+            if name == key:
+                return True
+            if self.peek() == '[':
+                for _ in self.items():
+                    pass
+            else:
+                self.value()
+            if self.peek() == ',':
+                self.pos += 1
+        return False
+
+
+def iter_json_array(path: str, key: Optional[str] = None) -> Iterator:
+    """Stream the elements of a JSON array file, or of the array under `key`
+    in a top-level object"""
+    with open(path, 'r', encoding='utf-8') as f:
+        stream = JsonStream(f)
+        if key is None or stream.find_key(key):
+            yield from stream.items()
+
+
+def read_json_key(path: str, key: str, default=None):
+    """Read one (small) top-level value of a JSON object file without loading the rest"""
+    with open(path, 'r', encoding='utf-8') as f:
+        stream = JsonStream(f)
+        return stream.value() if stream.find_key(key) else default
+
+
+class JsonArrayWriter:
+    """Write a JSON array an element at a time, formatted like json.dump(items, f, indent=2)"""
+
+    def __init__(self, f: TextIO):
+        self.f = f
+        self.count = 0
+
+    def write(self, item):
+        self.f.write(',\n  ' if self.count else '[\n  ')
+        self.f.write(json.dumps(item, indent=2).replace('\n', '\n  '))
+        self.count += 1
+
+    def close(self):
+        self.f.write('\n]' if self.count else '[]')
+
+
+def _index_batch(batch_file: str) -> Tuple[DuplicateIndex, Set[int]]:
+    """Near-duplicate index of the batch's records, keyed by position, plus
+    the positions that repeat an earlier batch record"""
+    index = DuplicateIndex()
+    repeats = set()
+    for position, batch_record in enumerate(iter_json_array(batch_file, 'successful_geocodes')):
+        record = convert_batch_record(batch_record)
+        if index.add(position, record['name'], record['domain'], record['lat'], record['lng'],
+                     state_area(record['state'])) is not None:
+            repeats.add(position)
+    return index, repeats
+
+
+def _merge_records(current_file: str, batch_file: str, writer: Optional[JsonArrayWriter], stats: Dict,
+                   near_duplicates: bool = True, added: Optional[SpooledRecords] = None):
+    """Stream the current records, then the new batch records, to `writer`
+    (if any); the new ones are also appended to `added` (if given)"""
+    batch_index, near = _index_batch(batch_file) if near_duplicates else (None, set())
+
+    # Copy the current records through, collecting their IDs for the index
+    # and the batch records they near-duplicate
+    keys = array('q')
+    for record in iter_json_array(current_file):
+        if writer:
+            writer.write(record)
+        key = record_key(record.get('recordId'))
+        if key is not None:
+            keys.append(key)
+        if batch_index is not None:
+            match = batch_index.match(record.get('name', ''), record.get('domain', ''), record.get('lat'),
+                                      record.get('lng'), state_area(record.get('state')))
+            if match is not None:
+                near.add(match)
+        if record.get('state'):
+            stats['states'][record['state']] += 1
+        stats['current'] += 1
+    index = ProcessedIds(keys)
+    del keys, batch_index
+
+    # Join the batch against the index, appending new records as they stream past
+    for position, batch_record in enumerate(iter_json_array(batch_file, 'successful_geocodes')):
+        stats['batch'] += 1
+        record_id = batch_record_id(batch_record)
+        if record_id in index:
+            stats['duplicates'] += 1
+            continue
+        if position in near:
+            stats['near_duplicates'] += 1
+            continue
+        index.add(record_id)
+        if len(index.added) >= INDEX_MERGE_SIZE:
+            index.merge()
+        record = convert_batch_record(batch_record)
+        if writer:
+            writer.write(record)
+        if added is not None:
+            added.append(record)
+        if 'precision' in record:
+            stats['approximate'] += 1
+        if record['state']:
+            stats['states'][record['state']] += 1
+            stats['added_states'][record['state']] += 1
+        stats['added'] += 1
+    if writer:
+        writer.close()
+
+
+def merge_batch(current_file: str = CURRENT_FILE, batch_file: str = BATCH_FILE,
+                output_file: Optional[str] = None, dry_run: bool = False,
+                snapshot: bool = True, near_duplicates: bool = True, deltas: bool = True) -> Dict:
+    """Append the batch's successful geocodes that are not in current_file yet
+    (by Record ID and, with near_duplicates, by place and name).
+
+    The merged array replaces output_file (default: current_file) atomically;
+    the version it replaces is kept in the dataset's SnapshotStore. With
+    dry_run nothing is written. 'approximate' counts the added records
+    placed at a ZIP/place centroid (they carry a 'precision' field). With
+    deltas, the added records become the next version in the dataset's
+    DeltaLog. Returns counts, state tallies, the snapshot's hash, the path
+    of the compact copy and the new version.
+    """
+    output_file = output_file or current_file
+    stats = {
+        'current': 0,
+        'batch': 0,
+        'added': 0,
+        'duplicates': 0,
+        'near_duplicates': 0,
+        'approximate': 0,
+        'states': Counter(),
+        'added_states': Counter(),
+        'snapshot': None,
+        'compact': None,
+        'version': None,
+    }
+    if dry_run:
+        _merge_records(current_file, batch_file, None, stats, near_duplicates)
+    else:
+        log = DeltaLog(output_file) if deltas else None
+        # The delta only continues the chain if it applies to the version clients have
+        previous = file_sha256(current_file) if log and log.manifest() else None
+        # Without a manifest yet, this merge starts the chain and has no delta to save
+        added = log.spool() if previous else None
+        try:
+            with atomic_write(output_file) as out:
+                _merge_records(current_file, batch_file, JsonArrayWriter(out), stats, near_duplicates, added)
+                if snapshot:
+                    # A hard link to the file about to be replaced, so nothing is copied
+                    entry = SnapshotStore.for_file(output_file).snapshot(
+                        output_file, label=f"before merging {os.path.basename(batch_file)}")
+                    stats['snapshot'] = entry and entry['sha256']
+            stats['compact'] = compact_path(output_file)
+            write_compact(iter_json_array(output_file), stats['compact'])
+            if log:
+                stats['version'] = log.record(added or [], [], [], previous)['version']
+        finally:
+            if added is not None:
+                added.discard()
+    stats['total'] = stats['current'] + stats['added']
+    return stats
@@ -0,0 +1,126 @@
+"""
+Negative cache for geocoding misses.
+
+Records why a query failed and when it is worth trying again, so permanent
+misses are skipped instantly on the next run and only transient failures
+spend rate budget again. Stored next to the positive cache in SQLite.
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+
+from .cache import DEFAULT_CACHE_DB
+
+NO_RESULTS = 'no_results'
+RATE_LIMITED = 'rate_limited'
+TIMEOUT = 'timeout'
+INSUFFICIENT_DATA = 'insufficient_data'
+ERROR = 'error'
+
+DAY = 24 * 60 * 60
+
+# Seconds before a query that failed for each reason is tried again
+RETRY_AFTER = {
+    NO_RESULTS: 30 * DAY,
+    INSUFFICIENT_DATA: 90 * DAY,
+    RATE_LIMITED: 15 * 60,
+    TIMEOUT: 60 * 60,
+    ERROR: 6 * 60 * 60,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS misses (
+    query TEXT PRIMARY KEY,
+    reason TEXT NOT NULL,
+    failed_at REAL NOT NULL,
+    retry_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 1
+)
+"""
+
+
+def negative_key(query: str) -> str:
+    return ' '.join(query.lower().split())
+
+
+def classify_failure(error: Exception) -> str:
+    """Map a backend exception to a failure reason"""
+    if isinstance(error, requests.exceptions.Timeout):
+        return TIMEOUT
+    response = getattr(error, 'response', None)
+    if response is not None and response.status_code == 429:
+        return RATE_LIMITED
+    if isinstance(error, requests.exceptions.RetryError) and '429' in str(error):
+        return RATE_LIMITED
+    return ERROR
+
+
+def retry_after_header(error: Exception) -> Optional[float]:
+    """Seconds from a Retry-After header on a failed response, if any"""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+class NegativeCache:
+    """Persisted {query: failure reason, retry time} store"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_DB, retry_after: Optional[Dict[str, float]] = None):
+        self.retry_after = dict(RETRY_AFTER)
+        if retry_after:
+            self.retry_after.update(retry_after)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        with self.conn:
+            self.conn.execute(SCHEMA)
+
+    def should_skip(self, query: str) -> Optional[str]:
+        """Return the failure reason if the query failed recently enough to skip"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT reason, retry_at FROM misses WHERE query = ?', (negative_key(query),)
+            ).fetchone()
+        if row and row[1] > time.time():
+            return row[0]
+        return None
+
+    def record(self, query: str, reason: str, retry_after: Optional[float] = None):
+        """Remember a failure; retry_after (seconds) overrides the reason's TTL"""
+        now = time.time()
+        ttl = retry_after if retry_after is not None else self.retry_after.get(reason, self.retry_after[ERROR])
+        with self.lock, self.conn:
+            self.conn.execute(
+                'INSERT INTO misses (query, reason, failed_at, retry_at) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(query) DO UPDATE SET reason = excluded.reason, failed_at = excluded.failed_at, '
+                'retry_at = excluded.retry_at, attempts = misses.attempts + 1',
+                (negative_key(query), reason, now, now + ttl)
+            )
+
+    def record_error(self, query: str, error: Exception) -> str:
+        """Classify and remember a backend exception; returns the reason"""
+        reason = classify_failure(error)
+        self.record(query, reason, retry_after_header(error) if reason == RATE_LIMITED else None)
+        return reason
+
+    def clear(self, query: str):
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM misses WHERE query = ?', (negative_key(query),))
+
+    def stats(self) -> Dict[str, int]:
+        """Count of recorded misses per reason"""
+        with self.lock:
+            rows = self.conn.execute('SELECT reason, COUNT(*) FROM misses GROUP BY reason').fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,134 @@
+"""
+Query-variant planner.
+
+Builds fallback queries from structured parts (name, city, state) instead
+of string-replacing a finished query, drops variants that would send the
+same text twice, and learns which query shapes actually resolve so the
+likeliest one is tried first and shapes that never work are pruned.
+Pattern statistics persist in the geocode cache database.
+"""
+
+import re
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .cache import DEFAULT_CACHE_DB
+from .dedup import normalize_query
+
+# Query shapes in their default order; each names the parts joined with ", "
+PATTERNS = {
+    'name_city_state_school': ('name', 'city', 'state', 'school'),
+    'name_city_state': ('name', 'city', 'state'),
+    'plain_name_city_state': ('plain_name', 'city', 'state'),
+    'name_state': ('name', 'state'),
+}
+DEFAULT_PATTERN = 'name_city_state_school'
+
+MAX_VARIANTS = 3  # Never more requests per school than the old fixed variant list
+MIN_TRIALS = 50  # Attempts before a pattern can be pruned
+MIN_SUCCESS_RATE = 0.02
+
+SCHOOL_WORD_RE = re.compile(r'\s+school\b', re.IGNORECASE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS query_patterns (
+    pattern TEXT PRIMARY KEY,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    successes INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+
+def format_query(parts: Dict[str, str], pattern: str = DEFAULT_PATTERN) -> str:
+    """Join the parts named by a pattern, skipping empty ones"""
+    values = dict(parts)
+    values['school'] = 'school'
+    values['plain_name'] = SCHOOL_WORD_RE.sub('', parts.get('name', '')).strip()
+    return ", ".join(values[key] for key in PATTERNS[pattern] if values.get(key))
+
+
+class QueryPlanner:
+    """Order, dedup and prune query variants by observed success rate"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_CACHE_DB, max_variants: int = MAX_VARIANTS):
+        self.max_variants = max_variants
+        self.lock = threading.Lock()
+        self.stats: Dict[str, List[int]] = {pattern: [0, 0] for pattern in PATTERNS}
+        self.conn = None
+        if path:
+            self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            with self.conn:
+                self.conn.execute(SCHEMA)
+            for pattern, attempts, successes in self.conn.execute(
+                    'SELECT pattern, attempts, successes FROM query_patterns'):
+                if pattern in self.stats:
+                    self.stats[pattern] = [attempts, successes]
+
+    def success_rate(self, pattern: str) -> float:
+        """Smoothed success rate, so untried patterns start near 50%"""
+        attempts, successes = self.stats[pattern]
+        return (successes + 1) / (attempts + 2)
+
+    def _pruned(self, pattern: str) -> bool:
+        attempts, successes = self.stats[pattern]
+        return attempts >= MIN_TRIALS and successes / attempts < MIN_SUCCESS_RATE
+
+    def ranked_patterns(self) -> List[str]:
+        """Patterns best-first; ties keep the default order"""
+        with self.lock:
+            order = list(PATTERNS)
+            ranked = sorted(order, key=lambda p: (-self.success_rate(p), order.index(p)))
+            kept = [p for p in ranked if not self._pruned(p)]
+        return kept or ranked[:1]
+
+    def plan(self, parts: Dict[str, str]) -> List[Tuple[str, str]]:
+        """Return up to max_variants distinct (pattern, query) pairs to try in order"""
+        variants = []
+        seen = set()
+        for pattern in self.ranked_patterns():
+            query = format_query(parts, pattern)
+            key = normalize_query(query)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            variants.append((pattern, query))
+            if len(variants) >= self.max_variants:
+                break
+        return variants
+
+    def record(self, pattern: str, success: bool):
+        """Count one attempt of a pattern.
+
+        The database is updated by increment, not overwritten with this
+        process's totals, so concurrent writers (shard workers, the daemon)
+        don't lose each other's counts; the totals read back include theirs.
+        """
+        with self.lock:
+            stats = self.stats[pattern]
+            stats[0] += 1
+            stats[1] += int(success)
+            if self.conn is not None:
+                with self.conn:
+                    self.conn.execute(
+                        'INSERT INTO query_patterns (pattern, attempts, successes) VALUES (?, 1, ?) '
+                        'ON CONFLICT(pattern) DO UPDATE SET attempts = attempts + excluded.attempts, '
+                        'successes = successes + excluded.successes',
+                        (pattern, int(success))
+                    )
+                    self.stats[pattern] = list(self.conn.execute(
+                        'SELECT attempts, successes FROM query_patterns WHERE pattern = ?', (pattern,)
+                    ).fetchone())
+
+    def report(self) -> Dict[str, Dict]:
+        """Attempts, successes and success rate per pattern"""
+        with self.lock:
+            return {
+                pattern: {
+                    'attempts': attempts,
+                    'successes': successes,
+                    'success_rate': successes / attempts if attempts else None,
+                }
+                for pattern, (attempts, successes) in self.stats.items()
+            }
@@ -0,0 +1,189 @@
+"""
+Rate limiting shared by every geocoding worker.
+
+A single TokenBucket gates all requests made through a RateLimitedBackend,
+so several requests can be in flight while the aggregate request rate never
+exceeds the provider's limit.
+
+AdaptiveRateLimiter is a TokenBucket whose rate follows the provider's
+feedback: it climbs towards max_rate while requests succeed, halves once
+per burst of 429s and holds every worker off for the Retry-After period.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+
+from .backends import GeocoderBackend
+from .negative import retry_after_header
+
+THROTTLE_STATUSES = (429,)
+MAX_THROTTLE_RETRIES = 3
+INCREASE_FRACTION = 0.01  # Default additive step per success, as a fraction of max_rate
+THROTTLE_WINDOW = 1.0  # Seconds after a decrease during which further 429s don't cut the rate
+PROBE_FROM = 0.9  # Above this fraction of the last throttled rate, climb PROBE_STEP times as fast
+PROBE_STEP = 0.1
+
+
+class TokenBucket:
+    """Thread-safe token bucket.
+
+    Tokens refill continuously at `rate` per second up to `capacity`. With the
+    default capacity of 1 requests are spaced exactly 1/rate seconds apart.
+    Bumping `generation` cancels the reservations of callers still waiting
+    in acquire(): they queue again at the current rate.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Take tokens now and return how long the caller must wait to use them"""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= tokens
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until the requested tokens are available"""
+        while True:
+            generation = self.generation
+            wait = self.reserve(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+            if self.generation == generation:
+                return
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    """Token bucket that adapts its rate to throttling responses (AIMD).
+
+    Each success adds `increase` requests/second (default INCREASE_FRACTION
+    of max_rate, so recovery takes as many successes at any scale) up to
+    max_rate, and PROBE_STEP of that once the rate is back within
+    PROBE_FROM of the rate the last throttle happened at: it recovers
+    quickly but nears the provider's limit slowly.
+
+    A throttle multiplies the rate by `decrease` down to min_rate and
+    cancels the waiting reservations, which were spaced for the old rate.
+    When the provider sent Retry-After, no worker sends anything before
+    that time has passed. Throttles within throttle_window of a decrease
+    (the rest of the burst, or requests already in flight) are counted but
+    do not cut the rate again.
+    """
+
+    def __init__(self, rate: float, max_rate: Optional[float] = None, min_rate: float = 0.05,
+                 increase: Optional[float] = None, decrease: float = 0.5, capacity: float = 1.0,
+                 throttle_window: float = THROTTLE_WINDOW):
+        super().__init__(rate, capacity)
+        self.max_rate = float(max_rate) if max_rate else self.rate
+        self.min_rate = min(float(min_rate), self.rate)
+        self.increase = increase if increase is not None else self.max_rate * INCREASE_FRACTION
+        self.throttle_window = throttle_window
+        self.decrease = decrease
+        self.successes = 0
+        self.throttled = 0
+        self.cooldown_until = 0.0
+        self.throttled_rate = None  # Rate when the rate was last cut: the provider's limit, roughly
+
+    def _set_rate(self, rate: float):
+        # Settle tokens earned at the old rate before switching
+        self._refill(time.monotonic())
+        self.rate = max(self.min_rate, min(self.max_rate, rate))
+
+    def on_success(self):
+        with self.lock:
+            self.successes += 1
+            if self.rate < self.max_rate:
+                step = self.increase
+                if self.throttled_rate and self.rate >= self.throttled_rate * PROBE_FROM:
+                    step *= PROBE_STEP
+                self._set_rate(self.rate + step)
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        with self.lock:
+            self.throttled += 1
+            now = time.monotonic()
+            if now >= self.cooldown_until:
+                self.throttled_rate = self.rate
+                self._set_rate(self.rate * self.decrease)
+                self.cooldown_until = now + max(retry_after or 0.0, self.throttle_window, 1.0 / self.rate)
+                # Waiting workers were scheduled at the old rate: start the queue over
+                self.tokens = 0.0
+                self.generation += 1
+            if retry_after:
+                # Also during the cooldown: waiters scheduled before it must re-queue behind it
+                self.tokens = min(self.tokens, -retry_after * self.rate)
+                self.generation += 1
+
+    @property
+    def current_rate(self) -> float:
+        return self.rate
+
+    def metrics(self) -> Dict[str, float]:
+        """Current rate and feedback counters, for status logging"""
+        with self.lock:
+            return {
+                'rate': round(self.rate, 3),
+                'max_rate': self.max_rate,
+                'successes': self.successes,
+                'throttled': self.throttled,
+            }
+
+
+def is_throttled(error: Exception) -> bool:
+    response = getattr(error, 'response', None)
+    return response is not None and response.status_code in THROTTLE_STATUSES
+
+
+class RateLimitedBackend(GeocoderBackend):
+    """Wrap a backend so every search first takes a token from a shared bucket.
+
+    With an AdaptiveRateLimiter, outcomes are fed back to the limiter and a
+    throttled search is retried (after the limiter's pause) up to
+    max_throttle_retries times before the error is raised.
+    """
+
+    def __init__(self, backend: GeocoderBackend, bucket: TokenBucket,
+                 max_throttle_retries: int = MAX_THROTTLE_RETRIES):
+        self.backend = backend
+        self.bucket = bucket
+        self.name = backend.name
+        self.adaptive = isinstance(bucket, AdaptiveRateLimiter)
+        self.max_throttle_retries = max_throttle_retries if self.adaptive else 0
+
+    def search(self, query: str, **params) -> Optional[Dict]:
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            try:
+                result = self.backend.search(query, **params)
+            except requests.exceptions.HTTPError as e:
+                if not (self.adaptive and is_throttled(e)):
+                    raise
+                self.bucket.on_throttle(retry_after_header(e))
+                attempt += 1
+                if attempt > self.max_throttle_retries:
+                    raise
+                continue
+            if self.adaptive:
+                self.bucket.on_success()
+            return result
@@ -0,0 +1,75 @@
+"""
+School-type classification shared by the customer pipelines.
+
+Labels a customer private, charter, district, cmo or esc from its name
+(plus the CRM's institution type and building charter fields when known),
+with the same rules the scripts used to apply via repeated
+``any(word in name_lower ...)`` scans. All keywords are found in one pass of
+a single compiled pattern; the label only depends on which keywords occur,
+so it is computed once per distinct keyword set.
+"""
+
+import re
+from functools import lru_cache
+from typing import FrozenSet, Optional
+
+import numpy as np
+import pandas as pd
+
+PRIVATE_WORDS = frozenset(['catholic', 'christian', 'episcopal', 'methodist', 'baptist', 'lutheran',
+                           'parish', 'academy', 'prep'])  # 'prep' also covers 'preparatory'
+CHARTER_WORDS = frozenset(['charter', 'academy'])
+DISTRICT_WORDS = frozenset(['district', 'unified', 'public'])  # 'district' also covers 'school district'
+ESC_WORDS = frozenset(['esc', 'educational service'])
+KEYWORDS = PRIVATE_WORDS | CHARTER_WORDS | DISTRICT_WORDS | ESC_WORDS | {'cmo', 'school'}
+
+# A lookahead finds every keyword occurrence, even overlapping ones ("crescent" -> "esc")
+KEYWORD_RE = re.compile('(?=(' + '|'.join(sorted(KEYWORDS, key=len, reverse=True)) + '))')
+
+
+@lru_cache(maxsize=None)
+def label_for_keywords(found: FrozenSet[str]) -> str:
+    """School type for the set of keywords present in a lower-cased name"""
+    if found & PRIVATE_WORDS and 'district' not in found:
+        return 'private'
+    if found & CHARTER_WORDS and 'district' not in found:
+        return 'charter'
+    if found & DISTRICT_WORDS:
+        return 'district'
+    # 'charter management' always contains 'charter', so it is decided above
+    if 'cmo' in found:
+        return 'cmo'
+    if found & ESC_WORDS:
+        return 'esc'
+    # Default individual schools to charter, organizations to district
+    return 'charter' if 'school' in found else 'district'
+
+
+def name_keywords(name: str) -> FrozenSet[str]:
+    return frozenset(KEYWORD_RE.findall(name.lower()))
+
+
+def classify_school(name: str, institution_type=None, building_charter=None) -> str:
+    """School type for one customer"""
+    if institution_type and 'charter' in str(institution_type).lower():
+        return 'charter'
+    if building_charter and pd.notna(building_charter) and 'charter' in str(building_charter).lower():
+        return 'charter'
+    return label_for_keywords(name_keywords(name))
+
+
+def _mentions_charter(column: Optional[pd.Series], index: pd.Index) -> pd.Series:
+    if column is None:
+        return pd.Series(False, index=index)
+    return column.fillna('').astype(str).str.lower().str.contains('charter', regex=False)
+
+
+def classify_schools(names: pd.Series, institution_types: Optional[pd.Series] = None,
+                     building_charters: Optional[pd.Series] = None) -> pd.Series:
+    """classify_school() over whole columns"""
+    names = names.fillna('').astype(str)
+    codes, unique = pd.factorize(names)
+    unique_labels = np.array([label_for_keywords(name_keywords(name)) for name in unique], dtype=object)
+    labels = pd.Series(unique_labels[codes], index=names.index)
+    charter = _mentions_charter(institution_types, names.index) | _mentions_charter(building_charters, names.index)
+    return labels.where(~charter, 'charter')
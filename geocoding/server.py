@@ -0,0 +1,209 @@
+"""
+Local Nominatim-compatible stand-in server.
+
+Speaks the /search JSON format used by every geocoder in this repo so the
+pipelines can run and be benchmarked offline. Answers come from a fixture
+in the geocoded_data.json format (matched by canonical address), then the
+offline gazetteer, and optionally a deterministic synthetic point.
+
+    python3 -m geocoding.server --port 8088 --latency 0.2 --error-rate 0.01 --max-rps 1
+    NOMINATIM_URL=http://127.0.0.1:8088 python3 geocode_apptegy_schools.py
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from .address import canonical_address
+from .gazetteer import load_default_gazetteer
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+class StandInGeocoder:
+    """Resolves queries and decides which faults to inject"""
+
+    def __init__(self, fixture: Optional[Dict[str, Dict]] = None, use_gazetteer: bool = True,
+                 synthesize: bool = False, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 max_rps: Optional[float] = None, retry_after: int = 1, seed: Optional[int] = None):
+        self.fixture = {canonical_address(k): v for k, v in (fixture or {}).items()}
+        self.gazetteer = load_default_gazetteer() if use_gazetteer else None
+        self.synthesize = synthesize
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.bucket = TokenBucket(max_rps) if max_rps else None
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'hits': 0, 'misses': 0, 'errors': 0, 'throttled': 0}
+
+    def _count(self, key: str):
+        with self.lock:
+            self.stats[key] += 1
+
+    def _roll(self) -> float:
+        with self.lock:
+            return self.random.random()
+
+    def fault(self) -> Optional[int]:
+        """HTTP status to fail this request with, or None"""
+        if self.bucket is not None and self.bucket.reserve() > 0:
+            self.bucket.reserve(-1)  # Give back the token we could not use
+            return 429
+        if self.throttle_rate and self._roll() < self.throttle_rate:
+            return 429
+        if self.error_rate and self._roll() < self.error_rate:
+            return 503
+        return None
+
+    def delay(self):
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter)))
+
+    def resolve(self, query: str) -> List[Dict]:
+        """Nominatim-style result list for a query"""
+        hit = self.fixture.get(canonical_address(query))
+        if hit:
+            return [self._place(query, hit['lat'], hit['lng'], hit.get('display_name', query), hit.get('address', {}))]
+
+        if self.gazetteer:
+            result = self.gazetteer.search(query)
+            if result:
+                return [self._place(query, result['lat'], result['lng'], result['display_name'], result['address'])]
+
+        if self.synthesize:
+            digest = hashlib.sha1(query.lower().encode('utf-8')).digest()
+            lat = 25.0 + digest[0] / 255 * 24.0  # Contiguous US bounding box
+            lng = -124.0 + digest[1] / 255 * 57.0
+            return [self._place(query, lat, lng, query, {})]
+        return []
+
+    def _place(self, query: str, lat: float, lng: float, display_name: str, address: Dict) -> Dict:
+        place_id = int(hashlib.sha1(query.encode('utf-8')).hexdigest()[:8], 16)
+        return {
+            'place_id': place_id,
+            'lat': str(lat),
+            'lon': str(lng),
+            'display_name': display_name,
+            'importance': 0.5,
+            'address': address,
+        }
+
+
+def make_handler(geocoder: StandInGeocoder):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive, like the real service
+
+        def _send(self, status: int, body: bytes, headers: Optional[Dict[str, str]] = None):
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == '/stats':
+                self._send(200, json.dumps(geocoder.stats).encode('utf-8'))
+                return
+            if url.path != '/search':
+                self._send(404, b'{"error": "not found"}')
+                return
+
+            geocoder._count('requests')
+            geocoder.delay()
+
+            status = geocoder.fault()
+            if status == 429:
+                geocoder._count('throttled')
+                self._send(429, b'{"error": "rate limited"}', {'Retry-After': str(geocoder.retry_after)})
+                return
+            if status:
+                geocoder._count('errors')
+                self._send(status, b'{"error": "unavailable"}')
+                return
+
+            params = parse_qs(url.query)
+            query = params.get('q', [''])[0]
+            limit = int(params.get('limit', ['1'])[0])
+            results = geocoder.resolve(query)[:limit]
+            geocoder._count('hits' if results else 'misses')
+            self._send(200, json.dumps(results).encode('utf-8'))
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return Handler
+
+
+def serve(geocoder: StandInGeocoder, host: str = '127.0.0.1', port: int = 8088) -> ThreadingHTTPServer:
+    """Create the server (call serve_forever() on it, or run it in a thread)"""
+    server = ThreadingHTTPServer((host, port), make_handler(geocoder))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Nominatim-compatible stand-in server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8088)
+    parser.add_argument('--fixture', default='geocoded_data.json', help='geocoded_data.json-style answers')
+    parser.add_argument('--no-gazetteer', action='store_true', help='do not answer ZIP/place queries')
+    parser.add_argument('--synthesize', action='store_true', help='answer unmatched queries with a synthetic point')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every request')
+    parser.add_argument('--jitter', type=float, default=0.0, help='+/- seconds of random latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered 503')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction of requests answered 429')
+    parser.add_argument('--max-rps', type=float, help='answer 429 above this request rate')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429s')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    fixture = {}
+    try:
+        with open(args.fixture, 'r') as f:
+            fixture = json.load(f)
+    except FileNotFoundError:
+        logger.warning(f"Fixture {args.fixture} not found, serving without it")
+
+    geocoder = StandInGeocoder(
+        fixture=fixture,
+        use_gazetteer=not args.no_gazetteer,
+        synthesize=args.synthesize,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        max_rps=args.max_rps,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    server = serve(geocoder, args.host, args.port)
+    logger.info(f"Nominatim stand-in listening on http://{args.host}:{args.port} "
+                f"({len(geocoder.fixture)} fixture entries)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.info(f"Served: {geocoder.stats}")
+
+
+if __name__ == "__main__":
+    main()
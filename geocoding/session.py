@@ -0,0 +1,89 @@
+"""
+Pooled HTTP sessions for geocoding backends.
+
+Every backend talks to its provider through a keep-alive requests.Session
+so repeated lookups reuse the same TCP+TLS connection instead of paying
+for a new handshake on each call.
+"""
+
+import threading
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_USER_AGENT = 'EdlioCustomerMap/2.0 (geocoding)'
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 15
+
+# Shared retry policy: transient server errors and dropped connections are
+# retried with exponential backoff, honoring Retry-After when present. 429s
+# are not retried here; they reach the AdaptiveRateLimiter, which slows every
+# worker down instead of just the one request.
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 1.0
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+class ThrottleAwareRetry(Retry):
+    """Retry that leaves 429s to the caller even when Retry-After is present"""
+
+    RETRY_AFTER_STATUS_CODES = frozenset([503])
+
+
+_sessions: Dict[Tuple[str, int], requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def build_retry_policy(total: int = MAX_RETRIES,
+                       backoff_factor: float = BACKOFF_FACTOR,
+                       statuses: Tuple[int, ...] = RETRY_STATUSES) -> Retry:
+    """Build the retry policy shared by all geocoding sessions"""
+    return ThrottleAwareRetry(
+        total=total,
+        connect=total,
+        read=total,
+        status=total,
+        backoff_factor=backoff_factor,
+        status_forcelist=statuses,
+        allowed_methods=frozenset(['GET']),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+def build_session(user_agent: str = DEFAULT_USER_AGENT,
+                  pool_size: int = DEFAULT_POOL_SIZE,
+                  retry: Optional[Retry] = None) -> requests.Session:
+    """Create a new keep-alive session with a connection pool and retries"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry if retry is not None else build_retry_policy(),
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'User-Agent': user_agent})
+    return session
+
+
+def get_session(user_agent: str = DEFAULT_USER_AGENT,
+                pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """Return the process-wide session for a user agent, creating it once"""
+    key = (user_agent, pool_size)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = build_session(user_agent, pool_size)
+            _sessions[key] = session
+        return session
+
+
+def close_sessions():
+    """Close every pooled session (used on shutdown and in benchmarks)"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
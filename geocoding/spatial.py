@@ -0,0 +1,82 @@
+"""
+Great-circle distances with numpy.
+
+Used to rank records by how close they are to the customers already on the
+map; the functions broadcast, so a whole chunk of rows is measured against
+every customer in one call. GridIndex buckets points into cells a fixed
+number of miles across, so "what is near this point" only looks at a few
+cells instead of every point.
+"""
+
+import math
+from collections import defaultdict
+from typing import Dict, Hashable, Iterator, List, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE = EARTH_RADIUS_MILES * math.pi / 180
+
+
+def haversine_miles(lat1, lng1, lat2, lng2):
+    """Distance in miles between points given in degrees (arrays broadcast)"""
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(value, dtype=float)) for value in (lat1, lng1, lat2, lng2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def point_miles(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """haversine_miles for two scalar points, without numpy's per-call overhead"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(min(1.0, a)))
+
+
+def nearest_miles(points: np.ndarray, lats, lngs) -> np.ndarray:
+    """Distance from each (lat, lng) to the closest of `points` (an N x 2 array
+    of lat, lng); inf when there are no points"""
+    lats = np.asarray(lats, dtype=float)
+    lngs = np.asarray(lngs, dtype=float)
+    if len(points) == 0:
+        return np.full(lats.shape, np.inf)
+    distances = haversine_miles(lats[:, None], lngs[:, None], points[None, :, 0], points[None, :, 1])
+    return distances.min(axis=1)
+
+
+class GridIndex:
+    """Points bucketed into cells about `cell_miles` on a side.
+
+    Rows are bands of latitude; each row's longitude step is widened by
+    1/cos(latitude), so a cell is never narrower than cell_miles and a
+    radius query covers about 3 x 3 cells anywhere on the map.
+    """
+
+    def __init__(self, cell_miles: float = 1.0):
+        self.lat_step = cell_miles / MILES_PER_DEGREE
+        self.cells: Dict[Tuple[int, int], List[Hashable]] = defaultdict(list)
+
+    def _lng_step(self, row: int) -> float:
+        # The band's edge nearest a pole, where a degree of longitude is shortest
+        lat = min(90.0, max(abs(row), abs(row + 1)) * self.lat_step)
+        return min(360.0, self.lat_step / max(math.cos(math.radians(lat)), 1e-3))
+
+    def cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        row = math.floor(lat / self.lat_step)
+        return row, math.floor(lng / self._lng_step(row))
+
+    def add(self, key: Hashable, lat: float, lng: float):
+        self.cells[self.cell(lat, lng)].append(key)
+
+    def near(self, lat: float, lng: float, miles: float) -> Iterator[Hashable]:
+        """Keys in the cells overlapping a `miles` radius of the point (a
+        superset of the keys within it; filter with haversine_miles)"""
+        lat_radius = miles / MILES_PER_DEGREE
+        for row in range(math.floor((lat - lat_radius) / self.lat_step),
+                         math.floor((lat + lat_radius) / self.lat_step) + 1):
+            lng_step = self._lng_step(row)
+            edge = min(89.9, max(abs(row), abs(row + 1)) * self.lat_step)
+            lng_radius = lat_radius / max(math.cos(math.radians(edge)), 1e-3)
+            for col in range(math.floor((lng - lng_radius) / lng_step),
+                             math.floor((lng + lng_radius) / lng_step) + 1):
+                yield from self.cells.get((row, col), ())
@@ -0,0 +1,118 @@
+"""
+Columnar snapshots of the Excel client workbooks.
+
+read_workbook() is a drop-in for pd.read_excel(): the first load of a
+workbook parses it with openpyxl and stores the frame next to it in
+.workbook_cache/ (Parquet when pyarrow is installed, pickle otherwise).
+Later loads are served from the snapshot while the workbook is unchanged.
+A matching size and mtime is trusted as is; when they differ the file is
+hashed, so a touched-but-identical workbook keeps its snapshot and only an
+edited one is parsed again. Set WORKBOOK_CACHE=off to always read the Excel
+file.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, Optional
+
+import pandas as pd
+
+from .datasets import file_sha256
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_NAME = '.workbook_cache'
+
+try:
+    import pyarrow  # noqa: F401
+    SNAPSHOT_FORMAT = 'parquet'
+except ImportError:
+    SNAPSHOT_FORMAT = 'pickle'
+
+
+def _snapshot_base(path: str, options: Dict) -> str:
+    """Snapshot path (without extension) for a workbook and read_excel options"""
+    directory = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR_NAME)
+    options_key = hashlib.sha1(json.dumps(options, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(directory, f"{os.path.basename(path)}.{options_key}")
+
+
+def _load_meta(meta_path: str) -> Optional[Dict]:
+    try:
+        with open(meta_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta_path: str, meta: Dict):
+    tmp_path = f"{meta_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, meta_path)
+
+
+def _read_snapshot(data_path: str, snapshot_format: str):
+    if snapshot_format == 'parquet':
+        return pd.read_parquet(data_path)
+    return pd.read_pickle(data_path)
+
+
+def _write_snapshot(frame, data_path: str) -> str:
+    """Store a frame, returning the format used"""
+    tmp_path = f"{data_path}.tmp"
+    snapshot_format = SNAPSHOT_FORMAT if isinstance(frame, pd.DataFrame) else 'pickle'
+    if snapshot_format == 'parquet':
+        try:
+            frame.to_parquet(tmp_path)
+        except (ValueError, TypeError, ImportError) as e:
+            # Mixed-type object columns and similar are not Parquet-friendly
+            logger.debug(f"Parquet snapshot failed ({e}), using pickle")
+            snapshot_format = 'pickle'
+    if snapshot_format == 'pickle':
+        pd.to_pickle(frame, tmp_path)
+    os.replace(tmp_path, data_path)
+    return snapshot_format
+
+
+def read_workbook(path: str, **read_excel_kwargs):
+    """pd.read_excel(path, **kwargs), served from a columnar snapshot when the file is unchanged"""
+    if os.environ.get('WORKBOOK_CACHE', '').lower() == 'off':
+        return pd.read_excel(path, **read_excel_kwargs)
+
+    base = _snapshot_base(path, read_excel_kwargs)
+    meta_path = f"{base}.json"
+    data_path = f"{base}.snapshot"
+    stat = os.stat(path)
+
+    meta = _load_meta(meta_path)
+    if meta and os.path.exists(data_path):
+        unchanged = meta['size'] == stat.st_size and meta['mtime_ns'] == stat.st_mtime_ns
+        if not unchanged and meta['size'] == stat.st_size and meta['sha256'] == file_sha256(path):
+            # Touched (copied, checked out) but identical: keep the snapshot
+            meta['mtime_ns'] = stat.st_mtime_ns
+            _write_meta(meta_path, meta)
+            unchanged = True
+        if unchanged:
+            try:
+                return _read_snapshot(data_path, meta['format'])
+            except Exception as e:
+                logger.warning(f"Unreadable workbook snapshot for {path} ({e}), re-reading the workbook")
+
+    frame = pd.read_excel(path, **read_excel_kwargs)
+    try:
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        snapshot_format = _write_snapshot(frame, data_path)
+        _write_meta(meta_path, {
+            'source': os.path.basename(path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': file_sha256(path),
+            'format': snapshot_format,
+            'options': read_excel_kwargs,
+        })
+    except OSError as e:
+        logger.warning(f"Could not write workbook snapshot for {path}: {e}")
+    return frame
@@ -0,0 +1,144 @@
+"""
+Persisted priority queue of geocoding work.
+
+Producers push keyed items (a customer address, an Apptegy row, a stale
+cache entry) with a priority; lower numbers are served first and ties go to
+the oldest item. Pushing a key that is already queued keeps the better
+priority, so re-planning is idempotent; push_many(..., update=False) leaves
+queued keys alone entirely, and keys() lets a planner skip building their
+payloads. pop() leases an item instead of
+deleting it: complete() removes it, retry() pushes it back with a delay, and
+an item whose worker died becomes available again when its lease runs out.
+Stored in SQLite next to the geocode cache.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, NamedTuple, Optional, Set, Tuple
+
+from .cache import DEFAULT_CACHE_DB
+
+LEASE_SECONDS = 10 * 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS work (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    priority REAL NOT NULL,
+    payload TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    not_before REAL NOT NULL DEFAULT 0,
+    leased_until REAL NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS work_order ON work (priority, enqueued_at);
+"""
+
+UPSERT_WORK = (
+    'INSERT INTO work (key, kind, priority, payload, enqueued_at) VALUES (?, ?, ?, ?, ?) '
+    'ON CONFLICT(key) DO UPDATE SET kind = excluded.kind, payload = excluded.payload, '
+    'priority = MIN(work.priority, excluded.priority)'
+)
+INSERT_NEW_WORK = 'INSERT OR IGNORE INTO work (key, kind, priority, payload, enqueued_at) VALUES (?, ?, ?, ?, ?)'
+
+
+class WorkItem(NamedTuple):
+    key: str
+    kind: str
+    priority: float
+    payload: Dict
+    attempts: int
+
+
+class WorkQueue:
+    """SQLite-backed priority queue with leases"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_DB, lease_seconds: float = LEASE_SECONDS):
+        self.lease_seconds = lease_seconds
+        self.lock = threading.Lock()
+        self.leased = set()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+
+    def push(self, key: str, kind: str, priority: float, payload: Dict):
+        self.push_many([(key, kind, priority, payload)])
+
+    def push_many(self, items: Iterable[Tuple[str, str, float, Dict]], update: bool = True) -> int:
+        """Queue many (key, kind, priority, payload) items in one transaction.
+
+        With update=False, keys already queued (or leased) keep their row as
+        it is. Returns the number of rows inserted or updated.
+        """
+        now = time.time()
+        rows = [(key, kind, priority, json.dumps(payload), now) for key, kind, priority, payload in items]
+        with self.lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(UPSERT_WORK if update else INSERT_NEW_WORK, rows)
+            return self.conn.total_changes - before
+
+    def pop(self) -> Optional[WorkItem]:
+        """Lease the most urgent ready item, or return None when nothing is ready"""
+        now = time.time()
+        with self.lock, self.conn:
+            row = self.conn.execute(
+                'SELECT key, kind, priority, payload, attempts FROM work '
+                'WHERE not_before <= ? AND leased_until <= ? ORDER BY priority, enqueued_at LIMIT 1',
+                (now, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute('UPDATE work SET leased_until = ? WHERE key = ?', (now + self.lease_seconds, row[0]))
+            self.leased.add(row[0])
+        return WorkItem(row[0], row[1], row[2], json.loads(row[3]), row[4])
+
+    def iter_ready(self, should_stop: Optional[Callable[[], bool]] = None) -> Iterator[WorkItem]:
+        """Lease items in priority order until the queue has nothing ready"""
+        while not (should_stop and should_stop()):
+            item = self.pop()
+            if item is None:
+                return
+            yield item
+
+    def complete(self, key: str):
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM work WHERE key = ?', (key,))
+            self.leased.discard(key)
+
+    def retry(self, key: str, delay: float):
+        """Return a leased item to the queue, not to be served for `delay` seconds"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                'UPDATE work SET not_before = ?, leased_until = 0, attempts = attempts + 1 WHERE key = ?',
+                (time.time() + delay, key)
+            )
+            self.leased.discard(key)
+
+    def release_leases(self):
+        """Hand back every item this queue leased but did not finish (e.g. on pause)"""
+        with self.lock, self.conn:
+            self.conn.executemany('UPDATE work SET leased_until = 0 WHERE key = ?',
+                                  [(key,) for key in self.leased])
+            self.leased.clear()
+
+    def keys(self, kind: str) -> Set[str]:
+        """Keys of the queued (and leased) items of one kind"""
+        with self.lock:
+            return {row[0] for row in self.conn.execute('SELECT key FROM work WHERE kind = ?', (kind,))}
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM work').fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        """Queued items per kind"""
+        with self.lock:
+            rows = self.conn.execute('SELECT kind, COUNT(*) FROM work GROUP BY kind').fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -4,6 +4,7 @@ Intelligent Autonomous Geocoding System
 Designed to run unattended and process large datasets efficiently.
 """
 
+import numpy as np
 import pandas as pd
 import json
 import requests
@@ -16,30 +17,43 @@ import signal
 import sys
 from pathlib import Path
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('intelligent_geocoding.log'),
-        logging.StreamHandler()
-    ]
-)
+from geocoding import (AdaptiveRateLimiter, GeocodeCache, GeocodingEngine, NegativeCache, dedup_report,
+                       get_backend, group_by_key)
+from geocoding.datasets import atomic_write
+from geocoding.ingest import MISSING_TEXT, address_keys, flags, join_parts, text, values, with_scheme
+from geocoding.matching import duplicated
+from geocoding.negative import NO_RESULTS
+from geocoding.schooltype import classify_schools
+from geocoding.workbook import read_workbook
+
 logger = logging.getLogger(__name__)
 
 class IntelligentGeocoder:
-    def __init__(self):
+    def __init__(self, handle_signals=True):
+        self.workbook_file = 'UPDATED - MAP INFO - ALL CLIENTS-2025-07-08-16-18-18.xlsx'
         self.cache_file = 'geocoded_data.json'
+        self.cache_db = 'geocode_cache.db'
         self.output_file = 'data.js'
-        self.batch_size = 20  # Process in small batches
-        self.delay_between_requests = 1.5  # Conservative rate limiting
-        self.delay_between_batches = 30  # 30 seconds between batches
-        self.max_retries = 3
+        self.batch_size = 20  # Save progress every 20 results
+        self.requests_per_second = 1.0  # Provider's aggregate rate limit (the limiter backs off below it on 429)
+        self.concurrency = 4  # Requests in flight
         self.should_stop = False
+        self.negative_cache = NegativeCache(self.cache_db)
+        self.rate_limiter = AdaptiveRateLimiter(self.requests_per_second)
+        self.backend = get_backend(
+            user_agent='EdlioCustomerMap/2.0 (intelligent-geocoding)',
+            bucket=self.rate_limiter
+        )
+        
+        # Kept between runs when the geocoder stays resident (see run_geocoding_daemon.py)
+        self.customers = None
+        self.cache = None
+        self.workbook_signature = None
         
-        # Set up graceful shutdown
-        signal.signal(signal.SIGINT, self.signal_handler)
-        signal.signal(signal.SIGTERM, self.signal_handler)
+        # Set up graceful shutdown (a resident worker leaves signals to its daemon)
+        if handle_signals:
+            signal.signal(signal.SIGINT, self.signal_handler)
+            signal.signal(signal.SIGTERM, self.signal_handler)
         
         logger.info("🤖 Intelligent Geocoder initialized")
     
@@ -48,173 +62,95 @@ class IntelligentGeocoder:
         self.should_stop = True
     
     def load_cache(self):
-        """Load existing geocoded cache"""
-        try:
-            with open(self.cache_file, 'r') as f:
-                cache = json.load(f)
-            logger.info(f"📂 Loaded {len(cache)} cached addresses")
-            return cache
-        except FileNotFoundError:
-            logger.info("📂 No existing cache found, starting fresh")
-            return {}
+        """Open the SQLite geocode cache (seeded from geocoded_data.json on first run)"""
+        cache = GeocodeCache(self.cache_db, legacy_file=self.cache_file)
+        logger.info(f"📂 Loaded {len(cache)} cached addresses")
+        return cache
     
     def save_cache(self, cache):
-        """Save geocoded cache"""
-        with open(self.cache_file, 'w') as f:
-            json.dump(cache, f, indent=2)
-    
-    def clean_address(self, row):
-        """Clean and format address for geocoding"""
-        # Handle the new file format where columns are mixed up
-        parts = []
-        
-        # Try to reconstruct proper address from mixed columns
-        street = str(row.get('STATE', '')).strip()  # STATE column has street address
-        city = str(row.get('Street Address', '')).strip()  # Street Address has city
-        state = str(row.get('City Address', '')).strip()  # City Address has state
-        zip_code = str(row.get('Zip Address', '')).strip()  # Zip Address has zip
-        
-        # Add non-empty parts
-        for part in [street, city, state, zip_code]:
-            if part and part != 'nan' and part != 'None':
-                parts.append(part)
-        
-        full_address = ', '.join(parts)
-        
-        # Clean up
-        full_address = re.sub(r'\s+', ' ', full_address)
-        full_address = re.sub(r',\s*,', ',', full_address)
-        full_address = full_address.strip(', ')
-        
-        return full_address
+        """Export the geocode cache to geocoded_data.json for the other scripts"""
+        cache.export_json(self.cache_file)
     
     def geocode_address(self, address):
-        """Geocode an address with retry logic"""
-        for attempt in range(self.max_retries):
-            try:
-                url = "https://nominatim.openstreetmap.org/search"
-                params = {
-                    'q': address,
-                    'format': 'json',
-                    'limit': 1,
-                    'addressdetails': 1
-                }
-                headers = {
-                    'User-Agent': 'EdlioCustomerMap/2.0 (intelligent-geocoding)'
-                }
-                
-                response = requests.get(url, params=params, headers=headers, timeout=15)
-                response.raise_for_status()
-                
-                data = response.json()
-                if data:
-                    result = data[0]
-                    return {
-                        'lat': float(result['lat']),
-                        'lng': float(result['lon'])
-                    }
-                else:
-                    return None
-                    
-            except Exception as e:
-                logger.warning(f"  Attempt {attempt + 1} failed for {address[:50]}... Error: {e}")
-                if attempt < self.max_retries - 1:
-                    time.sleep(2 ** attempt)  # Exponential backoff
-                    
+        """Geocode an address through the shared backend (retries live in the session)"""
+        skipped_reason = self.negative_cache.should_skip(address)
+        if skipped_reason:
+            logger.info(f"  ⏭️ Skipping recently failed address ({skipped_reason}): {address[:50]}...")
+            return None
+        try:
+            result = self.backend.search(address)
+        except Exception as e:
+            reason = self.negative_cache.record_error(address, e)
+            logger.warning(f"  Geocoding failed ({reason}) for {address[:50]}... Error: {e}")
+            return None
+        if result:
+            return {
+                'lat': result['lat'],
+                'lng': result['lng']
+            }
+        self.negative_cache.record(address, NO_RESULTS)
         return None
     
-    def determine_school_type(self, name, institution_type=None, building_charter=None):
-        """Determine school type based on name and additional fields"""
-        name_lower = name.lower()
-        
-        # Check institution type first
-        if institution_type and 'charter' in str(institution_type).lower():
-            return 'charter'
-        
-        # Check building charter field
-        if building_charter and pd.notna(building_charter):
-            if 'charter' in str(building_charter).lower():
-                return 'charter'
-        
-        # Private school indicators
-        if any(word in name_lower for word in ['catholic', 'christian', 'episcopal', 'methodist', 'baptist', 'lutheran', 'parish', 'academy', 'preparatory', 'prep']):
-            if 'district' not in name_lower:
-                return 'private'
-        
-        # Charter school indicators
-        if any(word in name_lower for word in ['charter', 'academy']) and 'district' not in name_lower:
-            return 'charter'
-        
-        # District indicators
-        if any(word in name_lower for word in ['district', 'unified', 'school district', 'public']):
-            return 'district'
-        
-        # CMO indicators
-        if 'cmo' in name_lower or 'charter management' in name_lower:
-            return 'cmo'
-        
-        # ESC indicators
-        if 'esc' in name_lower or 'educational service' in name_lower:
-            return 'esc'
-        
-        # Default classification
-        if 'school' in name_lower:
-            return 'charter'
-        else:
-            return 'district'
-    
     def load_and_combine_data(self):
         """Load and combine data from all Excel files"""
         logger.info("📊 Loading and combining data sources...")
         
         # Load the updated file with product data
-        df_updated = pd.read_excel('UPDATED - MAP INFO - ALL CLIENTS-2025-07-08-16-18-18.xlsx')
+        df_updated = read_workbook(self.workbook_file)
         logger.info(f"📁 Loaded {len(df_updated)} customers from UPDATED file")
         
-        combined_customers = []
-        seen_names = set()
+        # First row per school wins: names that differ only in spelling
+        # ("Lincoln Elem." / "Lincoln Elementary School") in the same state,
+        # or similar names sharing a website, are one school
+        names = text(df_updated, 'School Name')
+        websites = text(df_updated, 'Website')
+        websites = websites.where(~websites.isin(MISSING_TEXT), '')
+        df_updated = df_updated[~np.array(duplicated(names, websites, text(df_updated, 'City Address')), dtype=bool)]
+        names = names[df_updated.index]
         
-        for _, row in df_updated.iterrows():
-            try:
-                name = str(row['School Name']).strip()
-                
-                # Skip duplicates
-                if name.lower() in seen_names:
-                    continue
-                seen_names.add(name.lower())
-                
-                # Clean website URL
-                website = str(row.get('Website', '')).strip()
-                if website and not website.startswith('http'):
-                    website = f"https://{website}"
-                
-                # Extract state from proper column
-                state = str(row.get('City Address', '')).strip()
-                
-                customer = {
-                    'name': name,
-                    'address': self.clean_address(row),
-                    'website': website,
-                    'state': state,
-                    'type': self.determine_school_type(
-                        name, 
-                        row.get('Agile Institution Type'),
-                        row.get('Agile Building Charter')
-                    ),
-                    'products': {
-                        'cms': bool(row.get('CMS', False)),
-                        'mobile': bool(row.get('Access', False)),  # Access appears to be mobile
-                        'masscomm': bool(row.get('SIA', False)),   # SIA appears to be communications
-                        'payments': bool(row.get('Pay', False))
-                    }
+        # The UPDATED file's columns are mixed up: STATE holds the street,
+        # Street Address the city, City Address the state
+        addresses = join_parts([
+            text(df_updated, 'STATE'),
+            text(df_updated, 'Street Address'),
+            text(df_updated, 'City Address'),
+            text(df_updated, 'Zip Address'),
+        ])
+        columns = pd.DataFrame({
+            'name': names,
+            'address': addresses,
+            'address_key': address_keys(addresses),
+            'website': with_scheme(text(df_updated, 'Website')),
+            'state': text(df_updated, 'City Address'),
+            'type': classify_schools(
+                names,
+                values(df_updated, 'Agile Institution Type'),
+                values(df_updated, 'Agile Building Charter')
+            ),
+            'cms': flags(df_updated, 'CMS'),
+            'mobile': flags(df_updated, 'Access'),  # Access appears to be mobile
+            'masscomm': flags(df_updated, 'SIA'),  # SIA appears to be communications
+            'payments': flags(df_updated, 'Pay'),
+        })
+        columns = columns[columns['address'] != '']  # Only keep customers with an address to geocode
+        
+        combined_customers = [
+            {
+                'name': row.name,
+                'address': row.address,
+                'address_key': row.address_key,
+                'website': row.website,
+                'state': row.state,
+                'type': row.type,
+                'products': {
+                    'cms': bool(row.cms),
+                    'mobile': bool(row.mobile),
+                    'masscomm': bool(row.masscomm),
+                    'payments': bool(row.payments)
                 }
-                
-                if customer['address']:  # Only add if we have an address to geocode
-                    combined_customers.append(customer)
-                
-            except Exception as e:
-                logger.warning(f"Error processing row: {e}")
-                continue
+            }
+            for row in columns.itertuples(index=False)
+        ]
         
         logger.info(f"✅ Combined {len(combined_customers)} unique customers with product data")
         return combined_customers
@@ -222,7 +158,7 @@ class IntelligentGeocoder:
     def save_progress(self, customers, cache):
         """Save current progress to data.js"""
         try:
-            with open(self.output_file, 'w') as f:
+            with atomic_write(self.output_file) as f:
                 f.write("// Real Edlio customer data with product information\n")
                 f.write(f"// Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
                 f.write(f"// Total customers: {len(customers)}\n")
@@ -241,98 +177,122 @@ class IntelligentGeocoder:
                 
                 f.write("];\n")
             
-            # Save cache
-            self.save_cache(cache)
+            # Cache entries are committed as they are geocoded
             logger.info(f"💾 Progress saved: {len([c for c in customers if c.get('lat')])} geocoded customers")
             
         except Exception as e:
             logger.error(f"Error saving progress: {e}")
     
-    def run_intelligent_geocoding(self):
-        """Run the intelligent geocoding process"""
+    def prepare(self):
+        """Load customers and the cache, reusing what an earlier run already loaded.
+        
+        The cache stays open and the customer list (with the locations found
+        so far) is only rebuilt when the workbook changes on disk.
+        """
+        if self.cache is None:
+            self.cache = self.load_cache()
+        stat = os.stat(self.workbook_file)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        if self.customers is None or signature != self.workbook_signature:
+            self.customers = self.load_and_combine_data()
+            self.workbook_signature = signature
+        return self.customers, self.cache
+    
+    def run_intelligent_geocoding(self, should_stop=None):
+        """Run the intelligent geocoding process (until should_stop() is true, if given)"""
         logger.info("🚀 Starting intelligent geocoding process...")
+        stop_requested = lambda: self.should_stop or (should_stop is not None and should_stop())
         
-        # Load data and cache
-        customers = self.load_and_combine_data()
-        cache = self.load_cache()
+        # Load data and cache (instant when already resident)
+        customers, cache = self.prepare()
         
         # Statistics
         total_customers = len(customers)
-        geocoded_count = 0
-        cache_hits = 0
-        failed_count = 0
-        batch_count = 0
+        stats = {'geocoded': 0, 'cache_hits': 0, 'failed': 0, 'processed': 0}
         
-        logger.info(f"📊 Processing {total_customers} customers in batches of {self.batch_size}")
+        # Resolve cache hits up front so only new addresses reach the network
+        pending = []
+        for customer in customers:
+            address = customer['address']
+            if customer.get('lat') is not None:
+                stats['cache_hits'] += 1  # Located by an earlier run of this resident geocoder
+                stats['geocoded'] += 1
+            elif address in cache:
+                customer.update(cache[address])
+                stats['cache_hits'] += 1
+                stats['geocoded'] += 1
+            else:
+                pending.append(customer)
         
-        for i in range(0, total_customers, self.batch_size):
-            if self.should_stop:
-                logger.info("🛑 Stopping due to shutdown signal")
-                break
-            
-            batch = customers[i:i + self.batch_size]
-            batch_count += 1
-            
-            logger.info(f"🔄 Processing batch {batch_count} ({i+1}-{min(i+self.batch_size, total_customers)} of {total_customers})")
-            
-            batch_processed = 0
-            for customer in batch:
-                if self.should_stop:
-                    break
-                
-                address = customer['address']
-                
-                # Check cache first
-                if address in cache:
-                    customer.update(cache[address])
-                    cache_hits += 1
-                    geocoded_count += 1
+        # Customers sharing a canonical address are geocoded once
+        groups = group_by_key(pending, lambda customer: customer['address_key'])
+        report = dedup_report(groups)
+        
+        logger.info(f"📊 {stats['cache_hits']} customers served from cache, "
+                    f"geocoding {report['unique_queries']} unique addresses for {report['rows']} customers "
+                    f"({report['requests_saved']} requests saved by dedup) with {self.concurrency} "
+                    f"requests in flight at {self.requests_per_second} req/s")
+        
+        def on_result(group, location):
+            stats['processed'] += 1
+            if location:
+                cache[group[0]['address']] = location
+            for customer in group:
+                if location:
+                    customer.update(location)
+                    stats['geocoded'] += 1
+                    logger.info(f"    ✅ {customer['name'][:50]}: {location['lat']:.4f}, {location['lng']:.4f}")
                 else:
-                    # Geocode new address
-                    logger.info(f"  🌍 Geocoding: {customer['name'][:50]}...")
-                    location = self.geocode_address(address)
-                    
-                    if location:
-                        customer.update(location)
-                        cache[address] = location
-                        geocoded_count += 1
-                        logger.info(f"    ✅ Success: {location['lat']:.4f}, {location['lng']:.4f}")
-                    else:
-                        failed_count += 1
-                        logger.warning(f"    ❌ Failed to geocode: {address}")
-                        continue
-                    
-                    # Rate limiting
-                    time.sleep(self.delay_between_requests)
-                
-                batch_processed += 1
+                    stats['failed'] += 1
+                    logger.warning(f"    ❌ Failed to geocode: {customer['address']}")
             
             # Save progress after each batch
-            self.save_progress(customers, cache)
-            
-            # Report progress
-            logger.info(f"📊 Batch {batch_count} complete: {batch_processed} processed")
-            logger.info(f"📈 Total progress: {geocoded_count}/{total_customers} ({geocoded_count/total_customers*100:.1f}%)")
-            logger.info(f"💾 Cache hits: {cache_hits}, New geocodes: {geocoded_count-cache_hits}, Failed: {failed_count}")
-            
-            # Rest between batches (unless it's the last batch)
-            if i + self.batch_size < total_customers and not self.should_stop:
-                logger.info(f"😴 Resting {self.delay_between_batches} seconds before next batch...")
-                time.sleep(self.delay_between_batches)
+            if stats['processed'] % self.batch_size == 0:
+                self.save_progress(customers, cache)
+                logger.info(f"📈 Total progress: {stats['geocoded']}/{total_customers} ({stats['geocoded']/total_customers*100:.1f}%)")
+                logger.info(f"💾 Cache hits: {stats['cache_hits']}, New geocodes: {stats['geocoded']-stats['cache_hits']}, Failed: {stats['failed']}")
+                logger.info(f"🚦 Request rate: {self.rate_limiter.current_rate:.2f}/s")
+        
+        engine = GeocodingEngine(
+            worker=lambda group: self.geocode_address(group[0]['address']),
+            on_result=on_result,
+            concurrency=self.concurrency,
+            should_stop=stop_requested
+        )
+        engine.run(groups.values())
+        
+        if self.should_stop:
+            logger.info("🛑 Stopped due to shutdown signal")
+        elif stop_requested():
+            logger.info("⏸️ Paused, remaining addresses wait for the next run")
         
         # Final save and report
         self.save_progress(customers, cache)
+        self.save_cache(cache)
         
+        geocoded_count = stats['geocoded']
+        cache_hits = stats['cache_hits']
         logger.info("🎉 Geocoding process complete!")
         logger.info(f"📊 Final Statistics:")
         logger.info(f"   • Total customers: {total_customers}")
         logger.info(f"   • Successfully geocoded: {geocoded_count}")
         logger.info(f"   • Cache hits: {cache_hits}")
         logger.info(f"   • New geocodes: {geocoded_count - cache_hits}")
-        logger.info(f"   • Failed: {failed_count}")
+        logger.info(f"   • Failed: {stats['failed']}")
         logger.info(f"   • Success rate: {geocoded_count/total_customers*100:.1f}%")
+        logger.info(f"   • Rate limiter: {self.rate_limiter.metrics()}")
+        return stats
 
 def main():
+    # Configured here, not on import: the daemon imports this module and logs to its own file
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('intelligent_geocoding.log'),
+            logging.StreamHandler()
+        ]
+    )
     geocoder = IntelligentGeocoder()
     geocoder.run_intelligent_geocoding()
 
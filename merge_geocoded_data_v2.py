@@ -2,106 +2,72 @@
 """
 Merge the batch geocoded Apptegy data with the current dataset
 Handles the different data structures properly
+
+Both files are streamed through geocoding.merge, which keeps 8 bytes per
+current record and under 1 KB per batch record in memory. Use --dry-run
+to preview what would be added without writing.
 """
-import json
+import argparse
 import os
-from datetime import datetime
 
-def convert_batch_record(batch_record):
-    """Convert batch record format to current format"""
-    location = batch_record.get('location', {})
-    address = location.get('address', {})
-    
-    # Extract state from address
-    state = address.get('state', '')
-    
-    # Extract city - prefer neighbourhood, then town, then city from address
-    city = (address.get('neighbourhood') or 
-            address.get('town') or 
-            address.get('city') or 
-            batch_record.get('existing_city', ''))
-    
-    return {
-        "recordId": batch_record['record_id'],
-        "name": batch_record['company_name'],
-        "competitor": "Apptegy",
-        "domain": batch_record.get('domain', ''),
-        "city": city,
-        "state": state,
-        "owner": "Unknown",  # Not in batch data
-        "createDate": batch_record.get('processed_at', ''),
-        "lat": location.get('latitude'),
-        "lng": location.get('longitude'),
-        "type": "competitor",
-        "products": ["CMS"],  # Default for Apptegy
-        "customerType": "District",  # Default
-        "arr": 0,  # Not in batch data
-        "employees": 0,  # Not in batch data
-        "lastContact": batch_record.get('processed_at', ''),
-        "salesStage": "Competitor",
-        "priority": "Medium"
-    }
+from geocoding.merge import BATCH_FILE, CURRENT_FILE, merge_batch, read_json_key
 
-def merge_geocoded_data():
-    # Load current data
-    print("Loading current geocoded data...")
-    with open('apptegy-geocoded-current.json', 'r') as f:
-        current_data = json.load(f)
-    
-    # Load batch geocoded data
-    print("Loading batch geocoded data...")
-    with open('apptegy-geocoded-batch.json', 'r') as f:
-        batch_json = json.load(f)
-        batch_data = batch_json.get('successful_geocodes', [])
-    
-    print(f"Current data: {len(current_data)} records")
-    print(f"Batch data: {len(batch_data)} records")
-    
-    # Create a set of existing record IDs to avoid duplicates
-    existing_ids = {record['recordId'] for record in current_data}
-    
-    # Merge new records
-    new_records = 0
-    for batch_record in batch_data:
-        record_id = batch_record['record_id']
-        if record_id not in existing_ids:
-            converted_record = convert_batch_record(batch_record)
-            current_data.append(converted_record)
-            new_records += 1
-    
-    print(f"Added {new_records} new records")
-    print(f"Total records after merge: {len(current_data)}")
-    
-    # Backup current file
-    backup_name = f'apptegy-geocoded-current-backup-{datetime.now().strftime("%Y%m%d-%H%M%S")}.json'
-    print(f"Creating backup: {backup_name}")
-    os.rename('apptegy-geocoded-current.json', backup_name)
-    
-    # Save merged data
-    print("Saving merged data to apptegy-geocoded-current.json...")
-    with open('apptegy-geocoded-current.json', 'w') as f:
-        json.dump(current_data, f, indent=2)
-    
-    # Show statistics
-    print("\nMerge Statistics:")
-    print(f"Previous dataset: {len(current_data) - new_records} records")
-    print(f"New records added: {new_records}")
-    print(f"Final dataset: {len(current_data)} records")
-    
-    # Count by state
-    state_counts = {}
-    for record in current_data:
-        state = record.get('state', 'Unknown')
-        if state:  # Only count non-empty states
-            state_counts[state] = state_counts.get(state, 0) + 1
-    
-    print("\nTop 10 states by competitor count:")
+def print_top_states(state_counts, label):
+    print(f"\n{label}")
     sorted_states = sorted(state_counts.items(), key=lambda x: x[1], reverse=True)[:10]
     for state, count in sorted_states:
         print(f"  {state}: {count} schools")
-    
-    return len(current_data)
+
+def merge_geocoded_data(current_file=CURRENT_FILE, batch_file=BATCH_FILE, dry_run=False, near_duplicates=True):
+    print(f"Streaming {batch_file} into {current_file}...")
+    stats = merge_batch(current_file, batch_file, dry_run=dry_run, near_duplicates=near_duplicates)
+
+    print(f"Current data: {stats['current']} records")
+    print(f"Batch data: {stats['batch']} records")
+    print(f"Duplicate records (skipped): {stats['duplicates']}")
+    if near_duplicates:
+        print(f"Same school under another name or ID (skipped): {stats['near_duplicates']}")
+
+    if dry_run:
+        metadata = read_json_key(batch_file, 'metadata', {})
+        print(f"\nBatch Metadata:")
+        print(f"  Processed at: {metadata.get('processed_at', 'N/A')}")
+        print(f"  Total results: {metadata.get('total_results', 'N/A')}")
+        print(f"  Approximate (ZIP/place centroid): {metadata.get('approximate_results', 0)}")
+        print(f"  Total errors: {metadata.get('total_errors', 'N/A')}")
+        print(f"  Success rate: {metadata.get('success_rate', 0):.2f}%")
+        print(f"\nWould add {stats['added']} new records ({stats['approximate']} at a ZIP/place centroid)")
+        print(f"Total records after merge would be: {stats['total']}")
+        print_top_states(stats['added_states'], "States that would be added (top 10):")
+        return stats['total']
+
+    print(f"Added {stats['added']} new records ({stats['approximate']} at a ZIP/place centroid)")
+    print(f"Total records after merge: {stats['total']}")
+    if stats['snapshot']:
+        print(f"Previous version kept as snapshot {stats['snapshot'][:12]} "
+              f"(python3 dataset_snapshots.py restore {current_file} {stats['snapshot'][:12]})")
+    print(f"Saved merged data to {current_file} ({os.path.getsize(current_file):,} bytes)")
+    print(f"Saved compact copy for the map to {stats['compact']} ({os.path.getsize(stats['compact']):,} bytes)")
+    print(f"Dataset version {stats['version']} (clients on the previous version fetch only the {stats['added']} added records)")
+
+    # Show statistics
+    print("\nMerge Statistics:")
+    print(f"Previous dataset: {stats['current']} records")
+    print(f"New records added: {stats['added']}")
+    print(f"Final dataset: {stats['total']} records")
+    print_top_states(stats['states'], "Top 10 states by competitor count:")
+
+    return stats['total']
 
 if __name__ == "__main__":
-    total = merge_geocoded_data()
-    print(f"\n✅ Merge complete! Total Apptegy competitors geocoded: {total}")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Merge apptegy-geocoded-batch.json into apptegy-geocoded-current.json")
+    parser.add_argument('--current', default=CURRENT_FILE, help="Dataset to merge into")
+    parser.add_argument('--batch', default=BATCH_FILE, help="Batch geocoding output to merge")
+    parser.add_argument('--dry-run', action='store_true', help="Report what would be added without writing")
+    parser.add_argument('--ids-only', action='store_true',
+                        help="Only skip batch records whose Record ID is already in the dataset")
+    args = parser.parse_args()
+
+    total = merge_geocoded_data(args.current, args.batch, args.dry_run, not args.ids_only)
+    if not args.dry_run:
+        print(f"\n✅ Merge complete! Total Apptegy competitors geocoded: {total}")
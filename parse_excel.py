@@ -1,9 +1,11 @@
 import pandas as pd
-import json
+
+from geocoding.datasets import atomic_write
+from geocoding.workbook import read_workbook
 
 # Read both Excel files
-charter_df = pd.read_excel('MAP - Charter & Private Clients Address-2025-07-03-08-26-15.xlsx')
-district_df = pd.read_excel('MAP - District Client Address-2025-07-03-08-26-06.xlsx')
+charter_df = read_workbook('MAP - Charter & Private Clients Address-2025-07-03-08-26-15.xlsx')
+district_df = read_workbook('MAP - District Client Address-2025-07-03-08-26-06.xlsx')
 
 # Function to clean and format URL
 def format_url(url):
@@ -64,7 +66,7 @@ for i, customer in enumerate(all_customers):
 js_content += "];"
 
 # Write to data.js
-with open('data.js', 'w', encoding='utf-8') as f:
+with atomic_write('data.js') as f:
     f.write(js_content)
 
 print("\ndata.js has been updated with real customer data!")
\ No newline at end of file
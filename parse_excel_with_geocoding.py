@@ -1,31 +1,22 @@
 import pandas as pd
-import json
-import time
-from urllib.parse import quote
-import urllib.request
+
+from geocoding import AdaptiveRateLimiter, get_backend
+from geocoding.datasets import atomic_write
+from geocoding.workbook import read_workbook
+
+backend = get_backend(user_agent='Edlio Customer Map Geocoder', bucket=AdaptiveRateLimiter(1.0),
+                      countrycodes='us')
 
 def geocode_address(address):
-    """Use Nominatim (OpenStreetMap) to geocode addresses"""
+    """Use the shared geocoding backend (Nominatim by default) to geocode addresses"""
     try:
-        # Clean and format address
-        encoded_address = quote(address)
-        url = f"https://nominatim.openstreetmap.org/search?q={encoded_address}&format=json&limit=1&countrycodes=us"
-        
-        # Add headers to avoid being blocked
-        headers = {
-            'User-Agent': 'Edlio Customer Map Geocoder'
-        }
-        
-        request = urllib.request.Request(url, headers=headers)
-        response = urllib.request.urlopen(request)
-        data = json.loads(response.read().decode())
-        
-        if data and len(data) > 0:
-            return float(data[0]['lat']), float(data[0]['lon'])
-        return None, None
+        result = backend.search(address)
     except Exception as e:
         print(f"Error geocoding {address}: {e}")
         return None, None
+    if result:
+        return result['lat'], result['lng']
+    return None, None
 
 # Function to clean and format URL
 def format_url(url):
@@ -37,8 +28,8 @@ def format_url(url):
     return url
 
 # Read both Excel files
-charter_df = pd.read_excel('MAP - Charter & Private Clients Address-2025-07-03-08-26-15.xlsx')
-district_df = pd.read_excel('MAP - District Client Address-2025-07-03-08-26-06.xlsx')
+charter_df = read_workbook('MAP - Charter & Private Clients Address-2025-07-03-08-26-15.xlsx')
+district_df = read_workbook('MAP - District Client Address-2025-07-03-08-26-06.xlsx')
 
 print("Processing customer data...")
 all_customers = []
@@ -72,9 +63,6 @@ for idx, row in charter_df.iterrows():
                 'state': state
             })
         
-        # Be nice to the geocoding service
-        time.sleep(1)
-        
         # Limit for testing (remove this line to process all)
         if idx >= 19:  # Process first 20
             break
@@ -108,9 +96,6 @@ for idx, row in district_df.iterrows():
                 'state': state
             })
         
-        # Be nice to the geocoding service
-        time.sleep(1)
-        
         # Limit for testing (remove this line to process all)
         if idx >= 19:  # Process first 20
             break
@@ -131,7 +116,7 @@ for i, customer in enumerate(all_customers):
 js_content += "];"
 
 # Write to data.js
-with open('data.js', 'w', encoding='utf-8') as f:
+with atomic_write('data.js') as f:
     f.write(js_content)
 
 print("\ndata.js has been updated with real customer data!")
\ No newline at end of file
@@ -4,58 +4,25 @@ Process Apptegy competitor data from HubSpot CRM export
 Geocode schools and prepare for competitive analysis
 """
 
-import csv
 import json
-import requests
-import time
 from collections import defaultdict
 import re
 
+from geocoding import AdaptiveRateLimiter, get_backend
+from geocoding.datasets import atomic_write
+from geocoding.hints import domain_label_state, domain_state, name_state, row_city
+from geocoding.hubspot import iter_hubspot_rows
+
+backend = get_backend(user_agent='EdlioCompetitorAnalysis/1.0', bucket=AdaptiveRateLimiter(1.0))
+
 def clean_location_data(row):
     """Extract and clean location information from the row"""
-    # Try to get city from various columns
-    city = row.get('City', '').strip()
-    if not city:
-        city = row.get('Agile Location City', '').strip()
-    
-    # Try to get state from company name or domain
+    # City from the CRM columns, state from the domain (e.g., .tx.us, .k12.fl.us,
+    # doe.sd.gov) or a state abbreviation in the company name
     company_name = row.get('Company name', '').strip()
     domain = row.get('Company Domain Name', '').strip()
-    
-    # Common state abbreviations in school names
-    state_patterns = {
-        'TX': 'Texas', 'CA': 'California', 'FL': 'Florida', 'NY': 'New York',
-        'IL': 'Illinois', 'PA': 'Pennsylvania', 'OH': 'Ohio', 'MI': 'Michigan',
-        'GA': 'Georgia', 'NC': 'North Carolina', 'VA': 'Virginia', 'WA': 'Washington',
-        'AZ': 'Arizona', 'MA': 'Massachusetts', 'IN': 'Indiana', 'TN': 'Tennessee',
-        'MO': 'Missouri', 'MD': 'Maryland', 'WI': 'Wisconsin', 'CO': 'Colorado',
-        'MN': 'Minnesota', 'SC': 'South Carolina', 'AL': 'Alabama', 'LA': 'Louisiana',
-        'KY': 'Kentucky', 'OR': 'Oregon', 'OK': 'Oklahoma', 'CT': 'Connecticut',
-        'IA': 'Iowa', 'MS': 'Mississippi', 'AR': 'Arkansas', 'KS': 'Kansas',
-        'UT': 'Utah', 'NV': 'Nevada', 'NM': 'New Mexico', 'NE': 'Nebraska',
-        'WV': 'West Virginia', 'ID': 'Idaho', 'HI': 'Hawaii', 'NH': 'New Hampshire',
-        'ME': 'Maine', 'RI': 'Rhode Island', 'MT': 'Montana', 'DE': 'Delaware',
-        'SD': 'South Dakota', 'ND': 'North Dakota', 'AK': 'Alaska', 'VT': 'Vermont',
-        'WY': 'Wyoming'
-    }
-    
-    state = ''
-    # Try to extract state from domain (e.g., .tx.us, .ca.us, .k12.fl.us)
-    if domain:
-        for abbr, full_name in state_patterns.items():
-            if f'.{abbr.lower()}.' in domain.lower() or f'.k12.{abbr.lower()}.' in domain.lower():
-                state = full_name
-                break
-    
-    # If no state found, try to infer from company name patterns
-    if not state:
-        name_lower = company_name.lower()
-        for abbr, full_name in state_patterns.items():
-            if f' {abbr.lower()} ' in name_lower or name_lower.endswith(f' {abbr.lower()}'):
-                state = full_name
-                break
-    
-    return city, state
+    state = domain_state(domain) or domain_label_state(domain) or name_state(company_name)
+    return row_city(row), state or ''
 
 def geocode_school(company_name, city, state, domain):
     """Geocode a school using OpenStreetMap Nominatim"""
@@ -71,31 +38,14 @@ def geocode_school(company_name, city, state, domain):
         
         query = ', '.join(query_parts)
         
-        # OpenStreetMap Nominatim API
-        url = 'https://nominatim.openstreetmap.org/search'
-        params = {
-            'q': query,
-            'format': 'json',
-            'limit': 1,
-            'addressdetails': 1
-        }
-        
-        headers = {
-            'User-Agent': 'EdlioCompetitorAnalysis/1.0'
-        }
-        
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            if data:
-                result = data[0]
-                return {
-                    'lat': float(result['lat']),
-                    'lng': float(result['lon']),
-                    'display_name': result.get('display_name', ''),
-                    'geocoded': True
-                }
+        result = backend.search(query)
+        if result:
+            return {
+                'lat': result['lat'],
+                'lng': result['lng'],
+                'display_name': result['display_name'],
+                'geocoded': True
+            }
         
         return None
         
@@ -111,60 +61,51 @@ def process_apptegy_data():
     competitor_schools = []
     geocoded_count = 0
     
-    # Read the CSV file
-    with open('hubspot-crm-exports-all-apptegy-schools-2025-07-15.csv', 'r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
+    # Stream the CSV file (rows are read lazily)
+    for row in iter_hubspot_rows(limit=100):  # Limit for testing - remove this for full processing
+        company_name = row.get('Company name', '').strip()
+        domain = row.get('Company Domain Name', '').strip()
+        owner = row.get('Company owner', '').strip()
+        create_date = row.get('Create Date', '').strip()
         
-        for i, row in enumerate(reader):
-            if i >= 100:  # Limit for testing - remove this for full processing
-                break
-                
-            company_name = row.get('Company name', '').strip()
-            domain = row.get('Company Domain Name', '').strip()
-            owner = row.get('Company owner', '').strip()
-            create_date = row.get('Create Date', '').strip()
-            
-            if not company_name:
-                continue
-            
-            # Clean location data
-            city, state = clean_location_data(row)
+        if not company_name:
+            continue
+        
+        # Clean location data
+        city, state = clean_location_data(row)
+        
+        # Geocode the school
+        location = geocode_school(company_name, city, state, domain)
+        
+        if location:
+            geocoded_count += 1
             
-            # Geocode the school
-            location = geocode_school(company_name, city, state, domain)
+            school_data = {
+                'recordId': row.get('Record ID', ''),
+                'name': company_name,
+                'competitor': 'Apptegy',
+                'domain': domain,
+                'city': city,
+                'state': state,
+                'owner': owner,
+                'createDate': create_date,
+                'lat': location['lat'],
+                'lng': location['lng'],
+                'displayName': location['display_name'],
+                'type': 'competitor'
+            }
             
-            if location:
-                geocoded_count += 1
-                
-                school_data = {
-                    'recordId': row.get('Record ID', ''),
-                    'name': company_name,
-                    'competitor': 'Apptegy',
-                    'domain': domain,
-                    'city': city,
-                    'state': state,
-                    'owner': owner,
-                    'createDate': create_date,
-                    'lat': location['lat'],
-                    'lng': location['lng'],
-                    'displayName': location['display_name'],
-                    'type': 'competitor'
-                }
-                
-                competitor_schools.append(school_data)
-                
-                print(f"Geocoded {geocoded_count}: {company_name} in {city}, {state}")
-                
-                # Rate limiting for API
-                time.sleep(1)
+            competitor_schools.append(school_data)
             
-            else:
-                print(f"Failed to geocode: {company_name}")
+            print(f"Geocoded {geocoded_count}: {company_name} in {city}, {state}")
+        
+        else:
+            print(f"Failed to geocode: {company_name}")
     
     print(f"\\nProcessed {len(competitor_schools)} Apptegy schools successfully")
     
     # Save to JSON file
-    with open('apptegy-competitor-data.json', 'w', encoding='utf-8') as f:
+    with atomic_write('apptegy-competitor-data.json') as f:
         json.dump(competitor_schools, f, indent=2, ensure_ascii=False)
     
     print(f"Saved competitor data to apptegy-competitor-data.json")
@@ -2,16 +2,35 @@
 """
 Autonomous Geocoding Daemon
 Runs geocoding intelligently during off-hours with automatic scheduling.
+
+The geocoder stays resident in a worker thread: the customer list, the open
+cache and the HTTP session survive between off-hours windows, and the
+scheduler just resumes or pauses it.
+
+Each pass plans its work into a persisted priority queue (geocode_cache.db)
+and drains it most-urgent-first through one shared rate budget: paying
+customers missing from the map, then Apptegy schools near an existing
+customer (closest first), then the rest of the Apptegy backlog, then
+re-verification of the oldest cache entries.
 """
 
-import subprocess
+import threading
 import time
 import logging
-from datetime import datetime, time as dt_time
+from datetime import datetime, timedelta, time as dt_time
 import signal
 import sys
 import os
 
+import numpy as np
+
+from geocode_apptegy_schools import CSV_FILE as APPTEGY_CSV, SchoolGeocoder, save_batch_results
+from geocoding import GeocodingEngine, group_by_key
+from geocoding.hubspot import iter_chunks, iter_pending, row_id
+from geocoding.spatial import nearest_miles
+from geocoding.workqueue import WorkQueue
+from intelligent_geocoder import IntelligentGeocoder
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -23,10 +42,215 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+SCHEDULE_CHECK_INTERVAL = 60  # Seconds between off-hours checks
+RERUN_INTERVAL = 1800  # Seconds between passes while off-hours continue
+
+# Work queue priorities (lower is served first)
+PRIORITY_CUSTOMER = 0  # Paying customers not on the map yet
+PRIORITY_NEARBY = 1    # Apptegy schools within NEARBY_MILES of a customer; closer ones sort first
+PRIORITY_BACKLOG = 2   # The rest of the Apptegy export
+PRIORITY_REFRESH = 3   # Cache entries not re-verified for STALE_AFTER_DAYS
+NEARBY_MILES = 25
+STALE_AFTER_DAYS = 365
+REFRESH_PER_PASS = 200  # Stale entries queued per pass
+RETRY_DELAY = 3600  # Seconds before an item whose worker failed is served again
+SAVE_INTERVAL = 20  # Save data.js / Apptegy progress every N finished items
+
+def school_key(school):
+    """Work queue key of an Apptegy export row"""
+    return f"school:{row_id(school)}"
+
+class GeocodingWorker(threading.Thread):
+    """Resident geocoder, resumed and paused by the daemon's schedule"""
+    
+    def __init__(self):
+        super().__init__(name='geocoding-worker', daemon=True)
+        self.geocoder = IntelligentGeocoder(handle_signals=False)
+        self.queue = WorkQueue(self.geocoder.cache_db)
+        self.schools = None  # Apptegy geocoder, created on the first plan if the export is present
+        self.customers_by_key = {}
+        self.active = threading.Event()
+        self.shutdown = threading.Event()
+        self.last_finished = None
+        self.passes = 0
+    
+    @property
+    def running(self):
+        return self.active.is_set()
+    
+    def resume(self):
+        self.active.set()
+    
+    def pause(self):
+        """Stop starting new requests; the current pass saves and returns"""
+        self.active.clear()
+    
+    def stop(self):
+        self.shutdown.set()
+        self.active.set()  # Wake the thread so it can exit
+    
+    def should_stop(self):
+        return self.shutdown.is_set() or not self.active.is_set()
+    
+    def plan(self):
+        """Queue everything that needs geocoding; returns the items queued per kind"""
+        customers, cache = self.geocoder.prepare()
+        planned = {}
+        
+        # New customers: one item per canonical address
+        located = []
+        pending = []
+        for customer in customers:
+            if customer.get('lat') is None and customer['address'] in cache:
+                customer.update(cache[customer['address']])
+            if customer.get('lat') is None:
+                pending.append(customer)
+            else:
+                located.append((customer['lat'], customer['lng']))
+        self.customers_by_key = group_by_key(pending, lambda customer: customer['address_key'])
+        planned['customer'] = self.queue.push_many(
+            (f"customer:{key}", 'customer', PRIORITY_CUSTOMER, {'address': group[0]['address']})
+            for key, group in self.customers_by_key.items()
+        )
+        
+        # Apptegy rows not geocoded yet, ranked by their offline ZIP/city
+        # estimate's distance to the nearest customer. Rows already queued
+        # keep the row (and priority) they were planned with, so a pass that
+        # finds nothing new writes nothing. Rows that failed transiently come
+        # back once their retry time has passed.
+        if self.schools is None and os.path.exists(APPTEGY_CSV):
+            self.schools = SchoolGeocoder(rate_limiter=self.geocoder.rate_limiter, handle_signals=False)
+        planned['school'] = 0
+        if self.schools:
+            points = np.array(located, dtype=float).reshape(-1, 2)
+            queued = self.queue.keys('school')
+            pending_rows = ((index, school, parts)
+                            for index, school, parts in iter_pending(APPTEGY_CSV, self.schools.progress.processed,
+                                                                     waiting=self.schools.progress.waiting())
+                            if school_key(school) not in queued)
+            for chunk in iter_chunks(pending_rows):
+                estimates = [self.schools.locate_offline(school) for _, school, _ in chunk]
+                lats = [estimate['latitude'] if estimate else np.nan for estimate in estimates]
+                lngs = [estimate['longitude'] if estimate else np.nan for estimate in estimates]
+                distances = nearest_miles(points, lats, lngs)
+                items = []
+                for (index, school, parts), miles in zip(chunk, distances):
+                    if miles <= NEARBY_MILES:
+                        priority = PRIORITY_NEARBY + miles / NEARBY_MILES / 2
+                    else:
+                        priority = PRIORITY_BACKLOG
+                    items.append((school_key(school), 'school', priority,
+                                  {'index': index, 'school': school, 'parts': parts}))
+                planned['school'] += self.queue.push_many(items, update=False)
+        
+        # Re-verify the oldest cache entries
+        stale = cache.stale_entries(datetime.now() - timedelta(days=STALE_AFTER_DAYS), REFRESH_PER_PASS)
+        planned['refresh'] = self.queue.push_many(
+            (f"refresh:{cache.canonical_key(address)}", 'refresh', PRIORITY_REFRESH,
+             {'address': address, 'location': location})
+            for address, location in stale
+        )
+        return planned
+    
+    def process(self, item):
+        """Geocode one queued item (runs in an engine worker thread)"""
+        payload = item.payload
+        if item.kind == 'school':
+            if row_id(payload['school']) in self.schools.progress.processed:
+                return None  # Geocoded since it was queued (e.g. by geocode_apptegy_schools.py)
+            return self.schools.process_school(payload['school'], payload['index'], payload['parts'])
+        if item.kind == 'customer':
+            cached = self.geocoder.cache.get(payload['address'])
+            if cached:
+                return cached
+        return self.geocoder.geocode_address(payload['address'])
+    
+    def drain(self):
+        """Geocode queued items most-urgent-first until the queue is empty or we are paused"""
+        customers, cache = self.geocoder.customers, self.geocoder.cache
+        stats = {'customer': 0, 'school': 0, 'refresh': 0, 'located': 0, 'retried': 0}
+        failed = object()
+        
+        def work(item):
+            try:
+                return self.process(item)
+            except Exception as e:
+                logger.error(f"❌ Error geocoding {item.key}: {e}")
+                return failed
+        
+        def on_result(item, result):
+            if result is failed:
+                self.queue.retry(item.key, RETRY_DELAY)
+                stats['retried'] += 1
+                return
+            stats[item.kind] += 1
+            if item.kind == 'customer' and result:
+                cache[item.payload['address']] = result
+                for customer in self.customers_by_key.get(item.key.split(':', 1)[1], []):
+                    customer.update(result)
+                stats['located'] += 1
+            elif item.kind == 'school' and result:
+                self.schools.progress.record(result, item.payload['index'])
+                stats['located'] += result['geocoded']
+            elif item.kind == 'refresh':
+                # Rewritten either way, so an entry that no longer resolves
+                # keeps its location and leaves the stale list
+                cache[item.payload['address']] = result or item.payload['location']
+                stats['located'] += bool(result)
+            self.queue.complete(item.key)
+            
+            if sum(stats[kind] for kind in ('customer', 'school', 'refresh')) % SAVE_INTERVAL == 0:
+                self.save(customers, cache)
+                logger.info(f"📈 Queue progress: {stats}, {len(self.queue)} items left, "
+                            f"🚦 {self.geocoder.rate_limiter.current_rate:.2f} req/s")
+        
+        engine = GeocodingEngine(
+            worker=work,
+            on_result=on_result,
+            concurrency=self.geocoder.concurrency,
+            should_stop=self.should_stop
+        )
+        try:
+            engine.run(self.queue.iter_ready(self.should_stop))
+        finally:
+            # Items leased but dropped on pause go straight back to the queue
+            self.queue.release_leases()
+            self.save(customers, cache)
+            self.geocoder.save_cache(cache)
+            if self.schools and stats['school']:
+                self.schools.progress.compact()
+                save_batch_results(self.schools.progress)
+        return stats
+    
+    def save(self, customers, cache):
+        self.geocoder.save_progress(customers, cache)
+        if self.schools:
+            self.schools.progress.save_progress()
+    
+    def run(self):
+        while True:
+            self.active.wait()
+            if self.shutdown.is_set():
+                break
+            started = time.perf_counter()
+            try:
+                planned = self.plan()
+                logger.info(f"📋 Planned {planned}, queue holds {self.queue.stats()}")
+                stats = self.drain()
+                logger.info(f"📊 Drained {stats}, {len(self.queue)} items left in the queue")
+            except Exception as e:
+                logger.error(f"❌ Error running geocoding: {e}")
+            self.passes += 1
+            logger.info(f"✅ Geocoding pass {self.passes} ended after {time.perf_counter() - started:.1f}s")
+            if self.active.is_set() and not self.shutdown.is_set():
+                # Finished rather than paused: idle until the scheduler resumes us
+                self.last_finished = time.time()
+                self.active.clear()
+
 class GeocodingDaemon:
     def __init__(self):
         self.should_stop = False
-        self.geocoding_process = None
+        self.worker = GeocodingWorker()
         
         # Configure optimal hours (adjust as needed)
         self.start_hour = 22  # 10 PM
@@ -42,9 +266,9 @@ class GeocodingDaemon:
     def signal_handler(self, signum, frame):
         logger.info("🛑 Daemon shutdown signal received")
         self.should_stop = True
-        if self.geocoding_process:
-            logger.info("⏹️ Terminating geocoding process...")
-            self.geocoding_process.terminate()
+        if self.worker.running:
+            logger.info("⏹️ Stopping geocoding after in-flight requests...")
+        self.worker.stop()
     
     def is_off_hours(self):
         """Check if current time is during off-hours"""
@@ -55,60 +279,29 @@ class GeocodingDaemon:
         else:  # Same day
             return self.start_hour <= current_hour < self.end_hour
     
-    def run_geocoding(self):
-        """Run the geocoding process"""
-        try:
-            logger.info("🚀 Starting geocoding process...")
-            
-            # Run the intelligent geocoder
-            self.geocoding_process = subprocess.Popen(
-                ['python3', 'intelligent_geocoder.py'],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                cwd=os.getcwd()
-            )
-            
-            # Monitor the process
-            while True:
-                output = self.geocoding_process.stdout.readline()
-                if output == '' and self.geocoding_process.poll() is not None:
-                    break
-                if output:
-                    logger.info(f"📍 {output.strip()}")
-                
-                # Check if we should stop
-                if self.should_stop or not self.is_off_hours():
-                    logger.info("⏰ Off-hours ended or stop requested, terminating...")
-                    self.geocoding_process.terminate()
-                    break
-            
-            # Get final return code
-            return_code = self.geocoding_process.wait()
-            logger.info(f"✅ Geocoding process finished with code: {return_code}")
-            
-        except Exception as e:
-            logger.error(f"❌ Error running geocoding: {e}")
-        finally:
-            self.geocoding_process = None
+    def due_for_pass(self):
+        """Off-hours, worker idle, and the last pass finished long enough ago"""
+        return (not self.worker.running
+                and (self.worker.last_finished is None
+                     or time.time() - self.worker.last_finished >= RERUN_INTERVAL))
     
     def run_daemon(self):
         """Main daemon loop"""
         logger.info("🎯 Geocoding daemon started")
+        self.worker.start()
         
         while not self.should_stop:
             try:
                 if self.is_off_hours():
-                    logger.info("🌙 Off-hours detected, starting geocoding...")
-                    self.run_geocoding()
-                    
-                    if not self.should_stop:
-                        logger.info("💤 Geocoding complete, waiting until next off-hours period...")
-                else:
-                    logger.info("☀️ Business hours, waiting...")
+                    if self.due_for_pass():
+                        logger.info("🌙 Off-hours detected, resuming geocoding...")
+                        self.worker.resume()
+                elif self.worker.running:
+                    logger.info("☀️ Business hours, pausing geocoding...")
+                    self.worker.pause()
                 
-                # Wait 30 minutes before checking again
-                for _ in range(1800):  # 30 minutes in seconds
+                # Check the schedule again shortly
+                for _ in range(SCHEDULE_CHECK_INTERVAL):
                     if self.should_stop:
                         break
                     time.sleep(1)
@@ -120,6 +313,8 @@ class GeocodingDaemon:
                 logger.error(f"❌ Daemon error: {e}")
                 time.sleep(60)  # Wait 1 minute on error
         
+        self.worker.stop()
+        self.worker.join()
         logger.info("👋 Geocoding daemon stopped")
 
 def main():
@@ -128,13 +323,16 @@ def main():
         if sys.argv[1] == '--now':
             # Run geocoding immediately
             logger.info("🚀 Running geocoding immediately...")
-            from intelligent_geocoder import IntelligentGeocoder
             geocoder = IntelligentGeocoder()
             geocoder.run_intelligent_geocoding()
+        elif sys.argv[1] == '--plan':
+            # Fill the work queue without geocoding and show what is waiting
+            worker = GeocodingWorker()
+            logger.info(f"📋 Planned {worker.plan()}")
+            logger.info(f"📋 Queue holds {worker.queue.stats()}")
         elif sys.argv[1] == '--test':
             # Test the current data without geocoding
             logger.info("🧪 Testing data combination...")
-            from intelligent_geocoder import IntelligentGeocoder
             geocoder = IntelligentGeocoder()
             customers = geocoder.load_and_combine_data()
             
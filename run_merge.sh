@@ -1,3 +0,0 @@
-#!/bin/bash
-cd /Users/aliarsan/edliocustomermap/
-/usr/bin/python3 merge_geocoded_data_v2.py
\ No newline at end of file
@@ -1,80 +1,40 @@
 import pandas as pd
 import json
-import os
 from datetime import datetime
 
-def format_url(url):
-    """Clean and format URL"""
-    if pd.isna(url) or url == '' or url == 'N/A':
-        return None
-    url = str(url).strip()
-    if not url.startswith(('http://', 'https://')):
-        url = 'https://' + url
-    return url
+from geocoding import GeocodeCache
+from geocoding.datasets import atomic_write
+from geocoding.ingest import address_sheet
+from geocoding.workbook import read_workbook
 
-# Load geocoded cache
-with open('geocoded_data.json', 'r') as f:
-    geocoded_cache = json.load(f)
+# Open the geocode cache (the one geocode_all_customers.py fills), so
+# addresses are matched by canonical_address() like they are there
+geocoded_cache = GeocodeCache()
 
 print(f"Found {len(geocoded_cache)} geocoded addresses")
 
 # Read Excel files
-charter_df = pd.read_excel('MAP - Charter & Private Clients Address-2025-07-03-08-26-15.xlsx')
-district_df = pd.read_excel('MAP - District Client Address-2025-07-03-08-26-06.xlsx')
+charter_df = read_workbook('MAP - Charter & Private Clients Address-2025-07-03-08-26-15.xlsx')
+district_df = read_workbook('MAP - District Client Address-2025-07-03-08-26-06.xlsx')
 
-all_customers = []
+def cached_customers(df, default_name, school_type):
+    """Customers with a website whose address is already geocoded, in sheet order"""
+    sheet = address_sheet(df, default_name)
+    locations = sheet['address'].map(geocoded_cache.get)
+    sheet = sheet[locations.notna()]
+    locations = locations[sheet.index]
+    return pd.DataFrame({
+        'name': sheet['name'],
+        'lat': locations.map(lambda location: location['lat']),
+        'lng': locations.map(lambda location: location['lng']),
+        'url': sheet['url'],
+        'type': school_type,
+        'state': sheet['state'],
+    }).to_dict('records')
 
-# Process charter and private schools
-for idx, row in charter_df.iterrows():
-    name = str(row.get('School Name', 'Unknown School')).strip()
-    url = format_url(row.get('Website'))
-    
-    if url:
-        street = str(row.get('Street Address', '')).strip()
-        city = str(row.get('City Address', '')).strip()
-        state = str(row.get('STATE', '')).strip()
-        zip_code = str(row.get('Zip Address', '')).strip()
-        
-        full_address = f"{street}, {city}, {state} {zip_code}, USA"
-        
-        if full_address in geocoded_cache:
-            lat = geocoded_cache[full_address]['lat']
-            lng = geocoded_cache[full_address]['lng']
-            
-            all_customers.append({
-                'name': name,
-                'lat': lat,
-                'lng': lng,
-                'url': url,
-                'type': 'charter',
-                'state': state
-            })
-
-# Process district schools
-for idx, row in district_df.iterrows():
-    name = str(row.get('School Name', 'Unknown District')).strip()
-    url = format_url(row.get('Website'))
-    
-    if url:
-        street = str(row.get('Street Address', '')).strip()
-        city = str(row.get('City Address', '')).strip()
-        state = str(row.get('STATE', '')).strip()
-        zip_code = str(row.get('Zip Address', '')).strip()
-        
-        full_address = f"{street}, {city}, {state} {zip_code}, USA"
-        
-        if full_address in geocoded_cache:
-            lat = geocoded_cache[full_address]['lat']
-            lng = geocoded_cache[full_address]['lng']
-            
-            all_customers.append({
-                'name': name,
-                'lat': lat,
-                'lng': lng,
-                'url': url,
-                'type': 'district',
-                'state': state
-            })
+# Process charter and private schools, then district schools
+all_customers = cached_customers(charter_df, 'Unknown School', 'charter')
+all_customers += cached_customers(district_df, 'Unknown District', 'district')
 
 print(f"Total customers with geocoded locations: {len(all_customers)}")
 
@@ -95,11 +55,11 @@ for i, customer in enumerate(all_customers):
 js_content += "];"
 
 # Write to data.js
-with open('data.js', 'w', encoding='utf-8') as f:
+with atomic_write('data.js') as f:
     f.write(js_content)
 
 print(f"data.js has been updated with {len(all_customers)} customers!")
 
 # Save backup
-with open('customers_backup.json', 'w', encoding='utf-8') as f:
+with atomic_write('customers_backup.json') as f:
     json.dump(all_customers, f, indent=2)
\ No newline at end of file
@@ -1,4 +1,4 @@
-import json
+from geocoding.datasets import atomic_write
 
 # Read the current data.js file
 with open('data.js', 'r') as f:
@@ -24,7 +24,7 @@ after = html_content[insert_point:]
 new_html = before + '<!-- Customer Data -->\n    <script>\n        ' + content + '\n    </script>' + after
 
 # Write the updated HTML
-with open('index.html', 'w') as f:
+with atomic_write('index.html') as f:
     f.write(new_html)
 
 print("Successfully inlined customer data into index.html")
\ No newline at end of file